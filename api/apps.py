@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from api.services.metrics import install_db_instrumentation
+
+        connection_created.connect(install_db_instrumentation)
@@ -1,8 +1,8 @@
 import jwt
-from jwt import PyJWKClient
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
+from api.services.jwks_cache import JWKSCache, VerifiedTokenCache
 
 
 class ClerkUser:
@@ -29,22 +29,26 @@ class ClerkJWTAuthentication(BaseAuthentication):
 
         token = auth_header.split(" ")[1]
 
-        try:
-            jwks_client = PyJWKClient(f"{settings.CLERK_ISSUER}/.well-known/jwks.json")
+        token_cache = VerifiedTokenCache.get_instance()
+        payload = token_cache.get(token)
 
-            signing_key = jwks_client.get_signing_key_from_jwt(token)
+        if payload is None:
+            try:
+                signing_key = JWKSCache.get_instance().get_signing_key_from_jwt(token)
 
-            payload = jwt.decode(
-                token,
-                signing_key.key,
-                algorithms=["RS256"],
-                issuer=settings.CLERK_ISSUER,
-                options={"verify_exp": True},
-            )
+                payload = jwt.decode(
+                    token,
+                    signing_key.key,
+                    algorithms=["RS256"],
+                    issuer=settings.CLERK_ISSUER,
+                    options={"verify_exp": True},
+                )
 
-            user = ClerkUser(payload)
+            except Exception as e:
+                raise AuthenticationFailed(f"Invalid Clerk token: {str(e)}")
 
-            return (user, token)
+            token_cache.put(token, payload)
 
-        except Exception as e:
-            raise AuthenticationFailed(f"Invalid Clerk token: {str(e)}")
+        user = ClerkUser(payload)
+
+        return (user, token)
@@ -0,0 +1,239 @@
+import contextlib
+import contextvars
+import functools
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+_min_position = contextvars.ContextVar("min_position", default=None)
+
+# (lag in seconds, replayed WAL position in bytes). Lag is 0 when the replica
+# has replayed everything it received and is still connected upstream, so an
+# idle primary (no new WAL) does not look like lag; a replica that lost its
+# upstream is measured by its last replayed commit instead. Roles without
+# pg_read_all_stats see only the pid in pg_stat_wal_receiver.
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+         AND EXISTS (
+             SELECT 1 FROM pg_stat_wal_receiver
+             WHERE COALESCE(status, 'streaming') = 'streaming'
+         ) THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END,
+pg_wal_lsn_diff(
+    CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END,
+    '0/0'
+)
+"""
+
+
+class ReplicaSet:
+    """
+    Health-tracked round robin over the replica_N databases.
+
+    A replica is skipped for DATABASE_REPLICA_RETRY_SECONDS after a query on
+    it fails with a connection error, or after its replication lag (checked
+    at most every DATABASE_REPLICA_CHECK_INTERVAL) exceeds
+    DATABASE_REPLICA_MAX_LAG. With no healthy replica, reads use default.
+
+    Inside a reads_at_least() scope a replica is also skipped until it has
+    replayed the required primary position.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, aliases, retry_seconds: float, check_interval: float, max_lag: float):
+        self.aliases = list(aliases)
+        self.retry_seconds = retry_seconds
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+
+        self._cycle = itertools.cycle(self.aliases) if self.aliases else None
+        self._down_until = {}
+        self._checked_at = {}
+        self._replayed = {}
+        self._lock = threading.Lock()
+
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.failovers = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        aliases=[a for a in settings.DATABASES if a.startswith("replica_")],
+                        retry_seconds=settings.DATABASE_REPLICA_RETRY_SECONDS,
+                        check_interval=settings.DATABASE_REPLICA_CHECK_INTERVAL,
+                        max_lag=settings.DATABASE_REPLICA_MAX_LAG,
+                    )
+        return cls._instance
+
+    def healthy(self, alias, now):
+        return self._down_until.get(alias, 0) <= now
+
+    def choose(self):
+        """A healthy replica alias, or None to read from default."""
+        if self._cycle is None:
+            return None
+
+        position = _min_position.get()
+        now = time.monotonic()
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+                if not self.healthy(alias, now):
+                    continue
+                due = self._checked_at.get(alias, 0) + self.check_interval <= now
+                if due:
+                    self._checked_at[alias] = now
+
+            if due and not self.check(alias):
+                continue
+            if position is not None and not self.replayed(alias, position, checked=due):
+                continue
+
+            self.replica_reads += 1
+            return alias
+
+        self.primary_reads += 1
+        return None
+
+    def check(self, alias):
+        """Lag check on this thread's connection to alias; marks it down on failure."""
+        if connections[alias].vendor != "postgresql":
+            return True
+
+        try:
+            with connections[alias].cursor() as cur:
+                cur.execute(LAG_SQL)
+                lag, replayed = cur.fetchone()
+        except (OperationalError, InterfaceError) as e:
+            self.mark_down(alias, e)
+            return False
+
+        lag = float(lag)
+        self._replayed[alias] = int(replayed)
+
+        if lag > self.max_lag:
+            self.mark_down(alias, f"replication lag {lag:.1f}s")
+            return False
+        return True
+
+    def replayed(self, alias, position, checked=False):
+        """Whether alias has replayed the primary up to position; re-checks once if behind."""
+        if self._replayed.get(alias, -1) >= position:
+            return True
+        if checked or not self.check(alias):
+            return False
+        return self._replayed.get(alias, -1) >= position
+
+    def mark_down(self, alias, reason):
+        logger.warning("Replica %s marked down for %ss: %s", alias, self.retry_seconds, reason)
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + self.retry_seconds
+        connections[alias].close()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            healthy = sum(self.healthy(a, now) for a in self.aliases)
+        return {
+            "replicas": len(self.aliases),
+            "healthy": healthy,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "failovers": self.failovers,
+        }
+
+
+def read_alias():
+    """Database alias for the current read scope (default outside one)."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+def read_connection():
+    """Connection to run read-only raw SQL on; use instead of django.db.connection."""
+    return connections[read_alias()]
+
+
+@contextlib.contextmanager
+def reads_at_least(position):
+    """
+    Send replica reads in this scope only to replicas that have replayed the
+    primary up to position (WAL bytes, as read by DataVersionService), and
+    to default otherwise. None adds no constraint.
+    """
+    if position is None:
+        yield
+        return
+
+    token = _min_position.set(max(position, _min_position.get() or 0))
+    try:
+        yield
+    finally:
+        _min_position.reset(token)
+
+
+def replica_reads(fn):
+    """
+    Run fn with its reads (raw SQL via read_connection() and ORM reads) on a
+    healthy replica. fn must be read-only: if the replica fails with a
+    connection error, the replica is marked down and fn is re-run on default.
+    Nested calls keep the outer choice.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _read_alias.get() is not None:
+            return fn(*args, **kwargs)
+
+        replicas = ReplicaSet.get_instance()
+        alias = replicas.choose()
+        if alias is None:
+            return fn(*args, **kwargs)
+
+        token = _read_alias.set(alias)
+        try:
+            return fn(*args, **kwargs)
+        except (OperationalError, InterfaceError) as e:
+            replicas.mark_down(alias, e)
+            replicas.failovers += 1
+        finally:
+            _read_alias.reset(token)
+
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Sends ORM reads inside a replica_reads scope to the chosen replica.
+    Everything else, including all writes and migrations, uses default.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,185 @@
+import json
+import multiprocessing
+import queue
+import resource
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+SAMPLE_TEXTS = [
+    "Lithium ion battery pack for electric vehicles",
+    "Fresh mangoes, whole, not frozen",
+    "Dried mango slices packed in retail pouches",
+    "Basmati rice, semi-milled, in 25 kg bags",
+    "Cotton t-shirts, knitted, for men",
+    "Stainless steel kitchen sinks",
+    "Live horses for breeding purposes",
+    "Pharmaceutical formulations containing paracetamol",
+    "Solar photovoltaic cells assembled in modules",
+    "Export of dual-use items requires a SCOMET licence",
+    "Restricted items may be imported against an authorisation",
+    "Second-hand laptops and personal computers",
+]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(name, texts, batch_size, results):
+    import django
+
+    django.setup()
+    from api.services.embedding_backends import get_embedding_backend
+
+    base_rss = _peak_rss_mb()
+
+    start = time.perf_counter()
+    backend = get_embedding_backend(name)
+    load_seconds = time.perf_counter() - start
+
+    backend.encode(texts[:batch_size])
+
+    start = time.perf_counter()
+    vectors = np.concatenate(
+        [backend.encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    )
+    batched_seconds = time.perf_counter() - start
+
+    single = texts[:min(len(texts), 100)]
+    start = time.perf_counter()
+    for text in single:
+        backend.encode([text])
+    single_seconds = time.perf_counter() - start
+
+    results.put({
+        "backend": name,
+        "load_seconds": load_seconds,
+        "batched_texts_per_sec": len(texts) / batched_seconds,
+        "single_texts_per_sec": len(single) / single_seconds,
+        "base_rss_mb": base_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "vectors": vectors,
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare embedding backends: cosine parity against the torch backend, "
+        "throughput and peak RSS. Each backend runs in its own process so RSS "
+        "numbers are not polluted by the other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backends", nargs="+", default=["sentence-transformers", "onnx-int8"]
+        )
+        parser.add_argument("--samples", type=int, default=512)
+        parser.add_argument("--batch-size", type=int, default=32)
+        parser.add_argument(
+            "--from-db",
+            action="store_true",
+            help="Use itc_hs_master descriptions instead of the built-in samples",
+        )
+        parser.add_argument("--min-cosine", type=float, default=0.99)
+        parser.add_argument("--json", dest="json_path", help="Write results to this file")
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=1800,
+            help="Seconds to wait for each backend before giving up",
+        )
+
+    def load_texts(self, samples, from_db):
+        if from_db:
+            from hs.models import ItcHsMaster
+
+            texts = list(
+                ItcHsMaster.objects.exclude(description__isnull=True)
+                .values_list("description", flat=True)[:samples]
+            )
+        else:
+            texts = SAMPLE_TEXTS
+
+        if not texts:
+            raise CommandError("No texts to embed")
+
+        return [texts[i % len(texts)] for i in range(samples)]
+
+    def wait_for_report(self, name, proc, results, timeout):
+        # A backend that fails to import or load exits without a report, so
+        # never block on the queue alone.
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                report = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not proc.is_alive():
+                    proc.join()
+                    raise CommandError(f"{name}: benchmark process exited with code {proc.exitcode}")
+                if time.monotonic() > deadline:
+                    proc.terminate()
+                    proc.join()
+                    raise CommandError(f"{name}: no result after {timeout:.0f}s")
+
+        proc.join()
+        if proc.exitcode != 0:
+            raise CommandError(f"{name}: benchmark process exited with code {proc.exitcode}")
+        return report
+
+    def handle(self, *args, **options):
+        texts = self.load_texts(options["samples"], options["from_db"])
+        ctx = multiprocessing.get_context("spawn")
+
+        reports = []
+        for name in options["backends"]:
+            results = ctx.Queue()
+            proc = ctx.Process(
+                target=_run_backend, args=(name, texts, options["batch_size"], results)
+            )
+            proc.start()
+            report = self.wait_for_report(name, proc, results, options["timeout"])
+            reports.append(report)
+
+            self.stdout.write(
+                f"{name:>22}: load {report['load_seconds']:.2f}s, "
+                f"{report['batched_texts_per_sec']:.1f} texts/s batched, "
+                f"{report['single_texts_per_sec']:.1f} texts/s single, "
+                f"peak RSS {report['peak_rss_mb']:.0f} MB"
+            )
+
+        reference = reports[0]
+        summary = {"samples": len(texts), "backends": [], "parity": {}}
+        failed = False
+
+        for report in reports:
+            summary["backends"].append({k: v for k, v in report.items() if k != "vectors"})
+            if report is reference:
+                continue
+
+            a, b = reference["vectors"], report["vectors"]
+            cosine = (a * b).sum(axis=1) / (
+                np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+            )
+            parity = {
+                "mean_cosine": float(cosine.mean()),
+                "min_cosine": float(cosine.min()),
+                "p01_cosine": float(np.percentile(cosine, 1)),
+            }
+            summary["parity"][report["backend"]] = parity
+
+            self.stdout.write(
+                f"parity {report['backend']} vs {reference['backend']}: "
+                f"mean {parity['mean_cosine']:.4f}, min {parity['min_cosine']:.4f}"
+            )
+            failed = failed or parity["min_cosine"] < options["min_cosine"]
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump(summary, f, indent=2)
+
+        if failed:
+            raise CommandError(f"Cosine agreement below {options['min_cosine']}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.search_indexes import SEARCH_INDEXES, apply
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the full-text and trigram search columns and indexes on the "
+        "ingested tables (knowledge_base, itc_hs_master). Run after the "
+        "ingest has created them; existing indexes are left as they are."
+    )
+
+    def handle(self, *args, **options):
+        for name, (table, _) in SEARCH_INDEXES.items():
+            if apply(connection, name):
+                self.stdout.write(f"{name}: ok")
+            else:
+                self.stdout.write(f"{name}: skipped ({table} not found or not Postgres)")
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the embedding model to ONNX and quantize it to int8 for "
+        "EMBEDDING_BACKEND='onnx-int8'. Needs torch, transformers, onnx and "
+        "onnxruntime on the machine that runs the export only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+        parser.add_argument("--output-dir", default=settings.EMBEDDING_ONNX_DIR)
+        parser.add_argument("--opset", type=int, default=17)
+
+    def handle(self, *args, **options):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as e:
+            raise CommandError(f"Missing export dependency: {e}")
+
+        from api.services.embedding_backends import OnnxInt8Backend
+
+        model_name = options["model"]
+        if "/" not in model_name:
+            model_name = f"sentence-transformers/{model_name}"
+
+        output_dir = Path(options["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = output_dir / "model.onnx"
+        int8_path = output_dir / OnnxInt8Backend.MODEL_FILE
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+
+        tokenizer.backend_tokenizer.save(str(output_dir / OnnxInt8Backend.TOKENIZER_FILE))
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+        dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        self.stdout.write(f"Exporting {model_name} to {fp32_path}")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[n] for n in input_names),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=options["opset"],
+                dynamo=False,
+            )
+
+        self.stdout.write(f"Quantizing to {int8_path}")
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+        fp32_path.unlink()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {int8_path.name} and {OnnxInt8Backend.TOKENIZER_FILE} to {output_dir}. "
+            "Run `python manage.py benchmark_embeddings` to check parity."
+        ))
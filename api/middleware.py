@@ -0,0 +1,123 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from api.services import deadline, metrics
+
+
+class MetricsMiddleware:
+    """
+    Opens a per-request metrics scope, records the request in the latency
+    and per-request DB histograms and adds a Server-Timing header with the
+    stage spans, query/row counts and LLM sizes collected while the view ran.
+
+    Work done while a streaming response is consumed (e.g. SSE tokens) is
+    still recorded in the stage histograms, but not in the header, which is
+    sent before the body.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.METRICS_ENABLED
+        self.server_timing = settings.METRICS_SERVER_TIMING
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            collected = metrics.end_request(token)
+        return self.finish(request, response, collected, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            collected = metrics.end_request(token)
+        return self.finish(request, response, collected, time.perf_counter() - started)
+
+    def finish(self, request, response, collected, elapsed):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+
+        metrics.HTTP_REQUEST_SECONDS.observe(elapsed, request.method, route, response.status_code)
+        metrics.DB_QUERIES_PER_REQUEST.observe(collected.db_queries, route)
+        metrics.DB_ROWS_PER_REQUEST.observe(collected.db_rows, route)
+
+        if self.server_timing:
+            response["Server-Timing"] = collected.server_timing(elapsed)
+
+        metrics.write_snapshot()
+        return response
+
+
+class DeadlineMiddleware:
+    """
+    Gives every request a deadline (REQUEST_DEADLINE_SECONDS) that LLM calls
+    and retrieval stages clamp their timeouts to. Clients can ask for a
+    shorter one with an X-Request-Deadline header (seconds), and a view class
+    can tighten it with a `deadline_seconds` attribute. The deadline covers
+    the view; the body of a streaming response runs after it is reset.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.seconds = settings.REQUEST_DEADLINE_SECONDS
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def request_seconds(self, request):
+        seconds = self.seconds
+        try:
+            requested = float(request.headers.get("X-Request-Deadline", ""))
+        except ValueError:
+            return seconds
+        if requested > 0:
+            seconds = min(seconds, requested) if seconds else requested
+        return seconds
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        seconds = self.request_seconds(request)
+        if not seconds:
+            return self.get_response(request)
+
+        with deadline.scope(seconds):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        seconds = self.request_seconds(request)
+        if not seconds:
+            return await self.get_response(request)
+
+        with deadline.scope(seconds):
+            return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Runs inside the scope above, which resets the tightened deadline.
+        seconds = getattr(getattr(view_func, "view_class", None), "deadline_seconds", None)
+        if seconds:
+            deadline.start(seconds)
+        return None
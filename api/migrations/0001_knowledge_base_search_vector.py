@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from api.search_indexes import migration_operation
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+    ]
+
+    operations = [
+        # Skipped while the ingested table does not exist yet; see
+        # api.search_indexes and `manage.py create_search_indexes`.
+        migration_operation("knowledge_base_search_vector"),
+    ]
@@ -0,0 +1,112 @@
+"""
+Search columns and indexes on the externally ingested tables.
+
+knowledge_base and itc_hs_master are created by the ingest, not by a
+migration, so the migrations that add these skip tables that do not exist
+yet (fresh and test databases). Run `python manage.py create_search_indexes`
+after the ingest has created them; every statement is idempotent.
+
+Indexes are built CONCURRENTLY, so callers must not be inside a
+transaction. Adding a STORED generated column still rewrites the table
+under an ACCESS EXCLUSIVE lock.
+"""
+from django.db import migrations
+
+# name -> (table, [(forward, reverse)]), applied in order and reverted in
+# reverse.
+SEARCH_INDEXES = {
+    "knowledge_base_search_vector": (
+        "knowledge_base",
+        [
+            (
+                """
+                ALTER TABLE knowledge_base
+                    ADD COLUMN IF NOT EXISTS search_vector tsvector
+                    GENERATED ALWAYS AS (
+                        to_tsvector('english', coalesce(content, ''))
+                    ) STORED
+                """,
+                "ALTER TABLE knowledge_base DROP COLUMN IF EXISTS search_vector",
+            ),
+            (
+                """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS knowledge_base_search_vector_idx
+                    ON knowledge_base USING GIN (search_vector)
+                """,
+                "DROP INDEX CONCURRENTLY IF EXISTS knowledge_base_search_vector_idx",
+            ),
+        ],
+    ),
+    "itc_hs_master_search_vector": (
+        "itc_hs_master",
+        [
+            (
+                """
+                ALTER TABLE itc_hs_master
+                    ADD COLUMN IF NOT EXISTS search_vector tsvector
+                    GENERATED ALWAYS AS (
+                        to_tsvector('english', coalesce(description, ''))
+                    ) STORED
+                """,
+                "ALTER TABLE itc_hs_master DROP COLUMN IF EXISTS search_vector",
+            ),
+            (
+                """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS itc_hs_master_search_vector_idx
+                    ON itc_hs_master USING GIN (search_vector)
+                """,
+                "DROP INDEX CONCURRENTLY IF EXISTS itc_hs_master_search_vector_idx",
+            ),
+        ],
+    ),
+    # Needs pg_trgm (created by migration hs.0003). Django compiles
+    # description__icontains to UPPER(description::text) LIKE UPPER(%s), so
+    # index that expression.
+    "itc_hs_master_description_trgm": (
+        "itc_hs_master",
+        [
+            (
+                """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS itc_hs_master_description_trgm_idx
+                    ON itc_hs_master USING GIN (UPPER(description) gin_trgm_ops)
+                """,
+                "DROP INDEX CONCURRENTLY IF EXISTS itc_hs_master_description_trgm_idx",
+            ),
+        ],
+    ),
+}
+
+
+def table_exists(connection, table):
+    with connection.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", [table])
+        return cur.fetchone()[0] is not None
+
+
+def apply(connection, name, reverse=False):
+    """
+    Run the forward (or reverse) statements of SEARCH_INDEXES[name].
+    Returns False, doing nothing, off Postgres or when the table does not
+    exist.
+    """
+    table, statements = SEARCH_INDEXES[name]
+    if connection.vendor != "postgresql" or not table_exists(connection, table):
+        return False
+
+    sqls = [r for _, r in reversed(statements)] if reverse else [f for f, _ in statements]
+
+    with connection.cursor() as cur:
+        for sql in sqls:
+            cur.execute(sql)
+    return True
+
+
+def migration_operation(name):
+    """RunPython for SEARCH_INDEXES[name]; the migration must set atomic = False."""
+    def forwards(apps, schema_editor):
+        apply(schema_editor.connection, name)
+
+    def backwards(apps, schema_editor):
+        apply(schema_editor.connection, name, reverse=True)
+
+    return migrations.RunPython(forwards, backwards)
@@ -3,6 +3,7 @@ from rest_framework import serializers
 class AskRequestSerializer(serializers.Serializer):
     query = serializers.CharField()
     top_k = serializers.IntegerField(default=5)
+    stream = serializers.BooleanField(default=False)
 
 
 class SourceSerializer(serializers.Serializer):
@@ -0,0 +1,172 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from api.services.metrics import timed
+
+
+class AnswerCache:
+    """
+    Process-wide cache of generated RAG answers.
+
+    Entries are keyed by scope (which pipeline produced them), normalized
+    query, top_k, schedule_type and the knowledge-base version, so an ingest
+    that changes the version makes old answers unreachable. Lookups try an
+    exact match first and then fall back to the closest cached query
+    embedding within ANSWER_CACHE_SEMANTIC_DISTANCE (cosine distance).
+    Semantic matches also require the same numbers in both queries, since
+    "policy for 0101" and "policy for 0102" embed almost identically.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: int, ttl: float, semantic_distance: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_distance = semantic_distance
+
+        self._entries = OrderedDict()
+        self._scope_versions = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                        ttl=settings.ANSWER_CACHE_TTL,
+                        semantic_distance=settings.ANSWER_CACHE_SEMANTIC_DISTANCE,
+                    )
+        return cls._instance
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        query = re.sub(r"\s+", " ", query.lower()).strip()
+        return query.strip("?.!, ")
+
+    def _namespace(self, scope, top_k, schedule_type, version):
+        return (scope, top_k, schedule_type, version)
+
+    @staticmethod
+    def _numbers(normalized_query):
+        return tuple(sorted(re.findall(r"\d+", normalized_query)))
+
+    def _invalidate_stale(self, scope, version):
+        # Drop every entry of a scope as soon as a newer data version is seen.
+        if self._scope_versions.get(scope) == version:
+            return
+        self._scope_versions[scope] = version
+        stale = [k for k in self._entries if k[0][0] == scope and k[0][3] != version]
+        for k in stale:
+            del self._entries[k]
+
+    @timed("answer_cache")
+    def lookup(self, scope, query, *, top_k=None, schedule_type=None, version="", embed=None):
+        """
+        Return (value, embedding). embed is only called when the exact lookup
+        misses; the embedding is handed back so callers can reuse it for
+        retrieval instead of encoding the query twice.
+        """
+
+        namespace = self._namespace(scope, top_k, schedule_type, version)
+        normalized = self.normalize(query)
+        key = (namespace, normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            self._invalidate_stale(scope, version)
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["value"], None
+            if entry:
+                del self._entries[key]
+
+        if embed is None or self.semantic_distance <= 0:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        embedding = embed(query)
+        vector = self._unit(embedding)
+        numbers = self._numbers(normalized)
+
+        with self._lock:
+            candidates = [
+                (k, e)
+                for k, e in self._entries.items()
+                if k[0] == namespace
+                and e["vector"] is not None
+                and e["numbers"] == numbers
+                and e["expires_at"] > now
+            ]
+
+            if candidates:
+                matrix = np.stack([e["vector"] for _, e in candidates])
+                distances = 1.0 - matrix @ vector
+                best = int(np.argmin(distances))
+
+                if distances[best] <= self.semantic_distance:
+                    best_key, best_entry = candidates[best]
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return best_entry["value"], embedding
+
+            self.misses += 1
+
+        return None, embedding
+
+    def store(self, scope, query, value, *, top_k=None, schedule_type=None, version="", embedding=None):
+        namespace = self._namespace(scope, top_k, schedule_type, version)
+        normalized = self.normalize(query)
+        key = (namespace, normalized)
+
+        with self._lock:
+            self._invalidate_stale(scope, version)
+            self._entries[key] = {
+                "value": value,
+                "vector": self._unit(embedding) if embedding is not None else None,
+                "numbers": self._numbers(normalized),
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scope_versions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,165 @@
+import logging
+import math
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from api.services.metrics import record_context
+
+logger = logging.getLogger(__name__)
+
+WORD_REGEX = re.compile(r"\w+")
+SHINGLE_SIZE = 5
+
+
+class PackedContext:
+    """Result of a packing run: the prompt context plus what was left out."""
+
+    def __init__(self):
+        self.parts = []
+        self.kept = {}
+        self.tokens = 0
+        self.dropped_tokens = 0
+        self.dropped_chunks = 0
+        self.duplicates = 0
+        self.truncated = 0
+
+    @property
+    def text(self):
+        return "\n\n".join(self.parts)
+
+    def kept_indices(self, section):
+        """Positions (in the input order) of the chunks of a section that made it in."""
+        return self.kept.get(section, [])
+
+
+class ContextPacker:
+    """
+    Builds LLM context from retrieved chunks under a token budget.
+
+    Sections are filled in the order given, and chunks within a section in
+    relevance order (the order retrieval returned them). A document chunk
+    whose word 5-grams are already mostly covered by packed chunks is
+    dropped as a duplicate, which removes the overlap between neighbouring
+    document chunks. Structured records (sections named in `records`) are
+    only dropped when repeated exactly: two tariff lines with the same
+    description and policy differ only in their code and are both needed.
+    The first chunk that does not fit is
+    truncated when enough budget is left for it to be useful; everything
+    after it is dropped and counted in dropped_tokens.
+
+    Token counts are estimated from characters (CONTEXT_CHARS_PER_TOKEN),
+    which is close enough for budgeting without a tokenizer for the gateway
+    model. With CONTEXT_PACKING_ENABLED=False chunks are joined unchanged.
+    """
+
+    def __init__(self, budget: int = None):
+        self.enabled = settings.CONTEXT_PACKING_ENABLED
+        self.budget = budget if budget is not None else settings.CONTEXT_TOKEN_BUDGET
+        self.chars_per_token = settings.CONTEXT_CHARS_PER_TOKEN
+        self.min_chunk_tokens = settings.CONTEXT_MIN_CHUNK_TOKENS
+        self.dedup_threshold = settings.CONTEXT_DEDUP_THRESHOLD
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    @staticmethod
+    def shingles(text: str) -> set:
+        words = WORD_REGEX.findall(text.lower())
+        if len(words) <= SHINGLE_SIZE:
+            return {tuple(words)} if words else set()
+        return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    def truncate(self, text: str, tokens: int) -> str:
+        # Leave room for the " ..." marker.
+        cut = text[: (tokens - 1) * self.chars_per_token]
+        # Prefer ending on a sentence, then on a word.
+        sentence_end = cut.rfind(". ")
+        if sentence_end > len(cut) // 2:
+            return cut[: sentence_end + 1]
+        space = cut.rfind(" ")
+        return (cut[:space] if space > 0 else cut) + " ..."
+
+    def pack_sections(
+        self,
+        sections: Sequence[Tuple[Optional[str], List[str]]],
+        records: Sequence[Optional[str]] = (),
+    ) -> PackedContext:
+        """
+        Pack (title, chunks) sections. Titles are emitted as "TITLE:" headers
+        and count against the budget; empty sections keep their header so the
+        prompt layout stays the same. A None title packs chunks without one.
+        Sections whose title is in `records` get exact dedup only.
+        """
+        packed = PackedContext()
+        seen = set()
+        seen_records = set()
+        remaining = self.budget if self.enabled else math.inf
+        full = False
+
+        for title, chunks in sections:
+            body = []
+            kept = packed.kept.setdefault(title, [])
+            header = f"{title}:\n" if title is not None else ""
+            remaining -= self.estimate_tokens(header)
+            packed.tokens += self.estimate_tokens(header)
+
+            exact = title in records
+
+            for i, chunk in enumerate(chunks):
+                chunk = (chunk or "").strip()
+                if not chunk:
+                    continue
+                tokens = self.estimate_tokens(chunk)
+
+                chunk_shingles = set()
+                if self.enabled and exact:
+                    if chunk in seen_records:
+                        packed.duplicates += 1
+                        continue
+                elif self.enabled:
+                    chunk_shingles = self.shingles(chunk)
+                    if chunk_shingles and (
+                        len(chunk_shingles & seen) / len(chunk_shingles) >= self.dedup_threshold
+                    ):
+                        packed.duplicates += 1
+                        continue
+
+                if full:
+                    packed.dropped_tokens += tokens
+                    packed.dropped_chunks += 1
+                    continue
+
+                if tokens > remaining:
+                    full = True
+                    if remaining < self.min_chunk_tokens:
+                        packed.dropped_tokens += tokens
+                        packed.dropped_chunks += 1
+                        continue
+                    chunk = self.truncate(chunk, int(remaining))
+                    packed.truncated += 1
+                    packed.dropped_tokens += tokens - self.estimate_tokens(chunk)
+                    tokens = self.estimate_tokens(chunk)
+
+                if exact:
+                    seen_records.add(chunk)
+                seen |= chunk_shingles
+                body.append(chunk)
+                kept.append(i)
+                remaining -= tokens
+                packed.tokens += tokens
+
+            packed.parts.append(header + "\n\n".join(body))
+
+        if packed.dropped_tokens or packed.duplicates:
+            logger.debug(
+                "Context packed to %s tokens: dropped %s tokens (%s chunks), %s duplicates",
+                packed.tokens, packed.dropped_tokens, packed.dropped_chunks, packed.duplicates,
+            )
+        record_context(packed.tokens, packed.dropped_tokens)
+        return packed
+
+    def pack(self, chunks: List[str]) -> PackedContext:
+        """Pack a single list of chunks without a section header."""
+        return self.pack_sections([(None, chunks)])
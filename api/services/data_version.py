@@ -0,0 +1,113 @@
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from api.db_routing import reads_at_least
+
+
+class DataVersionService:
+    """
+    Cheap change detector for the externally ingested tables
+    (knowledge_base, itc_hs_master).
+
+    Postgres bumps the pg_stat_user_tables write counters on every insert,
+    update and delete, so together they act as a table version without
+    scanning any rows. Versions are memoized for DATA_VERSION_TTL seconds.
+    Other databases fall back to the row count.
+
+    Versions are read on the primary. Anything cached under a version must
+    be built inside consistent_reads(), so a lagging replica cannot fill it
+    with older rows.
+    """
+
+    _cache = {}
+    _bumps = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_version(cls, table: str) -> str:
+        return cls._get(table)[0]
+
+    @classmethod
+    def _get(cls, table: str):
+        """(version, primary WAL position the version was read at, or None)."""
+        now = time.monotonic()
+        cached = cls._cache.get(table)
+        if cached and cached[0] > now:
+            return cached[1:]
+
+        counters, position = cls._read_counters(table)
+        version = f"{counters}.{cls._bumps.get(table, 0)}"
+
+        with cls._lock:
+            cls._cache[table] = (now + settings.DATA_VERSION_TTL, version, position)
+
+        return version, position
+
+    @classmethod
+    def get_combined_version(cls, *tables: str) -> str:
+        return ":".join(cls.get_version(t) for t in tables)
+
+    @classmethod
+    def consistent_reads(cls, *tables: str):
+        """
+        Scope whose replica reads are at least as new as the current versions
+        of tables (off Postgres, no constraint).
+        """
+        positions = [cls._get(t)[1] for t in tables]
+        if None in positions:
+            return reads_at_least(None)
+        return reads_at_least(max(positions))
+
+    @classmethod
+    def bump(cls, table: str):
+        """Force a new version in this process, e.g. after a local ingest."""
+        with cls._lock:
+            cls._bumps[table] = cls._bumps.get(table, 0) + 1
+            cls._cache.pop(table, None)
+
+    @staticmethod
+    def _read_counters(table: str):
+        """(counters, WAL position)."""
+        if connection.vendor != "postgresql":
+            return DataVersionService._read_row_count(table), None
+
+        # The counters start again from zero after pg_stat_reset() or crash
+        # recovery, so the stats-reset time and server start are part of the
+        # version; otherwise a later version could repeat an earlier one.
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                SELECT t.n_tup_ins, t.n_tup_upd, t.n_tup_del,
+                       COALESCE(EXTRACT(EPOCH FROM d.stats_reset)::bigint, 0),
+                       EXTRACT(EPOCH FROM pg_postmaster_start_time())::bigint,
+                       pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')
+                FROM pg_stat_database d
+                LEFT JOIN pg_stat_user_tables t ON t.relname = %s
+                WHERE d.datname = current_database()
+                """,
+                [table],
+            )
+            row = cur.fetchone()
+
+        if not row:
+            return "0", None
+        position = int(row[5])
+        if row[0] is None:
+            return "0", position
+
+        return "-".join(str(v) for v in row[:3]) + f"@{row[3]}.{row[4]}", position
+
+    @staticmethod
+    def _read_row_count(table: str) -> str:
+        """
+        Fallback for databases without write counters (e.g. SQLite in
+        development): catches inserts and deletes, not in-place updates.
+        """
+        try:
+            with connection.cursor() as cur:
+                cur.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+                return f"n{cur.fetchone()[0]}"
+        except DatabaseError:
+            return "0"
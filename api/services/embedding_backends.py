@@ -0,0 +1,125 @@
+import threading
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class SentenceTransformerBackend:
+    """Full-precision model through sentence-transformers / torch."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=len(texts))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class OnnxInt8Backend:
+    """
+    int8 dynamically-quantized export of the same model on ONNX Runtime.
+
+    Reproduces the sentence-transformers pipeline of all-MiniLM-L6-v2
+    (truncate to 256 tokens, mean pooling over the attention mask, L2
+    normalization), so vectors stay compatible with the stored pgvector
+    columns. Build the model directory with
+    `python manage.py export_onnx_embedding`.
+    """
+
+    name = "onnx-int8"
+    MODEL_FILE = "model_int8.onnx"
+    TOKENIZER_FILE = "tokenizer.json"
+    MAX_SEQ_LENGTH = 256
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImproperlyConfigured(
+                "EMBEDDING_BACKEND='onnx-int8' requires onnxruntime and tokenizers"
+            ) from e
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / self.MODEL_FILE
+        tokenizer_path = model_dir / self.TOKENIZER_FILE
+
+        if not model_path.exists() or not tokenizer_path.exists():
+            raise ImproperlyConfigured(
+                f"ONNX embedding model not found in {model_dir}; "
+                "run `python manage.py export_onnx_embedding` first"
+            )
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length=self.MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+
+        token_embeddings = self.session.run(None, feed)[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled = summed / counts
+
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return (pooled / norms).astype(np.float32)
+
+
+BACKENDS = {
+    SentenceTransformerBackend.name: lambda: SentenceTransformerBackend(
+        settings.EMBEDDING_MODEL_NAME
+    ),
+    OnnxInt8Backend.name: lambda: OnnxInt8Backend(
+        settings.EMBEDDING_ONNX_DIR, threads=settings.EMBEDDING_ONNX_THREADS
+    ),
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_embedding_backend(name: str = None):
+    """Return the process-wide backend selected by EMBEDDING_BACKEND."""
+    name = name or settings.EMBEDDING_BACKEND
+
+    if name not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown EMBEDDING_BACKEND '{name}', expected one of {sorted(BACKENDS)}"
+        )
+
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = BACKENDS[name]()
+                _backends[name] = backend
+    return backend
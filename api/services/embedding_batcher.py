@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embed requests into batched encode() calls.
+
+    Callers enqueue a text and block on a Future. A single worker thread
+    takes the first waiting request, keeps collecting for up to
+    EMBEDDING_BATCH_MAX_WAIT_MS or EMBEDDING_BATCH_MAX_SIZE items, runs one
+    batched encode and resolves every caller with its own vector.
+    """
+
+    HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, float("inf"))
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, encode, max_batch_size: int, max_wait_ms: float):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.histogram = {b: 0 for b in self.HISTOGRAM_BUCKETS}
+
+    @classmethod
+    def get_instance(cls, encode):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        encode=encode,
+                        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+                    )
+        return cls._instance
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own.
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or self._pid != pid or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = pid
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str):
+        return self.submit(text).result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Identical texts in one batch are encoded once.
+            texts = list(dict.fromkeys(text for text, _ in batch))
+
+            try:
+                vectors = self.encode(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                future.set_result(by_text[text])
+
+            self._record(len(batch))
+
+    def _record(self, size):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            for bucket in self.HISTOGRAM_BUCKETS:
+                if size <= bucket:
+                    self.histogram[bucket] += 1
+                    break
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "queue_depth": self._queue.qsize(),
+                "batch_size_histogram": dict(self.histogram),
+            }
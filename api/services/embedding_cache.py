@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Bounded in-process LRU of text hash -> float32 embedding.
+
+    Keys include the model and backend name so switching either never
+    serves stale vectors. When EMBEDDING_CACHE_PATH is set, entries are also
+    written to a SQLite file so warm embeddings survive worker restarts;
+    memory misses are looked up there and promoted back into the LRU.
+
+    Disk reads and writes run outside the LRU lock on a per-thread
+    connection. A failing store (locked, full, unreadable) is logged and
+    costs a cache miss; it never fails the embedding call.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_bytes: int, model_name: str, path: str = None):
+        self.max_bytes = max_bytes
+        self.model_name = model_name
+        self.path = path
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_bytes=int(settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+                        model_name=f"{settings.EMBEDDING_MODEL_NAME}:{settings.EMBEDDING_BACKEND}",
+                        path=settings.EMBEDDING_CACHE_PATH or None,
+                    )
+        return cls._instance
+
+    def _store(self):
+        """This thread's connection to the disk store, or None without one."""
+        if not self.path:
+            return None
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._local.db = db
+        return db
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode()).hexdigest()
+
+    def get(self, text: str):
+        key = self.key(text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        row = None
+        try:
+            db = self._store()
+            if db is not None:
+                row = db.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            logger.warning("Embedding cache read failed", exc_info=True)
+
+        with self._lock:
+            if row:
+                vector = np.frombuffer(row[0], dtype=np.float32)
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector):
+        key = self.key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            self._remember(key, vector)
+
+        try:
+            db = self._store()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, vector.tobytes()),
+                )
+        except sqlite3.Error:
+            logger.warning("Embedding cache write failed", exc_info=True)
+
+    def _remember(self, key, vector):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from api.services.data_version import DataVersionService
+
+
+class ResponseCache:
+    """
+    Process-wide LRU of full response bodies, keyed by the same validator as
+    the ETag (scope, data version, request params). A new ingest changes the
+    data version and with it every key, so entries never need invalidating;
+    RESPONSE_CACHE_TTL only bounds how long unused ones stay.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                        ttl=settings.RESPONSE_CACHE_TTL,
+                    )
+        return cls._instance
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def make_etag(scope, version, params):
+    """Weak ETag: the body may differ (LLM text) but is equivalent for the same inputs."""
+    raw = json.dumps(
+        [settings.HTTP_CACHE_VERSION, scope, version, params], sort_keys=True, cls=DjangoJSONEncoder
+    )
+    return f'W/"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request, etag):
+    """Weak comparison of If-None-Match against etag."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+
+    tags = parse_etags(header)
+    if "*" in tags:
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in tags)
+
+
+def cacheable(data):
+    # Degraded (retrieval-only) answers must not outlive the outage.
+    return not (isinstance(data, dict) and data.get("degraded"))
+
+
+class CachedResponder:
+    """
+    Conditional responses for read-only HS endpoints.
+
+    The validator is computed from the data version of the tables a response
+    is built from plus the request params, before any DB or LLM work, so a
+    matching If-None-Match is answered with 304 and a RESPONSE_CACHE hit
+    with the stored body. Successful, non-degraded responses carry the ETag
+    and HTTP_CACHE_CONTROL; everything else is sent with no-store. A miss is
+    built from replicas no older than that data version.
+    """
+
+    def __init__(self, scope, tables):
+        self.scope = scope
+        self.tables = tables
+        self.enabled = settings.HTTP_CACHE_ENABLED
+        self.cache = ResponseCache.get_instance() if settings.RESPONSE_CACHE_ENABLED else None
+
+    def etag(self, params):
+        return make_etag(self.scope, DataVersionService.get_combined_version(*self.tables), params)
+
+    def lookup(self, request, etag, conditional):
+        if conditional and etag_matches(request, etag):
+            return self.finish(Response(status=304), etag)
+
+        if self.cache is not None:
+            data = self.cache.get(etag)
+            if data is not None:
+                return self.finish(Response(data), etag)
+
+        return None
+
+    def store(self, response, etag):
+        if response.status_code != 200 or not cacheable(response.data):
+            response["Cache-Control"] = "no-store"
+            return response
+
+        if self.cache is not None:
+            self.cache.set(etag, response.data)
+
+        return self.finish(response, etag)
+
+    @staticmethod
+    def finish(response, etag):
+        response["ETag"] = etag
+        response["Cache-Control"] = settings.HTTP_CACHE_CONTROL
+        return response
+
+    def respond(self, request, params, build):
+        """
+        build() returns the Response to send on a miss. conditional GETs are
+        answered with 304; POSTs only use the server-side cache.
+        """
+        if not self.enabled:
+            return build()
+
+        etag = self.etag(params)
+        cached = self.lookup(request, etag, conditional=request.method in ("GET", "HEAD"))
+        if cached is not None:
+            return cached
+
+        with DataVersionService.consistent_reads(*self.tables):
+            response = build()
+        return self.store(response, etag)
+
+    async def arespond(self, request, params, build):
+        """Async form of respond(); build() is a coroutine function."""
+        if not self.enabled:
+            return await build()
+
+        etag = await sync_to_async(self.etag)(params)
+        cached = self.lookup(request, etag, conditional=request.method in ("GET", "HEAD"))
+        if cached is not None:
+            return cached
+
+        with await sync_to_async(DataVersionService.consistent_reads)(*self.tables):
+            response = await build()
+        return self.store(response, etag)
@@ -0,0 +1,88 @@
+import os
+import threading
+import weakref
+import asyncio
+
+import httpx
+from django.conf import settings
+
+
+class HTTPClientPool:
+    """
+    Process-wide pooled httpx clients for outbound calls (LLM gateway, JWKS).
+
+    Connections are kept alive between requests so only the first call per
+    worker pays for the TCP + TLS handshake. Clients are recreated after a
+    fork so gunicorn workers never share sockets with the master process.
+    """
+
+    _client = None
+    _async_clients = weakref.WeakKeyDictionary()
+    _pid = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _http2_enabled() -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def _limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+        )
+
+    @staticmethod
+    def timeout(seconds: float) -> httpx.Timeout:
+        return httpx.Timeout(seconds, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+    @classmethod
+    def _reset_after_fork(cls):
+        pid = os.getpid()
+        if cls._pid != pid:
+            cls._client = None
+            cls._async_clients = weakref.WeakKeyDictionary()
+            cls._pid = pid
+
+    @classmethod
+    def get_client(cls) -> httpx.Client:
+        with cls._lock:
+            cls._reset_after_fork()
+            if cls._client is None:
+                cls._client = httpx.Client(
+                    http2=cls._http2_enabled(),
+                    limits=cls._limits(),
+                    timeout=cls.timeout(settings.LLM_TIMEOUT),
+                )
+            return cls._client
+
+    @classmethod
+    def get_async_client(cls) -> httpx.AsyncClient:
+        # An AsyncClient is bound to the event loop it first runs on, so keep
+        # one per loop.
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            cls._reset_after_fork()
+            client = cls._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    http2=cls._http2_enabled(),
+                    limits=cls._limits(),
+                    timeout=cls.timeout(settings.LLM_TIMEOUT),
+                )
+                cls._async_clients[loop] = client
+            return client
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            if cls._client is not None:
+                cls._client.close()
+                cls._client = None
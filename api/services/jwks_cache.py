@@ -0,0 +1,172 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from api.services.http_client import HTTPClientPool
+
+
+class JWKSCache:
+    """
+    Process-wide cache of the Clerk JWKS, indexed by key ID.
+
+    The key set is fetched once and served from memory. After JWKS_CACHE_TTL
+    seconds a refresh runs on a background thread while the current keys
+    keep serving; an unknown kid (key rotation) triggers a synchronous
+    refetch, rate limited to one every JWKS_MIN_REFETCH_INTERVAL seconds.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, url: str, ttl: float, min_refetch_interval: float):
+        self.url = url
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+
+        self._keys = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, url: str = None):
+        url = url or settings.JWKS_URL or f"{settings.CLERK_ISSUER}/.well-known/jwks.json"
+        instance = cls._instances.get(url)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.get(url)
+                if instance is None:
+                    instance = cls(
+                        url,
+                        ttl=settings.JWKS_CACHE_TTL,
+                        min_refetch_interval=settings.JWKS_MIN_REFETCH_INTERVAL,
+                    )
+                    cls._instances[url] = instance
+        return instance
+
+    def _fetch(self):
+        self._last_attempt = time.monotonic()
+
+        response = HTTPClientPool.get_client().get(
+            self.url, timeout=HTTPClientPool.timeout(settings.JWKS_FETCH_TIMEOUT)
+        )
+        response.raise_for_status()
+
+        jwk_set = jwt.PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in jwk_set.keys}
+        self._fetched_at = time.monotonic()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._fetch()
+        except Exception:
+            # Keep serving the keys we have; the next stale read retries.
+            pass
+        finally:
+            self._refreshing = False
+
+    def get_signing_key(self, kid: str):
+        if not self._keys:
+            with self._lock:
+                if not self._keys:
+                    self._fetch()
+
+        elif self._should_refresh():
+            self._refreshing = True
+            threading.Thread(
+                target=self._background_refresh, name="jwks-refresh", daemon=True
+            ).start()
+
+        key = self._lookup(kid)
+        if key is None:
+            with self._lock:
+                key = self._lookup(kid)
+                if key is None and time.monotonic() - self._last_attempt >= self.min_refetch_interval:
+                    self._fetch()
+                    key = self._lookup(kid)
+
+        if key is None:
+            raise jwt.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+
+        return key
+
+    def _should_refresh(self):
+        now = time.monotonic()
+        return (
+            not self._refreshing
+            and now - self._fetched_at > self.ttl
+            and now - self._last_attempt >= self.min_refetch_interval
+        )
+
+    def _lookup(self, kid):
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        return self._keys.get(kid)
+
+    def get_signing_key_from_jwt(self, token: str):
+        header = jwt.get_unverified_header(token)
+        return self.get_signing_key(header.get("kid"))
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified token payloads keyed by token hash.
+
+    Entries expire at the token's own exp claim, so a cached token is never
+    accepted for longer than jwt.decode would have accepted it.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(settings.VERIFIED_TOKEN_CACHE_SIZE)
+        return cls._instance
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            payload, exp = entry
+            if exp <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if not exp or self.max_entries <= 0:
+            return
+
+        key = self._key(token)
+
+        with self._lock:
+            self._entries[key] = (payload, exp)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
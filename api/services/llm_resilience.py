@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """
+    The gateway could not produce an answer in time: the breaker is open,
+    the request deadline ran out, or the call timed out / failed upstream.
+    Services catch this to return retrieval-only (degraded) responses.
+    """
+
+
+
+class LLMDeadlineExceeded(LLMUnavailable):
+    """
+    The call was cut short by the caller's request deadline rather than
+    refused by the gateway, so a caller with more time left may retry it.
+    """
+
+
+def is_gateway_failure(exc):
+    """Errors that say the gateway is unhealthy, as opposed to a bad request."""
+    if isinstance(exc, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream.
+
+    Closed: calls go through; LLM_BREAKER_FAILURE_THRESHOLD failures in a
+    row open it. Open: calls fail immediately with LLMUnavailable for
+    LLM_BREAKER_RESET_SECONDS. Half-open: one trial call is let through;
+    success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+        self.rejected = 0
+        self.opened = 0
+
+    @classmethod
+    def get_instance(cls, name: str):
+        instance = cls._instances.get(name)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.get(name)
+                if instance is None:
+                    instance = cls._instances[name] = cls(
+                        name,
+                        failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                        reset_seconds=settings.LLM_BREAKER_RESET_SECONDS,
+                    )
+        return instance
+
+    def before_call(self):
+        """Raise LLMUnavailable when the call must not be attempted."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    self.rejected += 1
+                    raise LLMUnavailable(f"circuit {self.name} is open")
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self.trial_in_flight:
+                    self.rejected += 1
+                    raise LLMUnavailable(f"circuit {self.name} is half-open")
+                self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit %s opened after %s failures", self.name, self.failures)
+                    self.opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """A call ended without a verdict (e.g. cancelled); free the half-open slot."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open": int(self.state == self.OPEN),
+                "half_open": int(self.state == self.HALF_OPEN),
+                "consecutive_failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, used for the hedge delay."""
+
+    WINDOW = 200
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self):
+        self._samples = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def get_instance(cls, name: str):
+        instance = cls._instances.get(name)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.setdefault(name, cls())
+        return instance
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self):
+        """p95 of recent calls (at least LLM_HEDGE_MIN_DELAY), or None until warmed up."""
+        with self._lock:
+            if len(self._samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+                return None
+        return max(self.percentile(0.95), settings.LLM_HEDGE_MIN_DELAY)
+
+    def stats(self):
+        p95 = self.percentile(0.95)
+        return {
+            "p95_seconds": p95 if p95 is not None else 0,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
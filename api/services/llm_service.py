@@ -1,14 +1,65 @@
 import os
-import requests
+import json
+import asyncio
+import logging
+import threading
+import time
+import httpx
+from django.conf import settings
 from .prompt_service import system_prompt
+from .http_client import HTTPClientPool
+from .metrics import record_llm, timed
+from .singleflight import SingleFlight, WaitTimeout
+from . import deadline
+from .deadline import DeadlineExceeded
+from .llm_resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    LLMDeadlineExceeded,
+    LLMUnavailable,
+    is_gateway_failure,
+)
+
+logger = logging.getLogger(__name__)
+
 
 class LLMService:
+    """
+    Client for the LLM gateway.
+
+    Every call is bounded by the request deadline (see api.services.deadline)
+    and goes through a per-endpoint circuit breaker, so a cold or degraded
+    gateway makes calls fail fast with LLMUnavailable instead of holding
+    worker threads for LLM_TIMEOUT. With LLM_HEDGING_ENABLED a non-streaming
+    call that has not answered after the recent p95 latency is raced by a
+    second identical request; the first answer wins. Callers sharing a
+    coalesced call stop waiting at their own deadline, and retry when the
+    shared call failed only because the leader's deadline was shorter.
+
+    Callers that can answer without AI text use try_reasoning /
+    atry_reasoning (or degrade() around a stream), which turn LLMUnavailable
+    into None when LLM_DEGRADED_RESPONSES is on.
+    """
+
+    _loops = threading.local()
+
     def __init__(self):
         self.endpoint = os.getenv("MODAL_LLM_URL")
         self.api_key = os.getenv("API_KEY")
+        self.stream_endpoint = os.getenv("MODAL_LLM_STREAM_URL") or self.endpoint
+        self.singleflight = (
+            SingleFlight.get_instance() if settings.LLM_SINGLEFLIGHT_ENABLED else None
+        )
+        self.breaker = (
+            CircuitBreaker.get_instance(f"llm:{self.endpoint}")
+            if settings.LLM_BREAKER_ENABLED else None
+        )
+        self.latency = LatencyTracker.get_instance(f"llm:{self.endpoint}")
+        self.hedging = settings.LLM_HEDGING_ENABLED
+        self.degraded = settings.LLM_DEGRADED_RESPONSES
 
-    def get_reasoning(self, query: str, context: str):
-        payload = {
+    def build_payload(self, query: str, context: str):
+        return {
             "prompt": system_prompt + "\n\nQuestion:\n" + query,
             "context": context,
             "temperature": 0.1,
@@ -16,17 +67,392 @@ class LLMService:
             "max_tokens": 1024,
         }
 
-        headers = {
-            "X-API-Key": self.api_key,
-            "Content-Type": "application/json",
-        }
+    @staticmethod
+    def record(payload, response_chars):
+        record_llm(len(payload["prompt"]) + len(payload["context"]), response_chars)
+
+    def build_headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["X-API-Key"] = self.api_key
+        return headers
+
+    def flight_key(self, payload):
+        """Identical endpoint + prompt + context + sampling params share one call."""
+        return SingleFlight.key(self.endpoint, payload)
+
+    @classmethod
+    def thread_loop(cls):
+        """Event loop private to the calling thread, for hedged sync calls."""
+        loop = getattr(cls._loops, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = cls._loops.loop = asyncio.new_event_loop()
+        return loop
+
+    # -- resilience -------------------------------------------------------
+
+    def begin(self, timeout: float = None):
+        """
+        Admit a call: check the breaker and clamp the timeout to the request
+        deadline. Returns (timeout, clamped).
+        """
+        if self.breaker is not None:
+            self.breaker.before_call()
+
+        requested = timeout or settings.LLM_TIMEOUT
+        try:
+            bounded = deadline.bound(requested)
+        except DeadlineExceeded as e:
+            self.release()
+            raise LLMDeadlineExceeded(str(e)) from e
+
+        return bounded, bounded < requested
+
+    def release(self):
+        if self.breaker is not None:
+            self.breaker.release()
+
+    def succeeded(self, started=None):
+        if self.breaker is not None:
+            self.breaker.record_success()
+        if started is not None:
+            self.latency.observe(time.monotonic() - started)
+
+    def failed(self, exc, timeout, clamped):
+        """Return the LLMUnavailable to raise for exc, or None to re-raise exc."""
+        if not is_gateway_failure(exc):
+            self.release()
+            return None
+
+        if clamped and isinstance(exc, httpx.TimeoutException):
+            # A deadline shorter than the gateway's usual latency says nothing
+            # about its health; one a healthy gateway would have met does.
+            p95 = self.latency.percentile(0.95)
+            if p95 is not None and timeout < p95:
+                self.release()
+                return LLMDeadlineExceeded("request deadline too short for the LLM gateway")
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            return LLMDeadlineExceeded("request deadline exceeded waiting for the LLM gateway")
+
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        return LLMUnavailable(f"LLM gateway unavailable: {exc!r}")
+
+    def degrade(self, exc):
+        """True when the caller should answer without AI text instead of failing."""
+        if not self.degraded:
+            return False
+        logger.warning("LLM unavailable, returning a degraded response: %s", exc)
+        return True
+
+    # -- non-streaming ----------------------------------------------------
+
+    def try_reasoning(self, query: str, context: str, timeout: float = None):
+        """get_reasoning, or None when the gateway is unavailable (see degrade)."""
+        try:
+            return self.get_reasoning(query, context, timeout)
+        except LLMUnavailable as e:
+            if not self.degrade(e):
+                raise
+            return None
+
+    async def atry_reasoning(self, query: str, context: str, timeout: float = None):
+        try:
+            return await self.aget_reasoning(query, context, timeout)
+        except LLMUnavailable as e:
+            if not self.degrade(e):
+                raise
+            return None
+
+    @staticmethod
+    def leader_deadline(exc):
+        """Shared failures a waiter with more time left should not inherit."""
+        return isinstance(exc, LLMDeadlineExceeded)
+
+    @timed("llm")
+    def get_reasoning(self, query: str, context: str, timeout: float = None):
+        payload = self.build_payload(query, context)
+        if self.singleflight is None:
+            return self.call(payload, timeout)
+        try:
+            return self.singleflight.do(
+                self.flight_key(payload),
+                lambda: self.call(payload, timeout),
+                timeout=deadline.remaining(),
+                retry=self.leader_deadline,
+            )
+        except WaitTimeout as e:
+            raise LLMDeadlineExceeded("request deadline exceeded waiting for a shared LLM call") from e
+
+    @timed("llm")
+    async def aget_reasoning(self, query: str, context: str, timeout: float = None):
+        payload = self.build_payload(query, context)
+        if self.singleflight is None:
+            return await self.acall(payload, timeout)
+        try:
+            return await self.singleflight.ado(
+                self.flight_key(payload),
+                lambda: self.acall(payload, timeout),
+                timeout=deadline.remaining(),
+                retry=self.leader_deadline,
+            )
+        except WaitTimeout as e:
+            raise LLMDeadlineExceeded("request deadline exceeded waiting for a shared LLM call") from e
+
+    def call(self, payload, timeout: float = None):
+        timeout, clamped = self.begin(timeout)
+        started = time.monotonic()
+        try:
+            if self.hedging:
+                answer = self.hedged_request(payload, timeout)
+            else:
+                answer = self.request(payload, timeout)
+        except Exception as e:
+            error = self.failed(e, timeout, clamped)
+            if error is None:
+                raise
+            raise error from e
+        except BaseException:
+            self.release()
+            raise
+
+        self.succeeded(started)
+        return answer
+
+    async def acall(self, payload, timeout: float = None):
+        timeout, clamped = self.begin(timeout)
+        started = time.monotonic()
+        try:
+            if self.hedging:
+                answer = await self.ahedged_request(payload, timeout)
+            else:
+                answer = await self.arequest(payload, timeout)
+        except Exception as e:
+            error = self.failed(e, timeout, clamped)
+            if error is None:
+                raise
+            raise error from e
+        except BaseException:
+            self.release()
+            raise
+
+        self.succeeded(started)
+        return answer
+
+    def hedged_request(self, payload, timeout: float):
+        """
+        Sync form of ahedged_request(). Both requests run on the caller's
+        thread, on an event loop private to it, so a hedged call never waits
+        for a shared worker pool and the slower request is cancelled.
+        """
+        delay = self.latency.hedge_delay()
+        if delay is None or delay >= timeout:
+            return self.request(payload, timeout)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Called from async code on this thread; its loop must not block.
+            return self.request(payload, timeout)
+
+        return self.thread_loop().run_until_complete(self.ahedged_request(payload, timeout))
 
-        response = requests.post(
+    async def ahedged_request(self, payload, timeout: float):
+        delay = self.latency.hedge_delay()
+        if delay is None or delay >= timeout:
+            return await self.arequest(payload, timeout)
+
+        # httpx timeouts apply per read, so bound the race as a whole.
+        end = time.monotonic() + timeout
+        primary = asyncio.ensure_future(self.arequest(payload, timeout))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.latency.hedges += 1
+            hedge = asyncio.ensure_future(self.arequest(payload, timeout - delay))
+            tasks.add(hedge)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, end - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise httpx.TimeoutException("hedged LLM requests timed out")
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.latency.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let the losers close their connections before returning.
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def request(self, payload, timeout: float = None):
+        response = HTTPClientPool.get_client().post(
             self.endpoint,
             json=payload,
-            headers=headers,
-            timeout=90,
+            headers=self.build_headers(),
+            timeout=HTTPClientPool.timeout(timeout or settings.LLM_TIMEOUT),
         )
 
         response.raise_for_status()
-        return response.json().get("answer")
+        answer = response.json().get("answer")
+        self.record(payload, len(answer or ""))
+        return answer
+
+    async def arequest(self, payload, timeout: float = None):
+        response = await HTTPClientPool.get_async_client().post(
+            self.endpoint,
+            json=payload,
+            headers=self.build_headers(),
+            timeout=HTTPClientPool.timeout(timeout or settings.LLM_TIMEOUT),
+        )
+
+        response.raise_for_status()
+        answer = response.json().get("answer")
+        self.record(payload, len(answer or ""))
+        return answer
+
+    # -- streaming --------------------------------------------------------
+
+    @timed("llm")
+    def stream_reasoning(self, query: str, context: str, timeout: float = None):
+        """Yield answer tokens as the gateway generates them."""
+        payload = self.build_payload(query, context)
+        timeout, clamped = self.begin(timeout)
+        try:
+            yield from self.stream(payload, timeout)
+        except Exception as e:
+            error = self.failed(e, timeout, clamped)
+            if error is None:
+                raise
+            raise error from e
+        except BaseException:
+            # Includes GeneratorExit when the client goes away mid-stream.
+            self.release()
+            raise
+
+        self.succeeded()
+
+    @timed("llm")
+    async def astream_reasoning(self, query: str, context: str, timeout: float = None):
+        """Async form of stream_reasoning on the shared async client."""
+        payload = self.build_payload(query, context)
+        timeout, clamped = self.begin(timeout)
+        try:
+            async for token in self.astream(payload, timeout):
+                yield token
+        except Exception as e:
+            error = self.failed(e, timeout, clamped)
+            if error is None:
+                raise
+            raise error from e
+        except BaseException:
+            self.release()
+            raise
+
+        self.succeeded()
+
+    def stream(self, payload, timeout: float):
+        payload = dict(payload, stream=True)
+
+        headers = self.build_headers()
+        headers["Accept"] = "text/event-stream"
+
+        with HTTPClientPool.get_client().stream(
+            "POST",
+            self.stream_endpoint,
+            json=payload,
+            headers=headers,
+            timeout=HTTPClientPool.timeout(timeout),
+        ) as response:
+            response.raise_for_status()
+
+            # Gateways without streaming support answer with a single JSON body.
+            if response.headers.get("content-type", "").startswith("application/json"):
+                response.read()
+                answer = response.json().get("answer")
+                self.record(payload, len(answer or ""))
+                if answer:
+                    yield answer
+                return
+
+            size = 0
+            try:
+                for line in response.iter_lines():
+                    done, token = self.parse_stream_line(line)
+                    if done:
+                        break
+                    if token:
+                        size += len(token)
+                        yield token
+            finally:
+                self.record(payload, size)
+
+    async def astream(self, payload, timeout: float):
+        payload = dict(payload, stream=True)
+
+        headers = self.build_headers()
+        headers["Accept"] = "text/event-stream"
+
+        async with HTTPClientPool.get_async_client().stream(
+            "POST",
+            self.stream_endpoint,
+            json=payload,
+            headers=headers,
+            timeout=HTTPClientPool.timeout(timeout),
+        ) as response:
+            response.raise_for_status()
+
+            if response.headers.get("content-type", "").startswith("application/json"):
+                await response.aread()
+                answer = response.json().get("answer")
+                self.record(payload, len(answer or ""))
+                if answer:
+                    yield answer
+                return
+
+            size = 0
+            try:
+                async for line in response.aiter_lines():
+                    done, token = self.parse_stream_line(line)
+                    if done:
+                        break
+                    if token:
+                        size += len(token)
+                        yield token
+            finally:
+                self.record(payload, size)
+
+    @staticmethod
+    def parse_stream_line(line: str):
+        """Return (done, token) for one line of the gateway's SSE stream."""
+        if not line.startswith("data:"):
+            return False, None
+
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return True, None
+
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            chunk = data
+
+        if isinstance(chunk, dict):
+            return False, chunk.get("token") or chunk.get("text")
+
+        return False, chunk if isinstance(chunk, str) else None
@@ -0,0 +1,431 @@
+import contextvars
+import functools
+import glob
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500, 1000, 5000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition model."""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        """{labels: [bucket counts, sum, count]}, copied."""
+        with self._lock:
+            return {
+                labels: [list(counts), total, count]
+                for labels, (counts, total, count) in self._series.items()
+            }
+
+    def render(self, series=None):
+        """Exposition lines for this process, or for `series` merged from several."""
+        if series is None:
+            series = self.snapshot()
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(series.items()):
+            base = _labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Service stage latency.", ("stage",))
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Database query latency.", ("alias",))
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Database queries per HTTP request.", ("route",), COUNT_BUCKETS
+)
+DB_ROWS_PER_REQUEST = Histogram(
+    "db_rows_per_request", "Rows returned per HTTP request.", ("route",), COUNT_BUCKETS
+)
+LLM_PROMPT_CHARS = Histogram(
+    "llm_prompt_chars", "LLM prompt + context size in characters.", (), SIZE_BUCKETS
+)
+LLM_RESPONSE_CHARS = Histogram(
+    "llm_response_chars", "LLM response size in characters.", (), SIZE_BUCKETS
+)
+CONTEXT_TOKENS = Histogram(
+    "llm_context_tokens", "Estimated tokens of packed LLM context.", (), SIZE_BUCKETS
+)
+CONTEXT_DROPPED_TOKENS = Histogram(
+    "llm_context_dropped_tokens", "Estimated context tokens dropped by the token budget.", (), COUNT_BUCKETS
+)
+
+HISTOGRAMS = [
+    HTTP_REQUEST_SECONDS,
+    STAGE_SECONDS,
+    DB_QUERY_SECONDS,
+    DB_QUERIES_PER_REQUEST,
+    DB_ROWS_PER_REQUEST,
+    LLM_PROMPT_CHARS,
+    LLM_RESPONSE_CHARS,
+    CONTEXT_TOKENS,
+    CONTEXT_DROPPED_TOKENS,
+]
+
+
+class RequestMetrics:
+    """Per-request span totals and DB/LLM counters, shared with worker threads."""
+
+    def __init__(self):
+        self.spans = {}
+        self.db_queries = 0
+        self.db_rows = 0
+        self.db_seconds = 0.0
+        self.llm_prompt_chars = 0
+        self.llm_response_chars = 0
+        self.context_tokens = 0
+        self.context_dropped_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            total, count = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, count + 1)
+
+    def add_query(self, seconds, rows):
+        with self._lock:
+            self.db_queries += 1
+            self.db_rows += max(rows, 0)
+            self.db_seconds += seconds
+
+    def add_llm(self, prompt_chars, response_chars):
+        with self._lock:
+            self.llm_prompt_chars += prompt_chars
+            self.llm_response_chars += response_chars
+
+    def add_context(self, tokens, dropped_tokens):
+        with self._lock:
+            self.context_tokens += tokens
+            self.context_dropped_tokens += dropped_tokens
+
+    def server_timing(self, total_seconds):
+        entries = [f"total;dur={total_seconds * 1000:.1f}"]
+        for name, (seconds, count) in self.spans.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="x{count}"'
+            entries.append(entry)
+        if self.db_queries:
+            entries.append(
+                f'db;dur={self.db_seconds * 1000:.1f};desc="queries={self.db_queries} rows={self.db_rows}"'
+            )
+        if self.llm_prompt_chars or self.llm_response_chars:
+            entries.append(
+                f'llm_chars;desc="prompt={self.llm_prompt_chars} response={self.llm_response_chars}"'
+            )
+        if self.context_tokens:
+            entries.append(
+                f'context;desc="tokens={self.context_tokens} dropped={self.context_dropped_tokens}"'
+            )
+        return ", ".join(entries)
+
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+def start_request():
+    return _current.set(RequestMetrics())
+
+
+def end_request(token):
+    metrics = _current.get()
+    _current.reset(token)
+    return metrics
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, name)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add_span(name, elapsed)
+
+
+def timed(name):
+    """Record every call of the decorated function (sync, async or generator) as a span."""
+
+    def decorator(fn):
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+
+        elif inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    yield from fn(*args, **kwargs)
+
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_llm(prompt_chars, response_chars):
+    if not settings.METRICS_ENABLED:
+        return
+
+    LLM_PROMPT_CHARS.observe(prompt_chars)
+    LLM_RESPONSE_CHARS.observe(response_chars)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_llm(prompt_chars, response_chars)
+
+
+def record_context(tokens, dropped_tokens):
+    if not settings.METRICS_ENABLED:
+        return
+
+    CONTEXT_TOKENS.observe(tokens)
+    CONTEXT_DROPPED_TOKENS.observe(dropped_tokens)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_context(tokens, dropped_tokens)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        connection = context["connection"]
+        DB_QUERY_SECONDS.observe(elapsed, connection.alias)
+        metrics = _current.get()
+        if metrics is not None:
+            rowcount = getattr(context["cursor"], "rowcount", -1)
+            metrics.add_query(elapsed, rowcount if not many else 0)
+
+
+def install_db_instrumentation(sender, connection, **kwargs):
+    """connection_created receiver: time every query on the new connection."""
+    if settings.METRICS_ENABLED and db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def _stats_lines(prefix, stats, labels=""):
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{prefix}_{key}{labels} {value}")
+    return lines
+
+
+def collect_service_stats():
+    """Gauges from the process-wide caches and batchers that already exist."""
+    from api.db_routing import ReplicaSet
+    from api.services.answer_cache import AnswerCache
+    from api.services.embedding_batcher import EmbeddingBatcher
+    from api.services.embedding_cache import EmbeddingCache
+    from api.services.http_cache import ResponseCache
+    from api.services.llm_resilience import CircuitBreaker, LatencyTracker
+    from api.services.singleflight import SingleFlight
+    from hs.services.job_service import HSJobService
+
+    lines = []
+    for prefix, cls in (
+        ("answer_cache", AnswerCache),
+        ("embedding_cache", EmbeddingCache),
+        ("response_cache", ResponseCache),
+        ("embedding_batcher", EmbeddingBatcher),
+        ("llm_singleflight", SingleFlight),
+        ("hs_jobs", HSJobService),
+        ("db_replicas", ReplicaSet),
+    ):
+        instance = cls._instance
+        if instance is not None:
+            stats = instance.stats()
+            stats.pop("histogram", None)
+            lines.extend(_stats_lines(prefix, stats))
+
+    # One breaker / latency window per upstream, labelled by name.
+    for prefix, cls in (("llm_breaker", CircuitBreaker), ("llm_latency", LatencyTracker)):
+        for name, instance in list(cls._instances.items()):
+            lines.extend(_stats_lines(prefix, instance.stats(), _labels(("upstream",), (name,))))
+    return lines
+
+
+_snapshot_lock = threading.Lock()
+_snapshot_written = 0.0
+
+
+def write_snapshot(force=False):
+    """
+    Save this process's metrics to METRICS_MULTIPROCESS_DIR (at most every
+    METRICS_SNAPSHOT_INTERVAL seconds unless forced), so whichever worker
+    is scraped can report all of them.
+    """
+    global _snapshot_written
+
+    directory = settings.METRICS_MULTIPROCESS_DIR
+    if not directory:
+        return
+
+    now = time.monotonic()
+    if not force and now - _snapshot_written < settings.METRICS_SNAPSHOT_INTERVAL:
+        return
+    if not _snapshot_lock.acquire(blocking=force):
+        return
+
+    try:
+        _snapshot_written = now
+        data = {
+            "pid": os.getpid(),
+            "histograms": {
+                h.name: [[list(labels), *series] for labels, series in h.snapshot().items()]
+                for h in HISTOGRAMS
+            },
+            "stats": collect_service_stats(),
+        }
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+    finally:
+        _snapshot_lock.release()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def render_merged():
+    """
+    Exposition text for every worker's snapshot. Histograms are summed, and
+    those of exited workers are kept so the totals stay monotonic across
+    worker restarts. Service stats (cache sizes, breaker state, ...) are
+    reported per live worker with a `worker` label.
+    """
+    write_snapshot(force=True)
+
+    histograms = {h.name: {} for h in HISTOGRAMS}
+    stats = []
+
+    for path in glob.glob(os.path.join(settings.METRICS_MULTIPROCESS_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for name, entries in data["histograms"].items():
+            merged = histograms.get(name)
+            if merged is None:
+                continue
+            for labels, counts, total, count in entries:
+                current = merged.setdefault(tuple(labels), [[0] * len(counts), 0.0, 0])
+                if len(current[0]) != len(counts):
+                    # Written with other buckets by an older deploy.
+                    continue
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+                current[2] += count
+
+        if data["pid"] == os.getpid() or _alive(data["pid"]):
+            worker = _labels(("worker",), (data["pid"],))
+            for line in data["stats"]:
+                name, brace, rest = line.partition("{")
+                if brace:
+                    stats.append(f"{name}{worker[:-1]},{rest}")
+                else:
+                    name, value = line.rsplit(" ", 1)
+                    stats.append(f"{name}{worker} {value}")
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render(histograms[histogram.name]))
+    lines.extend(stats)
+    return "\n".join(lines) + "\n"
+
+
+def render_prometheus():
+    if settings.METRICS_MULTIPROCESS_DIR:
+        return render_merged()
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(collect_service_stats())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,116 @@
+from django.conf import settings
+from api.services.vector_service import VectorService
+from api.services.llm_service import LLMService
+from api.services.llm_resilience import LLMUnavailable
+from api.services.answer_cache import AnswerCache
+from api.services.context_packer import ContextPacker
+from api.services.data_version import DataVersionService
+
+
+class RAGService:
+
+    CACHE_SCOPE = "api.ask"
+    NO_CONTEXT_ANSWER = "No relevant information found in the knowledge base."
+
+    def __init__(self):
+        self.vector = VectorService()
+        self.llm = LLMService()
+        self.cache = AnswerCache.get_instance() if settings.ANSWER_CACHE_ENABLED else None
+        self.packer = ContextPacker()
+
+    def lookup_cached(self, query, top_k):
+        """Return (cached_result, version, embedding) for the current KB version."""
+        if self.cache is None:
+            return None, None, None
+
+        version = DataVersionService.get_version("knowledge_base")
+        cached, embedding = self.cache.lookup(
+            self.CACHE_SCOPE,
+            query,
+            top_k=top_k,
+            version=version,
+            embed=self.vector.embed,
+        )
+        return cached, version, embedding
+
+    def store_cached(self, query, top_k, version, embedding, result):
+        if self.cache is None:
+            return
+
+        self.cache.store(
+            self.CACHE_SCOPE,
+            query,
+            result,
+            top_k=top_k,
+            version=version,
+            embedding=embedding,
+        )
+
+    def find_context(self, query, top_k, version, embedding):
+        """KB context; when it will be cached under version, read no older than that."""
+        if version is None:
+            return self.vector.find_context(query, top_k, embedding=embedding)
+        with DataVersionService.consistent_reads("knowledge_base"):
+            return self.vector.find_context(query, top_k, embedding=embedding)
+
+    def build_context(self, sources):
+        """Packed context string and the sources that made it into it."""
+        packed = self.packer.pack([s["content"] for s in sources])
+        return packed.text, [sources[i] for i in packed.kept_indices(None)]
+
+    def answer(self, query, top_k=5):
+
+        cached, version, embedding = self.lookup_cached(query, top_k)
+        if cached is not None:
+            return cached
+
+        sources = self.find_context(query, top_k, version, embedding)
+        if not sources:
+            result = {"answer": self.NO_CONTEXT_ANSWER, "sources": []}
+        else:
+            context_str, sources = self.build_context(sources)
+            answer = self.llm.try_reasoning(query, context_str)
+            result = {"answer": answer, "sources": sources}
+
+            # LLM unavailable: sources only, not cached
+            if answer is None:
+                result["degraded"] = True
+                return result
+
+        self.store_cached(query, top_k, version, embedding, result)
+        return result
+
+    def stream_answer(self, query, top_k=5):
+        """Yield (event, data) pairs: sources, answer tokens, then done."""
+
+        cached, version, embedding = self.lookup_cached(query, top_k)
+        if cached is not None:
+            yield "sources", cached["sources"]
+            yield "token", {"text": cached["answer"]}
+            yield "done", {"answer": cached["answer"], "cached": True}
+            return
+
+        sources = self.find_context(query, top_k, version, embedding)
+        if sources:
+            context_str, sources = self.build_context(sources)
+        yield "sources", sources
+
+        if not sources:
+            answer = self.NO_CONTEXT_ANSWER
+        else:
+            tokens = []
+            try:
+                for token in self.llm.stream_reasoning(query, context_str):
+                    tokens.append(token)
+                    yield "token", {"text": token}
+            except LLMUnavailable as e:
+                if tokens or not self.llm.degrade(e):
+                    raise
+                yield "done", {"answer": None, "degraded": True}
+                return
+            answer = "".join(tokens)
+
+        self.store_cached(
+            query, top_k, version, embedding, {"answer": answer, "sources": sources}
+        )
+        yield "done", {"answer": answer}
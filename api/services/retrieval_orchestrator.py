@@ -0,0 +1,135 @@
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from api.services import deadline
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalStage:
+    """One independent retrieval step with its own timeout and fallback value."""
+
+    def __init__(self, name: str, fn: Callable[[], Any], fallback=None, timeout: float = None):
+        self.name = name
+        self.fn = fn
+        self.fallback = fallback
+        self.timeout = timeout
+
+
+class RetrievalResult:
+
+    def __init__(self):
+        self.values = {}
+        self.failed = {}
+        self.timings = {}
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    @property
+    def partial(self):
+        return bool(self.failed)
+
+
+class RetrievalOrchestrator:
+    """
+    Runs independent retrieval stages concurrently on a shared thread pool.
+
+    Each stage gets its own timeout, never past the request deadline. A stage that raises or misses its
+    deadline is replaced by its fallback value, so callers always get a
+    complete RetrievalResult and decide what to do with partial context.
+    Stages run in a copy of the caller's contextvars and release stale
+    database connections on the worker thread before and after running.
+
+    With RETRIEVAL_CONCURRENCY_ENABLED=False stages run sequentially in
+    the calling thread (no timeouts, same fallbacks).
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout if timeout is not None else settings.RETRIEVAL_STAGE_TIMEOUT
+        self.concurrent = settings.RETRIEVAL_CONCURRENCY_ENABLED
+
+    @classmethod
+    def get_executor(cls):
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.RETRIEVAL_MAX_WORKERS,
+                        thread_name_prefix="retrieval",
+                    )
+        return cls._executor
+
+    @staticmethod
+    def _run_stage(stage: RetrievalStage):
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            return stage.fn(), time.perf_counter() - started
+        finally:
+            close_old_connections()
+
+    def _fail(self, result, stage, reason):
+        logger.warning("Retrieval stage %s fell back: %s", stage.name, reason)
+        result.values[stage.name] = stage.fallback
+        result.failed[stage.name] = reason
+
+    def run_sequential(self, *stages: RetrievalStage) -> RetrievalResult:
+        result = RetrievalResult()
+
+        for stage in stages:
+            started = time.perf_counter()
+            try:
+                result.values[stage.name] = stage.fn()
+            except Exception as e:
+                self._fail(result, stage, repr(e))
+            result.timings[stage.name] = time.perf_counter() - started
+
+        return result
+
+    def run(self, *stages: RetrievalStage) -> RetrievalResult:
+        if not self.concurrent:
+            return self.run_sequential(*stages)
+
+        executor = self.get_executor()
+        started = time.perf_counter()
+        left = deadline.remaining()
+
+        futures = [
+            (stage, executor.submit(contextvars.copy_context().run, self._run_stage, stage))
+            for stage in stages
+        ]
+
+        result = RetrievalResult()
+        for stage, future in futures:
+            timeout = stage.timeout if stage.timeout is not None else self.timeout
+            if left is not None:
+                timeout = min(timeout, left)
+            remaining = max(0.0, started + timeout - time.perf_counter())
+
+            try:
+                value, elapsed = future.result(timeout=remaining)
+            except TimeoutError:
+                future.cancel()
+                self._fail(result, stage, f"timed out after {timeout}s")
+                result.timings[stage.name] = time.perf_counter() - started
+                continue
+            except Exception as e:
+                self._fail(result, stage, repr(e))
+                result.timings[stage.name] = time.perf_counter() - started
+                continue
+
+            result.values[stage.name] = value
+            result.timings[stage.name] = elapsed
+
+        return result
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+
+class LeaderCancelled(Exception):
+    """The call that waiters were sharing was cancelled before it finished."""
+
+
+class WaitTimeout(TimeoutError):
+    """A waiter's own timeout ran out before the shared call finished."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive with the same key while it is in flight wait for its outcome and
+    get the same result or exception. Nothing is cached: once the call
+    finishes the key is free again. Sync and async callers share the same
+    in-flight calls. If the leader is cancelled (e.g. an async client
+    disconnects) a waiting caller takes over and runs the call itself.
+
+    Waiters give up after their own `timeout` (WaitTimeout), and an error
+    for which `retry(exc)` is true (e.g. the leader's shorter deadline ran
+    out) is not shared: each waiter runs or joins the call again.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def key(*parts) -> str:
+        data = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _join(self, key):
+        """Return (future, is_leader) for key."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+
+            future = self._calls[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    @staticmethod
+    def _left(end):
+        return None if end is None else max(0.0, end - time.monotonic())
+
+    def do(self, key, fn, timeout=None, retry=None):
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result(timeout=self._left(end))
+                except LeaderCancelled:
+                    continue
+                except TimeoutError:
+                    if not future.done():
+                        raise WaitTimeout("timed out waiting for a shared call") from None
+                    raise
+                except Exception as e:
+                    if retry is not None and retry(e):
+                        continue
+                    raise
+
+            try:
+                result = fn()
+            except Exception as e:
+                self._finish(key, future, error=e)
+                raise
+            except BaseException:
+                self._finish(key, future, error=LeaderCancelled())
+                raise
+
+            self._finish(key, future, result)
+            return result
+
+    async def ado(self, key, fn, timeout=None, retry=None):
+        """do() for a coroutine function; waiting never blocks the event loop."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # shield: a cancelled waiter must not cancel the shared call.
+                    return await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(future)), self._left(end)
+                    )
+                except LeaderCancelled:
+                    continue
+                except TimeoutError:
+                    if not future.done():
+                        raise WaitTimeout("timed out waiting for a shared call") from None
+                    raise
+                except Exception as e:
+                    if retry is not None and retry(e):
+                        continue
+                    raise
+
+            try:
+                result = await fn()
+            except Exception as e:
+                self._finish(key, future, error=e)
+                raise
+            except BaseException:
+                self._finish(key, future, error=LeaderCancelled())
+                raise
+
+            self._finish(key, future, result)
+            return result
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"in_flight": in_flight, "leaders": self.leaders, "shared": self.shared}
@@ -0,0 +1,49 @@
+import json
+import logging
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from api.services.llm_resilience import LLMUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def _error_event(exc) -> str:
+    # Headers are already sent, so surface failures as a terminal event. The
+    # exception text stays in the log; it can carry URLs or SQL.
+    logger.exception("SSE stream failed")
+    if isinstance(exc, LLMUnavailable):
+        return sse_event("error", {"detail": "LLM service unavailable, retry later"})
+    return sse_event("error", {"detail": "Internal server error"})
+
+
+def _encode(events):
+    try:
+        for event, data in events:
+            yield sse_event(event, data)
+    except Exception as e:
+        yield _error_event(e)
+
+
+async def _aencode(events):
+    try:
+        async for event, data in events:
+            yield sse_event(event, data)
+    except Exception as e:
+        yield _error_event(e)
+
+
+def sse_response(events) -> StreamingHttpResponse:
+    """
+    Wrap an iterator of (event, data) pairs in a text/event-stream response.
+    Async iterators are streamed natively under ASGI.
+    """
+    body = _aencode(events) if hasattr(events, "__aiter__") else _encode(events)
+    response = StreamingHttpResponse(body, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
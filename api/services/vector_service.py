@@ -29,28 +29,72 @@
 #             rows = cur.fetchall()
 #             return [{"content": r[0], "doc_level": r[1]} for r in rows]
 
-from django.db import connection
-from sentence_transformers import SentenceTransformer
+from django.conf import settings
+from api.db_routing import read_connection, replica_reads
 from typing import List, Dict
 from datetime import date
+from api.services.embedding_backends import get_embedding_backend
+from api.services.embedding_cache import EmbeddingCache
+from api.services.embedding_batcher import EmbeddingBatcher
+from api.services.metrics import timed
 
 
 class VectorService:
-    _model = None
 
     @classmethod
     def get_model(cls):
-        if cls._model is None:
-            cls._model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
-        return cls._model
+        return get_embedding_backend()
 
+    @classmethod
+    def encode_batch(cls, texts: List[str]):
+        return cls.get_model().encode(texts)
+
+    def encode(self, text: str):
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            return EmbeddingBatcher.get_instance(self.encode_batch).embed(text)
+        return self.encode_batch([text])[0]
+
+    @timed("embed")
     def embed(self, text: str) -> List[float]:
-        model = self.get_model()
-        return model.encode(text).tolist()
+        cache = EmbeddingCache.get_instance() if settings.EMBEDDING_CACHE_ENABLED else None
+
+        if cache is not None:
+            vector = cache.get(text)
+            if vector is not None:
+                return vector.tolist()
+
+        vector = self.encode(text)
+
+        if cache is not None:
+            cache.put(text, vector)
+
+        return vector.tolist()
+
+    @timed("embed")
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts, encoding only cache misses in one call."""
+        cache = EmbeddingCache.get_instance() if settings.EMBEDDING_CACHE_ENABLED else None
+
+        vectors = [cache.get(t) if cache is not None else None for t in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+        if missing:
+            encoded = dict(zip(missing, self.encode_batch(missing)))
+            if cache is not None:
+                for text, vector in encoded.items():
+                    cache.put(text, vector)
+            vectors = [v if v is not None else encoded[t] for t, v in zip(texts, vectors)]
+
+        return [v.tolist() for v in vectors]
 
 
-    def find_context(self, query: str, limit: int = 5) -> List[Dict]:
-        embedding = self.embed(query)
+    @timed("kb_search")
+    @replica_reads
+    def find_context(
+        self, query: str, limit: int = 5, embedding: List[float] = None
+    ) -> List[Dict]:
+        if embedding is None:
+            embedding = self.embed(query)
         similarity_threshold = 0.75
 
         sql = """
@@ -68,7 +112,7 @@ class VectorService:
 
         params = [embedding, date.today(), similarity_threshold, limit]
 
-        with connection.cursor() as cur:
+        with read_connection().cursor() as cur:
             cur.execute(sql, params)
             rows = cur.fetchall()
 
@@ -4,7 +4,7 @@ from django.test import TestCase
 
 # Question:
 # 1: What is export policy for furit from India to South Korea? is furit based food product like dried mango and fresh fruit has different regulations?
-        sql = """
+sql = """
             WITH query_embedding AS (
                 SELECT %s::vector AS qvec
             )
@@ -19,7 +19,7 @@ from django.test import TestCase
 # No relevant information found in the knowledge base. similarity_threshold = 0.35
 # similarity_threshold = 0.65
 #
-    """_I do not have sufficient information in the knowledge base.
+"""_I do not have sufficient information in the knowledge base.
 The provided context does not mention any specific export policies for fruits or any other food products to South Korea.
 Therefore, it cannot be determined whether there are different regulations for dried mangoes and fresh fruits based on the given information.
 The context discusses export controls for dual-use, military goods, nuclear-related items, and sensitive technologies, but does not address fruit exports to South Korea.
@@ -0,0 +1,83 @@
+from django.test import SimpleTestCase
+
+from api.services.answer_cache import AnswerCache
+
+VECTORS = {
+    "export policy for 0101 mangoes": [1.0, 0.0, 0.0],
+    "what is the export policy for 0101 mangoes": [0.99, 0.05, 0.0],
+    "export policy for 0102 mangoes": [0.99, 0.05, 0.0],
+    "import policy for rice": [0.0, 1.0, 0.0],
+}
+
+
+def embed(query):
+    return VECTORS[AnswerCache.normalize(query)]
+
+
+class AnswerCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = AnswerCache(max_entries=10, ttl=60, semantic_distance=0.05)
+
+    def test_exact_hit_ignores_case_and_punctuation(self):
+        self.cache.store("rag", "Export policy for 0101 mangoes?", "Free", version="v1")
+
+        value, embedding = self.cache.lookup("rag", "export  policy for 0101 MANGOES", version="v1")
+
+        self.assertEqual(value, "Free")
+        self.assertIsNone(embedding)
+        self.assertEqual(self.cache.stats()["exact_hits"], 1)
+
+    def test_version_change_invalidates_the_scope(self):
+        self.cache.store("rag", "export policy for 0101 mangoes", "Free", version="v1")
+        self.cache.store("hs", "export policy for 0101 mangoes", "Free", version="v1")
+
+        value, _ = self.cache.lookup("rag", "export policy for 0101 mangoes", version="v2")
+
+        self.assertIsNone(value)
+        # Only the scope that saw the new version is dropped.
+        self.assertEqual(self.cache.stats()["entries"], 1)
+        value, _ = self.cache.lookup("hs", "export policy for 0101 mangoes", version="v1")
+        self.assertEqual(value, "Free")
+
+    def test_old_version_entries_are_not_served_after_a_newer_store(self):
+        self.cache.store("rag", "export policy for 0101 mangoes", "Free", version="v1")
+        self.cache.store("rag", "import policy for rice", "Restricted", version="v2")
+
+        value, _ = self.cache.lookup("rag", "export policy for 0101 mangoes", version="v1")
+
+        self.assertIsNone(value)
+
+    def test_semantic_hit_returns_the_query_embedding(self):
+        query = "export policy for 0101 mangoes"
+        self.cache.store("rag", query, "Free", version="v1", embedding=embed(query))
+
+        value, embedding = self.cache.lookup(
+            "rag", "What is the export policy for 0101 mangoes?", version="v1", embed=embed
+        )
+
+        self.assertEqual(value, "Free")
+        self.assertEqual(embedding, VECTORS["what is the export policy for 0101 mangoes"])
+        self.assertEqual(self.cache.stats()["semantic_hits"], 1)
+
+    def test_semantic_match_requires_the_same_numbers(self):
+        query = "export policy for 0101 mangoes"
+        self.cache.store("rag", query, "Free", version="v1", embedding=embed(query))
+
+        value, embedding = self.cache.lookup(
+            "rag", "export policy for 0102 mangoes", version="v1", embed=embed
+        )
+
+        self.assertIsNone(value)
+        self.assertIsNotNone(embedding)
+
+    def test_evicts_least_recently_used(self):
+        cache = AnswerCache(max_entries=2, ttl=60, semantic_distance=0)
+        cache.store("rag", "a", 1)
+        cache.store("rag", "b", 2)
+        cache.lookup("rag", "a")
+        cache.store("rag", "c", 3)
+
+        self.assertEqual(cache.lookup("rag", "a")[0], 1)
+        self.assertIsNone(cache.lookup("rag", "b")[0])
+        self.assertEqual(cache.stats()["evictions"], 1)
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import jwt
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import ClerkJWTAuthentication
+from api.services.jwks_cache import JWKSCache, VerifiedTokenCache
+from stubs.jwks_server import serve
+
+
+class JWKSStubMixin:
+    """Runs stubs.jwks_server on a free port for the duration of a test."""
+
+    def start_jwks(self):
+        self.server = serve(port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.issuer = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+        self.keyring = self.server.keyring
+
+    def token(self, **kwargs):
+        return self.keyring.mint(self.issuer, **kwargs)
+
+
+class JWKSCacheTests(JWKSStubMixin, SimpleTestCase):
+
+    def setUp(self):
+        self.start_jwks()
+
+    def cache(self, ttl=300, min_refetch_interval=0):
+        return JWKSCache(self.jwks_url, ttl=ttl, min_refetch_interval=min_refetch_interval)
+
+    def test_known_kid_is_served_from_memory(self):
+        cache = self.cache()
+
+        first = cache.get_signing_key_from_jwt(self.token())
+        second = cache.get_signing_key_from_jwt(self.token(sub="user_2"))
+
+        self.assertIs(first, second)
+        self.assertEqual(self.keyring.jwks_requests, 1)
+
+    def test_unknown_kid_refetches_the_key_set(self):
+        cache = self.cache()
+        cache.get_signing_key_from_jwt(self.token())
+
+        new_kid = self.keyring.rotate()
+        key = cache.get_signing_key_from_jwt(self.token())
+
+        self.assertEqual(key.key_id, new_kid)
+        self.assertEqual(self.keyring.jwks_requests, 2)
+
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        cache = self.cache(min_refetch_interval=60)
+        cache.get_signing_key_from_jwt(self.token())
+
+        self.keyring.rotate()
+        with self.assertRaises(jwt.PyJWKClientError):
+            cache.get_signing_key_from_jwt(self.token())
+
+        self.assertEqual(self.keyring.jwks_requests, 1)
+
+    def test_first_fetch_failure_raises(self):
+        cache = JWKSCache(f"{self.issuer}/missing.json", ttl=300, min_refetch_interval=0)
+
+        with self.assertRaises(Exception):
+            cache.get_signing_key("any")
+
+    def test_failed_background_refresh_keeps_the_current_keys(self):
+        cache = self.cache(ttl=0)
+        kid = cache.get_signing_key_from_jwt(self.token()).key_id
+        cache.url = f"{self.issuer}/missing.json"
+
+        # Stale: this read starts a refresh that fails in the background.
+        self.assertEqual(cache.get_signing_key(kid).key_id, kid)
+        deadline = time.monotonic() + 5
+        while cache._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertFalse(cache._refreshing)
+        self.assertEqual(cache.get_signing_key(kid).key_id, kid)
+
+
+class VerifiedTokenCacheTests(SimpleTestCase):
+
+    def test_entry_expires_at_the_token_exp(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.put("live", {"sub": "a", "exp": time.time() + 60})
+        cache.put("expired", {"sub": "b", "exp": time.time() - 1})
+
+        self.assertEqual(cache.get("live")["sub"], "a")
+        self.assertIsNone(cache.get("expired"))
+        self.assertNotIn(cache._key("expired"), cache._entries)
+
+    def test_payload_without_exp_is_not_cached(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.put("token", {"sub": "a"})
+
+        self.assertIsNone(cache.get("token"))
+
+    def test_bounded_lru(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        exp = time.time() + 60
+        cache.put("a", {"sub": "a", "exp": exp})
+        cache.put("b", {"sub": "b", "exp": exp})
+        cache.get("a")
+        cache.put("c", {"sub": "c", "exp": exp})
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+
+class ClerkJWTAuthenticationTests(JWKSStubMixin, SimpleTestCase):
+
+    def setUp(self):
+        self.start_jwks()
+
+        overrides = override_settings(
+            CLERK_ISSUER=self.issuer,
+            JWKS_URL=self.jwks_url,
+            JWKS_MIN_REFETCH_INTERVAL=0,
+            VERIFIED_TOKEN_CACHE_SIZE=10,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.addCleanup(JWKSCache._instances.pop, self.jwks_url, None)
+        self.addCleanup(setattr, VerifiedTokenCache, "_instance", None)
+        VerifiedTokenCache._instance = None
+
+    def authenticate(self, token):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClerkJWTAuthentication().authenticate(request)
+
+    def test_valid_token(self):
+        user, _ = self.authenticate(self.token(sub="user_1"))
+
+        self.assertEqual(user.id, "user_1")
+        self.assertEqual(user.email, "user_1@example.test")
+
+    def test_repeat_token_skips_verification(self):
+        token = self.token()
+        self.authenticate(token)
+        self.server.shutdown()
+
+        user, _ = self.authenticate(token)
+
+        self.assertEqual(user.id, "user_stub")
+        self.assertIsNotNone(VerifiedTokenCache.get_instance().get(token))
+
+    def test_expired_token_is_rejected(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token(ttl=-10))
+
+    def test_jwks_fetch_failure_rejects_the_token(self):
+        token = self.token()
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
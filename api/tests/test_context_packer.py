@@ -0,0 +1,72 @@
+from django.test import SimpleTestCase, override_settings
+
+from api.services.context_packer import ContextPacker
+
+PARAGRAPH = (
+    "Export of dual-use items listed in SCOMET category 8 requires an "
+    "authorisation from DGFT before shipment, and the exporter must file "
+    "an end-use certificate signed by the importer."
+)
+
+
+def record(code, description="Mangoes, fresh", policy="Free"):
+    return f"HS Code: {code}\nDescription: {description}\nPolicy: {policy}"
+
+
+@override_settings(
+    CONTEXT_PACKING_ENABLED=True,
+    CONTEXT_CHARS_PER_TOKEN=4,
+    CONTEXT_MIN_CHUNK_TOKENS=10,
+    CONTEXT_DEDUP_THRESHOLD=0.8,
+)
+class ContextPackerTests(SimpleTestCase):
+
+    def test_drops_near_duplicate_documents(self):
+        chunks = [PARAGRAPH, PARAGRAPH + " See also chapter 3.", "Fresh fruit needs a phytosanitary certificate."]
+
+        packed = ContextPacker(budget=1000).pack(chunks)
+
+        self.assertEqual(packed.kept_indices(None), [0, 2])
+        self.assertEqual(packed.duplicates, 1)
+
+    def test_records_only_dropped_when_identical(self):
+        records = [record("08045020"), record("08045030"), record("08045020")]
+
+        packed = ContextPacker(budget=1000).pack_sections(
+            [("STRUCTURED", records)], records=("STRUCTURED",)
+        )
+
+        self.assertEqual(packed.kept_indices("STRUCTURED"), [0, 1])
+        self.assertEqual(packed.duplicates, 1)
+
+    def test_records_do_not_suppress_documents(self):
+        packed = ContextPacker(budget=1000).pack_sections(
+            [("STRUCTURED", [PARAGRAPH]), ("CONTEXT", [PARAGRAPH])], records=("STRUCTURED",)
+        )
+
+        self.assertEqual(packed.kept_indices("STRUCTURED"), [0])
+        self.assertEqual(packed.kept_indices("CONTEXT"), [0])
+
+    def test_truncates_first_chunk_over_budget_and_drops_the_rest(self):
+        long_chunk = " ".join(f"Sentence number {i} about customs duty." for i in range(40))
+        packer = ContextPacker(budget=60)
+
+        packed = packer.pack(["Short lead chunk.", long_chunk, "Never reached."])
+
+        self.assertEqual(packed.kept_indices(None), [0, 1])
+        self.assertEqual(packed.truncated, 1)
+        self.assertEqual(packed.dropped_chunks, 1)
+        self.assertLessEqual(packed.tokens, 60)
+        self.assertNotIn("Never reached", packed.text)
+
+    def test_section_headers_kept_when_empty(self):
+        packed = ContextPacker(budget=1000).pack_sections([("A", []), ("B", ["text"])])
+
+        self.assertEqual(packed.text, "A:\n\n\nB:\ntext")
+
+    @override_settings(CONTEXT_PACKING_ENABLED=False)
+    def test_disabled_joins_unchanged(self):
+        packed = ContextPacker(budget=1).pack([PARAGRAPH, PARAGRAPH])
+
+        self.assertEqual(packed.text, PARAGRAPH + "\n\n" + PARAGRAPH)
+        self.assertEqual(packed.duplicates, 0)
@@ -0,0 +1,102 @@
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+from api.db_routing import ReplicaSet, read_alias, reads_at_least, replica_reads
+
+
+class FakeReplicaSet(ReplicaSet):
+    """ReplicaSet whose lag check reports `replayed` instead of querying."""
+
+    def __init__(self, aliases):
+        super().__init__(aliases, retry_seconds=30, check_interval=60, max_lag=30)
+        self.replayed_position = dict.fromkeys(aliases, 100)
+        self.checks = 0
+
+    def check(self, alias):
+        self.checks += 1
+        self._replayed[alias] = self.replayed_position[alias]
+        return True
+
+    def mark_down(self, alias, reason):
+        self._down_until[alias] = float("inf")
+
+
+class ReplicaSetTests(SimpleTestCase):
+
+    def setUp(self):
+        self.replicas = FakeReplicaSet(["replica_0", "replica_1"])
+
+    def test_round_robin(self):
+        self.assertEqual(
+            [self.replicas.choose() for _ in range(4)],
+            ["replica_0", "replica_1", "replica_0", "replica_1"],
+        )
+
+    def test_skips_replica_marked_down(self):
+        self.replicas.mark_down("replica_0", "test")
+        self.assertEqual({self.replicas.choose() for _ in range(3)}, {"replica_1"})
+
+        self.replicas.mark_down("replica_1", "test")
+        self.assertIsNone(self.replicas.choose())
+        self.assertEqual(self.replicas.stats()["healthy"], 0)
+
+    def test_reads_at_least_requires_replayed_position(self):
+        self.replicas.replayed_position["replica_0"] = 50
+
+        with reads_at_least(80):
+            self.assertEqual({self.replicas.choose() for _ in range(4)}, {"replica_1"})
+
+        with reads_at_least(150):
+            self.assertIsNone(self.replicas.choose())
+
+        self.assertEqual(self.replicas.choose(), "replica_0")
+
+    def test_lagging_replica_rechecked_once(self):
+        self.replicas.choose()
+        self.replicas.choose()
+        checks = self.replicas.checks
+
+        self.replicas.replayed_position["replica_0"] = 200
+        with reads_at_least(150):
+            self.assertEqual(self.replicas.choose(), "replica_0")
+        self.assertEqual(self.replicas.checks, checks + 1)
+
+    def test_no_position_adds_no_constraint(self):
+        with reads_at_least(None):
+            self.assertEqual(self.replicas.choose(), "replica_0")
+
+
+class ReplicaReadsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.replicas = FakeReplicaSet(["replica_0"])
+        ReplicaSet._instance, previous = self.replicas, ReplicaSet._instance
+        self.addCleanup(setattr, ReplicaSet, "_instance", previous)
+
+    def test_fails_over_to_default(self):
+        aliases = []
+
+        @replica_reads
+        def read():
+            aliases.append(read_alias())
+            if read_alias() == "replica_0":
+                raise OperationalError("connection lost")
+            return "rows"
+
+        self.assertEqual(read(), "rows")
+        self.assertEqual(aliases, ["replica_0", "default"])
+        self.assertEqual(self.replicas.failovers, 1)
+        self.assertIsNone(self.replicas.choose())
+
+    def test_nested_scope_keeps_outer_choice(self):
+
+        @replica_reads
+        def inner():
+            return read_alias()
+
+        @replica_reads
+        def outer():
+            return read_alias(), inner()
+
+        self.assertEqual(outer(), ("replica_0", "replica_0"))
+        self.assertEqual(read_alias(), "default")
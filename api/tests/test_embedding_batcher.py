@@ -0,0 +1,59 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from api.services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [f"vec:{text}" for text in texts]
+
+
+class EmbeddingBatcherTests(SimpleTestCase):
+
+    def test_fans_one_batch_out_to_every_caller(self):
+        encode = RecordingEncoder()
+        # A full batch is flushed at once; the long wait is never reached.
+        batcher = EmbeddingBatcher(encode, max_batch_size=4, max_wait_ms=10_000)
+
+        futures = [batcher.submit(text) for text in ["a", "b", "a", "c"]]
+
+        self.assertEqual([f.result(timeout=5) for f in futures], ["vec:a", "vec:b", "vec:a", "vec:c"])
+        # Duplicates are encoded once.
+        self.assertEqual(encode.calls, [["a", "b", "c"]])
+        stats = batcher.stats()
+        self.assertEqual((stats["batches"], stats["items"]), (1, 4))
+        self.assertEqual(stats["batch_size_histogram"][4], 1)
+
+    def test_partial_batch_is_flushed_after_max_wait(self):
+        encode = RecordingEncoder()
+        batcher = EmbeddingBatcher(encode, max_batch_size=64, max_wait_ms=20)
+
+        self.assertEqual(batcher.embed("rice"), "vec:rice")
+        self.assertEqual(encode.calls, [["rice"]])
+
+    def test_encode_error_reaches_every_caller(self):
+        encode = RecordingEncoder(fail=True)
+        batcher = EmbeddingBatcher(encode, max_batch_size=2, max_wait_ms=10_000)
+
+        futures = [batcher.submit("a"), batcher.submit("b")]
+
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, "model crashed"):
+                future.result(timeout=5)
+
+        # The worker survives the failure.
+        encode.fail = False
+        futures = [batcher.submit("c"), batcher.submit("d")]
+        self.assertEqual([f.result(timeout=5) for f in futures], ["vec:c", "vec:d"])
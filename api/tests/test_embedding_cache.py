@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.services.embedding_cache import EmbeddingCache
+
+VECTOR_BYTES = 4 * 4
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "embeddings.sqlite3")
+
+    def test_lru_is_bounded_by_bytes(self):
+        cache = EmbeddingCache(max_bytes=2 * VECTOR_BYTES, model_name="m")
+        cache.put("a", [1, 0, 0, 0])
+        cache.put("b", [0, 1, 0, 0])
+        cache.get("a")
+        cache.put("c", [0, 0, 1, 0])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["bytes"], 2 * VECTOR_BYTES)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_model_name_is_part_of_the_key(self):
+        cache = EmbeddingCache(max_bytes=1024, model_name="m1", path=self.path)
+        cache.put("mango", [1, 2, 3, 4])
+
+        other = EmbeddingCache(max_bytes=1024, model_name="m2", path=self.path)
+
+        self.assertIsNone(other.get("mango"))
+
+    def test_disk_round_trip_survives_a_new_instance(self):
+        EmbeddingCache(max_bytes=1024, model_name="m", path=self.path).put("mango", [1, 2, 3, 4])
+
+        cache = EmbeddingCache(max_bytes=1024, model_name="m", path=self.path)
+        vector = cache.get("mango")
+
+        np.testing.assert_array_equal(vector, np.array([1, 2, 3, 4], dtype=np.float32))
+        self.assertEqual(vector.dtype, np.float32)
+        # Promoted into memory: the second lookup does not touch the disk.
+        cache.get("mango")
+        stats = cache.stats()
+        self.assertEqual((stats["disk_hits"], stats["hits"], stats["misses"]), (1, 1, 0))
+
+    def test_disk_is_shared_across_threads(self):
+        cache = EmbeddingCache(max_bytes=1024, model_name="m", path=self.path)
+        thread = threading.Thread(target=cache.put, args=("mango", [1, 2, 3, 4]))
+        thread.start()
+        thread.join()
+
+        fresh = EmbeddingCache(max_bytes=1024, model_name="m", path=self.path)
+
+        self.assertIsNotNone(fresh.get("mango"))
+
+    def test_unreadable_store_costs_a_miss(self):
+        cache = EmbeddingCache(max_bytes=1024, model_name="m", path=self.tmp.name)
+
+        with self.assertLogs("api.services.embedding_cache", "WARNING"):
+            self.assertIsNone(cache.get("rice"))
+            cache.put("mango", [1, 2, 3, 4])
+
+        self.assertEqual(cache.stats()["misses"], 1)
+        # The write failed on disk but the vector is still in memory.
+        self.assertIsNotNone(cache.get("mango"))
+
+    def test_locked_store_does_not_fail_the_write(self):
+        cache = EmbeddingCache(max_bytes=1024, model_name="m", path=self.path)
+        cache.put("rice", [1, 0, 0, 0])
+
+        locker = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(locker.close)
+        locker.execute("BEGIN EXCLUSIVE")
+        try:
+            with self.assertLogs("api.services.embedding_cache", "WARNING") as logs:
+                cache.put("mango", [1, 2, 3, 4])
+        finally:
+            locker.execute("ROLLBACK")
+
+        self.assertIn("database is locked", logs.output[0])
+        self.assertIsNotNone(cache.get("mango"))
@@ -0,0 +1,105 @@
+import contextlib
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from api.services.http_cache import CachedResponder, ResponseCache, make_etag
+
+
+@override_settings(
+    HTTP_CACHE_ENABLED=True,
+    RESPONSE_CACHE_ENABLED=True,
+    HTTP_CACHE_CONTROL="private, max-age=0, must-revalidate",
+)
+class CachedResponderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.version = "v1"
+        patchers = [
+            mock.patch(
+                "api.services.http_cache.DataVersionService.get_combined_version",
+                side_effect=lambda *tables: self.version,
+            ),
+            mock.patch(
+                "api.services.http_cache.DataVersionService.consistent_reads",
+                side_effect=lambda *tables: contextlib.nullcontext(),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        ResponseCache._instance, previous = ResponseCache(max_entries=10, ttl=60), ResponseCache._instance
+        self.addCleanup(setattr, ResponseCache, "_instance", previous)
+
+        self.builds = 0
+
+    def build(self, data=None, status=200):
+        def build():
+            self.builds += 1
+            return Response(data if data is not None else {"chapter": 8, "overview": "Fruit"}, status=status)
+        return build
+
+    def respond(self, build, **headers):
+        request = APIRequestFactory().get("/api/v1/hs/chapter/8/", **headers)
+        return CachedResponder("hs.chapter", ("itc_hs_master",)).respond(request, {"chapter_num": 8}, build)
+
+    def test_matching_if_none_match_gets_304_without_building(self):
+        first = self.respond(self.build())
+        etag = first["ETag"]
+
+        second = self.respond(self.build(), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], etag)
+        self.assertEqual(self.builds, 1)
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.respond(self.build())["ETag"]
+
+        response = self.respond(self.build(), HTTP_IF_NONE_MATCH=f'"other", {etag.removeprefix("W/")}')
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_data_version_changes_the_etag(self):
+        etag = self.respond(self.build())["ETag"]
+        self.version = "v2"
+
+        response = self.respond(self.build(), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.builds, 2)
+
+    def test_server_side_cache_hit(self):
+        self.respond(self.build())
+
+        response = self.respond(self.build())
+
+        self.assertEqual(response.data["overview"], "Fruit")
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(response["Cache-Control"], "private, max-age=0, must-revalidate")
+
+    def test_degraded_response_is_no_store(self):
+        degraded = {"chapter": 8, "overview": None, "degraded": True}
+
+        first = self.respond(self.build(degraded))
+        second = self.respond(self.build(degraded))
+
+        self.assertEqual(first["Cache-Control"], "no-store")
+        self.assertFalse(first.has_header("ETag"))
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(second["Cache-Control"], "no-store")
+
+    def test_error_response_is_no_store(self):
+        response = self.respond(self.build({"error": "Invalid HS Code"}, status=404))
+
+        self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertEqual(ResponseCache.get_instance().stats()["size"], 0)
+
+    def test_etag_covers_params_and_scope(self):
+        self.assertNotEqual(make_etag("hs.chapter", "v1", {"a": 1}), make_etag("hs.chapter", "v1", {"a": 2}))
+        self.assertNotEqual(make_etag("hs.chapter", "v1", {"a": 1}), make_etag("hs.analyze", "v1", {"a": 1}))
+        self.assertTrue(make_etag("hs.chapter", "v1", {}).startswith('W/"'))
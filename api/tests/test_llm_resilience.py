@@ -0,0 +1,87 @@
+import time
+
+import httpx
+from django.test import SimpleTestCase
+
+from api.services.llm_resilience import CircuitBreaker, LLMUnavailable, is_gateway_failure
+
+
+def status_error(status):
+    request = httpx.Request("POST", "http://gateway/")
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=0.05)
+
+    def open_breaker(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(LLMUnavailable):
+            self.breaker.before_call()
+        self.assertEqual(self.breaker.stats()["rejected"], 1)
+        self.assertEqual(self.breaker.stats()["opened"], 1)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_admits_one_trial(self):
+        self.open_breaker()
+        time.sleep(0.06)
+
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(LLMUnavailable):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        time.sleep(0.06)
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(LLMUnavailable):
+            self.breaker.before_call()
+
+    def test_release_frees_trial_slot(self):
+        self.open_breaker()
+        time.sleep(0.06)
+
+        self.breaker.before_call()
+        self.breaker.release()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+
+class GatewayFailureTests(SimpleTestCase):
+
+    def test_classification(self):
+        self.assertTrue(is_gateway_failure(httpx.ReadTimeout("timeout")))
+        self.assertTrue(is_gateway_failure(httpx.ConnectError("refused")))
+        self.assertTrue(is_gateway_failure(status_error(503)))
+        self.assertTrue(is_gateway_failure(status_error(429)))
+        self.assertFalse(is_gateway_failure(status_error(400)))
+        self.assertFalse(is_gateway_failure(ValueError("bad json")))
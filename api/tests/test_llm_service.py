@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from api.services import deadline
+from api.services.llm_resilience import CircuitBreaker, LatencyTracker, LLMDeadlineExceeded
+from api.services.llm_service import LLMService
+from stubs.llm_gateway import serve
+
+
+@override_settings(
+    LLM_SINGLEFLIGHT_ENABLED=True,
+    LLM_BREAKER_ENABLED=True,
+    LLM_HEDGING_ENABLED=True,
+    LLM_HEDGE_MIN_SAMPLES=5,
+    LLM_HEDGE_MIN_DELAY=0.2,
+)
+class LLMServiceGatewayTests(SimpleTestCase):
+    """LLMService against the local stub gateway (stubs.llm_gateway)."""
+
+    def setUp(self):
+        self.gateway = serve(port=0, latency=0.01, seed=1)
+        threading.Thread(target=self.gateway.serve_forever, daemon=True).start()
+        self.addCleanup(self.gateway.server_close)
+        self.addCleanup(self.gateway.shutdown)
+
+        url = f"http://127.0.0.1:{self.gateway.server_address[1]}/"
+        patcher = mock.patch.dict(os.environ, {"MODAL_LLM_URL": url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(CircuitBreaker._instances.pop, f"llm:{url}", None)
+        self.addCleanup(LatencyTracker._instances.pop, f"llm:{url}", None)
+
+    def service(self, warm=True):
+        llm = LLMService()
+        for _ in range(5 if warm else 0):
+            llm.latency.observe(0.2)
+        return llm
+
+    def slow_next_request(self, latency):
+        """The next request is answered after `latency`, later ones at once."""
+        config = self.gateway.config
+        sent = config.requests
+        config.update({"slow_rate": 1.0, "slow_latency": latency})
+        stop = threading.Event()
+
+        def watch():
+            while not stop.wait(0.005):
+                if config.requests > sent:
+                    config.update({"slow_rate": 0.0})
+                    return
+
+        threading.Thread(target=watch, daemon=True).start()
+        self.addCleanup(stop.set)
+
+    def test_answer(self):
+        answer = self.service(warm=False).get_reasoning("q", "HS Code: 08045020")
+        self.assertTrue(answer.startswith("HS Code: 08045020"))
+
+    def test_hedge_wins_over_slow_request(self):
+        llm = self.service()
+        # Warm up this thread's client, so the primary is sent at once.
+        llm.get_reasoning("warm-up", "ctx")
+        self.slow_next_request(latency=2.0)
+
+        started = time.monotonic()
+        answer = llm.get_reasoning("q", "HS Code: 08045020", timeout=5)
+
+        self.assertTrue(answer.startswith("HS Code: 08045020"))
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual(llm.latency.hedges, 1)
+        self.assertEqual(llm.latency.hedge_wins, 1)
+
+    async def test_async_hedge_wins_over_slow_request(self):
+        llm = self.service()
+        await llm.aget_reasoning("warm-up", "ctx")
+        self.slow_next_request(latency=2.0)
+
+        started = time.monotonic()
+        answer = await llm.aget_reasoning("q", "HS Code: 08045020", timeout=5)
+
+        self.assertTrue(answer.startswith("HS Code: 08045020"))
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual(llm.latency.hedge_wins, 1)
+
+    def test_hedged_call_bounded_by_deadline(self):
+        llm = self.service()
+        self.gateway.config.update({"latency": 3.0})
+
+        started = time.monotonic()
+        with deadline.scope(0.5), self.assertRaises(LLMDeadlineExceeded):
+            llm.get_reasoning("q", "ctx")
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_waiter_not_failed_by_shorter_leader_deadline(self):
+        llm = self.service(warm=False)
+        self.gateway.config.update({"latency": 0.6})
+        errors = []
+
+        def short_leader():
+            with deadline.scope(0.2):
+                try:
+                    llm.get_reasoning("q", "ctx")
+                except LLMDeadlineExceeded as e:
+                    errors.append(e)
+
+        leader = threading.Thread(target=short_leader)
+        leader.start()
+        time.sleep(0.05)
+
+        with deadline.scope(5):
+            answer = llm.get_reasoning("q", "ctx")
+        leader.join()
+
+        self.assertIsNotNone(answer)
+        self.assertEqual(len(errors), 1)
+
+    def test_waiter_stops_at_own_deadline(self):
+        llm = self.service(warm=False)
+        self.gateway.config.update({"latency": 1.0})
+
+        leader = threading.Thread(target=llm.get_reasoning, args=("q", "ctx"))
+        leader.start()
+        self.addCleanup(leader.join)
+        time.sleep(0.05)
+
+        started = time.monotonic()
+        with deadline.scope(0.15), self.assertRaises(LLMDeadlineExceeded):
+            llm.get_reasoning("q", "ctx")
+        self.assertLess(time.monotonic() - started, 0.5)
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.services import metrics
+from api.services.metrics import Histogram
+from api.views.system_views import MetricsView
+
+
+class HistogramTests(SimpleTestCase):
+
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram("t_seconds", "Test.", ("stage",), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value, "retrieve")
+
+        lines = histogram.render()
+
+        self.assertIn('t_seconds_bucket{stage="retrieve",le="0.1"} 1', lines)
+        self.assertIn('t_seconds_bucket{stage="retrieve",le="1.0"} 3', lines)
+        self.assertIn('t_seconds_bucket{stage="retrieve",le="+Inf"} 4', lines)
+        self.assertIn('t_seconds_sum{stage="retrieve"} 6.05', lines)
+        self.assertIn('t_seconds_count{stage="retrieve"} 4', lines)
+
+    def test_label_values_are_escaped(self):
+        histogram = Histogram("t_seconds", "Test.", ("route",), buckets=(1,))
+        histogram.observe(0.5, 'a"b\\c')
+
+        self.assertIn('t_seconds_count{route="a\\"b\\\\c"} 1', histogram.render())
+
+
+@override_settings(METRICS_ENABLED=True)
+class RequestMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        token = metrics.start_request()
+        self.addCleanup(metrics.end_request, token)
+
+    def test_timed_records_sync_generator_and_async_calls(self):
+        @metrics.timed("t_sync")
+        def sync():
+            return 1
+
+        @metrics.timed("t_gen")
+        def gen():
+            yield from (1, 2)
+
+        @metrics.timed("t_async")
+        async def coro():
+            return 3
+
+        self.assertEqual(sync(), 1)
+        self.assertEqual(sync(), 1)
+        self.assertEqual(list(gen()), [1, 2])
+        self.assertEqual(asyncio.run(coro()), 3)
+
+        spans = metrics.current().spans
+        self.assertEqual(spans["t_sync"][1], 2)
+        self.assertEqual(spans["t_gen"][1], 1)
+        self.assertEqual(spans["t_async"][1], 1)
+
+    def test_server_timing(self):
+        request = metrics.current()
+        request.add_span("retrieve", 0.012)
+        request.add_span("retrieve", 0.003)
+        request.add_query(0.002, 5)
+        request.add_llm(100, 40)
+
+        header = request.server_timing(0.05)
+
+        self.assertTrue(header.startswith("total;dur=50.0"))
+        self.assertIn('retrieve;dur=15.0;desc="x2"', header)
+        self.assertIn('db;dur=2.0;desc="queries=1 rows=5"', header)
+        self.assertIn('llm_chars;desc="prompt=100 response=40"', header)
+
+    def test_middleware_adds_server_timing(self):
+        response = self.client.get("/api/v1/system/status")
+
+        self.assertTrue(response["Server-Timing"].startswith("total;dur="))
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        overrides = override_settings(METRICS_MULTIPROCESS_DIR=self.tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def write_worker(self, pid, count):
+        buckets = [0] * (len(metrics.STAGE_SECONDS.buckets))
+        buckets[0] = count
+        data = {
+            "pid": pid,
+            "histograms": {"stage_duration_seconds": [[["t_merge"], buckets, 0.001 * count, count]]},
+            "stats": [f"answer_cache_entries {count}"],
+        }
+        with open(os.path.join(self.tmp.name, f"{pid}.json"), "w") as f:
+            json.dump(data, f)
+
+    def test_histograms_are_summed_and_stats_labelled_per_live_worker(self):
+        # A pid far above pid_max is never alive.
+        dead = 2 ** 30
+        self.write_worker(os.getppid(), 2)
+        self.write_worker(dead, 3)
+
+        text = metrics.render_prometheus()
+
+        self.assertIn('stage_duration_seconds_count{stage="t_merge"} 5', text)
+        self.assertIn(f'answer_cache_entries{{worker="{os.getppid()}"}} 2', text)
+        self.assertNotIn(f'worker="{dead}"', text)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, f"{os.getpid()}.json")))
+
+
+@override_settings(METRICS_AUTH_TOKEN="s3cret", METRICS_MULTIPROCESS_DIR="")
+class MetricsViewTests(SimpleTestCase):
+
+    def get(self, **headers):
+        request = APIRequestFactory().get("/api/v1/system/metrics", **headers)
+        return MetricsView.as_view()(request)
+
+    def test_valid_token(self):
+        response = self.get(HTTP_AUTHORIZATION="Bearer s3cret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE http_request_duration_seconds histogram", response.content)
+
+    def test_missing_token(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+    def test_wrong_and_non_ascii_tokens(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION="Bearer nope").status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION="Bearer s3crét").status_code, 403)
+
+    @override_settings(METRICS_AUTH_TOKEN="", METRICS_ALLOW_ANONYMOUS=False)
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(METRICS_AUTH_TOKEN="", METRICS_ALLOW_ANONYMOUS=True)
+    def test_anonymous_when_allowed(self):
+        self.assertEqual(self.get().status_code, 200)
@@ -0,0 +1,94 @@
+import contextvars
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from api.services import deadline
+from api.services.retrieval_orchestrator import RetrievalOrchestrator, RetrievalStage
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def fail():
+    raise ValueError("no index")
+
+
+@override_settings(RETRIEVAL_CONCURRENCY_ENABLED=True, RETRIEVAL_STAGE_TIMEOUT=5)
+class RetrievalOrchestratorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow(self):
+        self.release.wait(5)
+        return "late"
+
+    def test_stages_run_concurrently(self):
+        def stage(name):
+            time.sleep(0.2)
+            return name
+
+        started = time.monotonic()
+        result = RetrievalOrchestrator().run(
+            RetrievalStage("vector", lambda: stage("vector")),
+            RetrievalStage("lexical", lambda: stage("lexical")),
+        )
+
+        self.assertLess(time.monotonic() - started, 0.35)
+        self.assertEqual((result["vector"], result["lexical"]), ("vector", "lexical"))
+        self.assertFalse(result.partial)
+
+    def test_timed_out_stage_gets_its_fallback(self):
+        started = time.monotonic()
+        with self.assertLogs("api.services.retrieval_orchestrator", "WARNING"):
+            result = RetrievalOrchestrator().run(
+                RetrievalStage("vector", lambda: ["hit"]),
+                RetrievalStage("kb", self.slow, fallback=[], timeout=0.1),
+            )
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(result["vector"], ["hit"])
+        self.assertEqual(result["kb"], [])
+        self.assertTrue(result.partial)
+        self.assertIn("timed out", result.failed["kb"])
+
+    def test_failed_stage_gets_its_fallback(self):
+        with self.assertLogs("api.services.retrieval_orchestrator", "WARNING"):
+            result = RetrievalOrchestrator().run(
+                RetrievalStage("vector", lambda: ["hit"]),
+                RetrievalStage("kb", fail, fallback=[]),
+            )
+
+        self.assertEqual(result["kb"], [])
+        self.assertIn("no index", result.failed["kb"])
+        self.assertNotIn("vector", result.failed)
+
+    def test_request_deadline_caps_the_stage_timeout(self):
+        started = time.monotonic()
+        with deadline.scope(0.2), self.assertLogs("api.services.retrieval_orchestrator", "WARNING"):
+            result = RetrievalOrchestrator().run(RetrievalStage("kb", self.slow, fallback=None))
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIsNone(result["kb"])
+        self.assertIn("kb", result.failed)
+
+    def test_stages_see_the_caller_context(self):
+        token = request_id.set("req-1")
+        self.addCleanup(request_id.reset, token)
+
+        result = RetrievalOrchestrator().run(RetrievalStage("ctx", request_id.get))
+
+        self.assertEqual(result["ctx"], "req-1")
+
+    @override_settings(RETRIEVAL_CONCURRENCY_ENABLED=False)
+    def test_sequential_mode_keeps_fallbacks(self):
+        with self.assertLogs("api.services.retrieval_orchestrator", "WARNING"):
+            result = RetrievalOrchestrator().run(
+                RetrievalStage("vector", lambda: ["hit"]),
+                RetrievalStage("kb", fail, fallback=[]),
+            )
+
+        self.assertEqual((result["vector"], result["kb"]), (["hit"], []))
+        self.assertTrue(result.partial)
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from api.services.singleflight import SingleFlight, WaitTimeout
+
+
+class Cancelled(BaseException):
+    """Stands in for a cancellation that unwinds the leader."""
+
+
+class ShortDeadline(Exception):
+    pass
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.pool.shutdown)
+
+    def start_leader(self, fn):
+        """Run fn as the leader for "k" on the pool; return (future, release event)."""
+        started, release = threading.Event(), threading.Event()
+
+        def leader():
+            started.set()
+            release.wait(5)
+            return fn()
+
+        future = self.pool.submit(self.flight.do, "k", leader)
+        self.assertTrue(started.wait(5))
+        return future, release
+
+    def test_waiter_shares_leader_result(self):
+        calls = []
+        leader, release = self.start_leader(lambda: calls.append(1) or "answer")
+
+        waiter = self.pool.submit(self.flight.do, "k", lambda: "own")
+        time.sleep(0.05)
+        release.set()
+
+        self.assertEqual(leader.result(5), "answer")
+        self.assertEqual(waiter.result(5), "answer")
+        self.assertEqual(calls, [1])
+        self.assertEqual(self.flight.stats(), {"in_flight": 0, "leaders": 1, "shared": 1})
+
+    def test_waiter_takes_over_cancelled_leader(self):
+        def cancelled():
+            raise Cancelled()
+
+        leader, release = self.start_leader(cancelled)
+        waiter = self.pool.submit(self.flight.do, "k", lambda: "own")
+        time.sleep(0.05)
+        release.set()
+
+        with self.assertRaises(Cancelled):
+            leader.result(5)
+        self.assertEqual(waiter.result(5), "own")
+
+    def test_waiter_bounded_by_own_timeout(self):
+        leader, release = self.start_leader(lambda: "late")
+
+        started = time.monotonic()
+        with self.assertRaises(WaitTimeout):
+            self.flight.do("k", lambda: "own", timeout=0.1)
+        self.assertLess(time.monotonic() - started, 1)
+
+        release.set()
+        self.assertEqual(leader.result(5), "late")
+
+    def test_waiter_retries_leader_deadline(self):
+        def short():
+            raise ShortDeadline()
+
+        leader, release = self.start_leader(short)
+        waiter = self.pool.submit(
+            self.flight.do, "k", lambda: "own", retry=lambda e: isinstance(e, ShortDeadline)
+        )
+        time.sleep(0.05)
+        release.set()
+
+        with self.assertRaises(ShortDeadline):
+            leader.result(5)
+        self.assertEqual(waiter.result(5), "own")
+
+    def test_shared_error_is_raised_without_retry(self):
+        def short():
+            raise ShortDeadline()
+
+        leader, release = self.start_leader(short)
+        waiter = self.pool.submit(self.flight.do, "k", lambda: "own")
+        time.sleep(0.05)
+        release.set()
+
+        with self.assertRaises(ShortDeadline):
+            waiter.result(5)
+
+    def test_async_callers_share_one_call(self):
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def main():
+            return await asyncio.gather(*(self.flight.ado("k", fn) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(main()), ["answer"] * 3)
+        self.assertEqual(calls, [1])
+
+    def test_async_waiter_bounded_by_own_timeout(self):
+        async def fn():
+            await asyncio.sleep(0.5)
+            return "late"
+
+        async def main():
+            leader = asyncio.ensure_future(self.flight.ado("k", fn))
+            await asyncio.sleep(0)
+            with self.assertRaises(WaitTimeout):
+                await self.flight.ado("k", fn, timeout=0.05)
+            return await leader
+
+        self.assertEqual(asyncio.run(main()), "late")
@@ -0,0 +1,43 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from api.services.llm_resilience import LLMUnavailable
+from api.services.sse import sse_response
+
+
+def failing(exc):
+    yield "token", {"text": "Mango"}
+    raise exc
+
+
+async def afailing(exc):
+    yield "token", {"text": "Mango"}
+    raise exc
+
+
+async def collect(body):
+    return [chunk async for chunk in body]
+
+
+class SSEErrorTests(SimpleTestCase):
+
+    def test_error_event_does_not_leak_exception_text(self):
+        response = sse_response(failing(RuntimeError("postgres://user:secret@db/itc")))
+
+        with self.assertLogs("api.services.sse", "ERROR"):
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertIn('"text": "Mango"', body)
+        self.assertIn('event: error\ndata: {"detail": "Internal server error"}', body)
+        self.assertNotIn("secret", body)
+
+    def test_llm_unavailable_has_its_own_message(self):
+        response = sse_response(afailing(LLMUnavailable("circuit llm is open")))
+
+        with self.assertLogs("api.services.sse", "ERROR"):
+            chunks = asyncio.run(collect(response.streaming_content))
+        body = b"".join(chunks).decode()
+
+        self.assertIn("LLM service unavailable, retry later", body)
+        self.assertNotIn("circuit", body)
@@ -1,11 +1,12 @@
 from django.urls import path
 from api.views.rag_views import AskView
-from api.views.system_views import SystemStatusView, HealthCheckView
+from api.views.system_views import SystemStatusView, HealthCheckView, MetricsView
 
 urlpatterns = [
     path("v1/ask", AskView.as_view()),
     path("v1/system/status", SystemStatusView.as_view()),
     path("v1/system/health-check", HealthCheckView.as_view()),
+    path("v1/system/metrics", MetricsView.as_view()),
 ]
 
 
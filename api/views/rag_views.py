@@ -1,8 +1,8 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from api.serializers import AskRequestSerializer
-from api.services.vector_service import VectorService
-from api.services.llm_service import LLMService
+from api.services.rag_service import RAGService
+from api.services.sse import sse_response
 
 
 class AskView(APIView):
@@ -13,16 +13,9 @@ class AskView(APIView):
         query = serializer.validated_data["query"]
         top_k = serializer.validated_data["top_k"]
 
-        vector_svc = VectorService()
-        llm_svc = LLMService()
+        service = RAGService()
 
-        sources = vector_svc.find_context(query, top_k)
-        if not sources:
-            return Response({
-                "answer": "No relevant information found in the knowledge base.",
-                "sources": []
-            })
-        context_str = "\n".join([s["content"] for s in sources])
-        answer = llm_svc.get_reasoning(query, context_str)
+        if serializer.validated_data["stream"]:
+            return sse_response(service.stream_answer(query, top_k))
 
-        return Response({"answer": answer, "sources": sources})
+        return Response(service.answer(query, top_k))
@@ -1,9 +1,15 @@
 # api/views/system_views.py
 
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 
+from api.services.metrics import render_prometheus
+
 
 class SystemStatusView(APIView):
     permission_classes = [AllowAny]
@@ -17,3 +23,34 @@ class HealthCheckView(APIView):
 
     def get(self, request):
         return Response({"status": "ok", "message": "Nirnaya backend running"})
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape endpoint: this worker process, or every worker with
+    METRICS_MULTIPROCESS_DIR. Requires METRICS_AUTH_TOKEN as a bearer token;
+    without one it is closed unless METRICS_ALLOW_ANONYMOUS is set.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        token = settings.METRICS_AUTH_TOKEN
+        if token:
+            supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            if not supplied:
+                return Response(
+                    {"error": "Metrics token required"},
+                    status=401,
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            # Bytes: compare_digest rejects non-ASCII str with a TypeError.
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                return Response({"error": "Invalid metrics token"}, status=403)
+        elif not settings.METRICS_ALLOW_ANONYMOUS:
+            return Response({"error": "Set METRICS_AUTH_TOKEN to enable metrics"}, status=403)
+
+        return HttpResponse(
+            render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
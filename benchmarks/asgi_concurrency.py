@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Concurrency vs memory: gunicorn WSGI (sync views) against uvicorn ASGI
+(async views, ASYNC_VIEWS_ENABLED=True) on the same LLM-bound endpoint.
+
+The LLM gateway stub (stubs.llm_gateway) and the JWKS stub run in this
+process. Each server is started with the same number of worker processes,
+then held at increasing numbers of concurrent requests while the RSS of its
+process tree is sampled:
+
+    python -m benchmarks.asgi_concurrency --levels 10,50,200 --llm-delay 2
+    python -m benchmarks.asgi_concurrency --modes asgi --json results.json
+
+The API process uses the normal settings (.env, DATABASE_URL); only the LLM
+endpoint, Clerk issuer/JWKS URL and ASYNC_VIEWS_ENABLED are overridden. The
+default request is POST /api/v1/hs/analyze/ for --hs-code, which needs that
+code in itc_hs_master.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from stubs.jwks_server import serve as serve_jwks
+from stubs.llm_gateway import serve as serve_llm
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def tree_rss_bytes(pid):
+    """RSS of a process and all of its descendants, from /proc."""
+    total = 0
+    stack = [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    stack.extend(int(c) for c in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+class RSSSampler:
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss_bytes(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def server_command(mode, port, workers, threads):
+    if mode == "wsgi":
+        return [
+            sys.executable, "-m", "gunicorn", "core.wsgi:application",
+            "--workers", str(workers), "--threads", str(threads),
+            "--bind", f"127.0.0.1:{port}", "--timeout", "300",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "core.asgi:application",
+        "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+        "--no-access-log",
+    ]
+
+
+def wait_ready(url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server not ready after {timeout}s")
+
+
+async def run_level(url, body, token, concurrency, requests_per_level):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=600) as client:
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        url, json=body, headers={"Authorization": f"Bearer {token}"}
+                    )
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests_per_level)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests_per_level,
+        "errors": errors,
+        "throughput_rps": requests_per_level / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def benchmark_mode(mode, args, env, token):
+    port = args.port
+    cmd = server_command(mode, port, args.workers, args.threads)
+    env = dict(env, ASYNC_VIEWS_ENABLED="True" if mode == "asgi" else "False")
+
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, start_new_session=True)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        wait_ready(f"{base}/api/v1/system/health-check", proc)
+
+        # Load models, registries and pools in every worker before measuring.
+        if args.warmup:
+            asyncio.run(run_level(base + args.path, args.body, token, args.workers, args.warmup))
+        idle_rss = tree_rss_bytes(proc.pid)
+
+        rows = []
+        for level in args.levels:
+            with RSSSampler(proc.pid) as sampler:
+                row = asyncio.run(
+                    run_level(base + args.path, args.body, token, level, level * args.rounds)
+                )
+            row.update(mode=mode, idle_rss_mb=idle_rss / 2**20, peak_rss_mb=sampler.peak / 2**20)
+            rows.append(row)
+            print(
+                f"{mode:5} c={level:<5} rps={row['throughput_rps']:8.1f} "
+                f"p50={row['p50_ms']:8.0f}ms p95={row['p95_ms']:8.0f}ms "
+                f"errors={row['errors']:<4} rss={row['peak_rss_mb']:7.1f}MB",
+                flush=True,
+            )
+        return rows
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--modes", default="wsgi,asgi")
+    parser.add_argument("--levels", default="10,50,100,200")
+    parser.add_argument("--rounds", type=int, default=2, help="requests per level = level * rounds")
+    parser.add_argument("--warmup", type=int, default=8, help="unmeasured requests per server")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--llm-delay", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--llm-port", type=int, default=8791)
+    parser.add_argument("--jwks-port", type=int, default=8792)
+    parser.add_argument("--path", default="/api/v1/hs/analyze/")
+    parser.add_argument("--hs-code", default="01011010")
+    parser.add_argument("--body", help="JSON request body (overrides --hs-code)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    args.levels = [int(x) for x in args.levels.split(",")]
+    args.body = (
+        json.loads(args.body) if args.body
+        else {"hs_code": args.hs_code, "schedule_type": "import"}
+    )
+
+    llm = serve_llm(port=args.llm_port, latency=args.llm_delay)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+    jwks = serve_jwks(port=args.jwks_port)
+    threading.Thread(target=jwks.serve_forever, daemon=True).start()
+
+    issuer = f"http://127.0.0.1:{args.jwks_port}"
+    token = jwks.keyring.mint(issuer, sub="bench", ttl=24 * 3600)
+
+    env = dict(
+        os.environ,
+        MODAL_LLM_URL=f"http://127.0.0.1:{args.llm_port}/",
+        CLERK_ISSUER=issuer,
+        JWKS_URL=f"{issuer}/.well-known/jwks.json",
+        HTTP_POOL_MAX_CONNECTIONS=str(max(args.levels)),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+    )
+
+    results = []
+    try:
+        for mode in args.modes.split(","):
+            results.extend(benchmark_mode(mode, args, env, token))
+    finally:
+        llm.shutdown()
+        jwks.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {"llm_delay": args.llm_delay, "workers": args.workers,
+                 "threads": args.threads, "results": results},
+                f, indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for every api and hs endpoint.
+
+Starts the LLM gateway stub, the JWKS stub and an API server (gunicorn WSGI
+or uvicorn ASGI) against the seeded fixture database (see
+benchmarks.fixture), then drives each scenario at each concurrency level
+and reports throughput and p50/p95/p99 latency. Streaming scenarios also
+report time to first byte, and the Server-Timing header is averaged into a
+per-stage breakdown.
+
+    python -m benchmarks.fixture --reset
+    python -m benchmarks.loadtest --levels 1,10,50 --json results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.loadtest --compare results/main.json results/feature.json
+    python -m benchmarks.loadtest --scenarios hs_predict,hs_search --compare results/main.json
+
+--compare BASELINE with a run compares the new results against BASELINE;
+with two files it only compares them. The exit status is 1 when any
+scenario's p95 regressed by more than --threshold percent.
+
+--seed, --chapters, --headings, --subheadings, --lines and --kb-docs must
+match the values the fixture was seeded with, since request inputs (HS
+codes, chapters, descriptions) are derived from them.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.asgi_concurrency import ROOT, server_command, wait_ready
+from benchmarks.fixture import add_size_arguments, generate_hs_rows, generate_kb_docs
+from stubs.jwks_server import serve as serve_jwks
+from stubs.llm_gateway import serve as serve_llm
+
+
+class Scenario:
+
+    def __init__(self, name, method, path, build, stream=False, content_type=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.build = build
+        self.stream = stream
+        self.content_type = content_type
+
+
+def build_scenarios(hs_rows, kb_docs, batch_lines):
+    lines = [r for r in hs_rows if r["hs_level"] == 8]
+    chapters = sorted({r["chapter_num"] for r in hs_rows})
+
+    def hs_ask(rng):
+        row = rng.choice(lines)
+        return {"question": f"What is the {row['schedule_type']} policy for HS code {row['hs_code']}?"}
+
+    def kb_ask(rng):
+        doc = rng.choice(kb_docs)
+        return {"query": f"What does the policy say about {doc['metadata']['hs_code']}?", "top_k": 5}
+
+    def predict(rng):
+        row = rng.choice(lines)
+        return {"description": row["description"], "schedule_type": row["schedule_type"]}
+
+    def analyze(rng):
+        row = rng.choice(lines)
+        return {"hs_code": row["hs_code"], "schedule_type": row["schedule_type"]}
+
+    def search(rng):
+        row = rng.choice(lines)
+        return {"query": row["description"].split(",")[0], "schedule_type": row["schedule_type"]}
+
+    def batch(rng):
+        return "".join(
+            json.dumps({"id": i, "description": row["description"], "schedule_type": row["schedule_type"]}) + "\n"
+            for i, row in enumerate(rng.choice(lines) for _ in range(batch_lines))
+        )
+
+    scenarios = [
+        Scenario("system_status", "GET", lambda rng: "/api/v1/system/status", None),
+        Scenario("api_ask", "POST", lambda rng: "/api/v1/ask", kb_ask),
+        Scenario("api_ask_stream", "POST", lambda rng: "/api/v1/ask",
+                 lambda rng: {**kb_ask(rng), "stream": True}, stream=True),
+        Scenario("hs_ask", "POST", lambda rng: "/api/v1/hs/ask/", hs_ask),
+        Scenario("hs_ask_stream", "POST", lambda rng: "/api/v1/hs/ask/",
+                 lambda rng: {**hs_ask(rng), "stream": True}, stream=True),
+        Scenario("hs_predict", "POST", lambda rng: "/api/v1/hs/predict/", predict),
+        Scenario("hs_predict_batch", "POST", lambda rng: "/api/v1/hs/predict/batch/", batch,
+                 stream=True, content_type="application/x-ndjson"),
+        Scenario("hs_analyze", "POST", lambda rng: "/api/v1/hs/analyze/", analyze),
+        Scenario("hs_search", "POST", lambda rng: "/api/v1/hs/search/", search),
+        Scenario("hs_chapter", "GET",
+                 lambda rng: f"/api/v1/hs/chapter/{rng.choice(chapters)}/?schedule_type=import", None),
+    ]
+    return {s.name: s for s in scenarios}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+def parse_server_timing(header):
+    spans = {}
+    for entry in filter(None, (e.strip() for e in header.split(","))):
+        name, *params = entry.split(";")
+        for param in params:
+            if param.startswith("dur="):
+                spans[name] = float(param[4:])
+    return spans
+
+
+async def run_level(base_url, scenario, token, concurrency, total, seed):
+    rng = random.Random(seed)
+    requests = [(scenario.path(rng), scenario.build(rng) if scenario.build else None) for _ in range(total)]
+
+    latencies, ttfbs = [], []
+    statuses = defaultdict(int)
+    timing_totals = defaultdict(float)
+    timing_counts = defaultdict(int)
+    queue = iter(requests)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=600, headers=headers) as client:
+
+        async def one(path, body):
+            kwargs = {}
+            if isinstance(body, str):
+                kwargs = {"content": body.encode(), "headers": {"Content-Type": scenario.content_type}}
+            elif body is not None:
+                kwargs = {"json": body}
+
+            started = time.perf_counter()
+            try:
+                async with client.stream(scenario.method, path, **kwargs) as response:
+                    first = None
+                    async for _ in response.aiter_bytes():
+                        if first is None:
+                            first = time.perf_counter() - started
+                    statuses[response.status_code] += 1
+                    for name, dur in parse_server_timing(response.headers.get("server-timing", "")).items():
+                        timing_totals[name] += dur
+                        timing_counts[name] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - started)
+            if scenario.stream and first is not None:
+                ttfbs.append(first)
+
+        async def worker():
+            for path, body in queue:
+                await one(path, body)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ttfbs.sort()
+    ok = sum(n for code, n in statuses.items() if isinstance(code, int) and code < 400)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    row = {
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": total - ok,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "throughput_rps": round(ok / elapsed, 2),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "server_timing_ms": {
+            name: round(timing_totals[name] / timing_counts[name], 2) for name in timing_totals
+        },
+    }
+    if scenario.stream:
+        row["ttfb_p50_ms"] = ms(percentile(ttfbs, 0.50))
+        row["ttfb_p95_ms"] = ms(percentile(ttfbs, 0.95))
+    return row
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "-uno"], cwd=ROOT, text=True).strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def print_row(row):
+    line = (
+        f"{row['scenario']:18} c={row['concurrency']:<4} rps={row['throughput_rps']:8.1f} "
+        f"p50={row['p50_ms'] or 0:8.1f} p95={row['p95_ms'] or 0:8.1f} "
+        f"p99={row['p99_ms'] or 0:8.1f}ms errors={row['errors']}"
+    )
+    if "ttfb_p50_ms" in row:
+        line += f" ttfb_p50={row['ttfb_p50_ms'] or 0:.1f}ms"
+    print(line, flush=True)
+
+
+def compare(baseline, candidate, threshold):
+    """Print per-scenario deltas; return True when any p95 regressed past threshold."""
+    base = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressed = False
+
+    print(
+        f"baseline  {baseline['meta'].get('git', {}).get('commit', '?')}\n"
+        f"candidate {candidate['meta'].get('git', {}).get('commit', '?')}"
+    )
+    print(f"{'scenario':18} {'c':>4} {'rps':>20} {'p50 ms':>20} {'p95 ms':>20} {'p99 ms':>20}")
+
+    def delta(old, new):
+        if not old or new is None:
+            return f"{new if new is not None else '-':>10} {'':>9}"
+        return f"{new:>10.1f} {100 * (new - old) / old:+8.1f}%"
+
+    for row in candidate["results"]:
+        old = base.get((row["scenario"], row["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"{row['scenario']:18} {row['concurrency']:>4} "
+            f"{delta(old['throughput_rps'], row['throughput_rps'])} "
+            f"{delta(old['p50_ms'], row['p50_ms'])} {delta(old['p95_ms'], row['p95_ms'])} "
+            f"{delta(old['p99_ms'], row['p99_ms'])}"
+        )
+        if old["p95_ms"] and row["p95_ms"] and row["p95_ms"] > old["p95_ms"] * (1 + threshold / 100):
+            regressed = True
+
+    return regressed
+
+
+def start_server(args, env):
+    cmd = server_command(args.server, args.port, args.workers, args.threads)
+    env = dict(env, ASYNC_VIEWS_ENABLED="True" if args.server == "asgi" else "False")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, start_new_session=True)
+    wait_ready(f"http://127.0.0.1:{args.port}/api/v1/system/health-check", proc)
+    return proc
+
+
+def run(args):
+    hs_rows = generate_hs_rows(args.seed, args.chapters, args.headings, args.subheadings, args.lines)
+    kb_docs = generate_kb_docs(hs_rows, args.seed, args.kb_docs)
+    scenarios = build_scenarios(hs_rows, kb_docs, args.batch_lines)
+    selected = [scenarios[name] for name in args.scenarios.split(",")] if args.scenarios else list(scenarios.values())
+
+    llm = serve_llm(
+        port=args.llm_port, latency=args.llm_latency, token_rate=args.llm_token_rate,
+        tokens=args.llm_tokens, error_rate=args.llm_error_rate, seed=args.seed,
+    )
+    jwks = serve_jwks(port=args.jwks_port)
+    for server in (llm, jwks):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    issuer = f"http://127.0.0.1:{args.jwks_port}"
+    token = args.token or jwks.keyring.mint(issuer, sub="loadtest", ttl=24 * 3600)
+
+    env = dict(
+        os.environ,
+        MODAL_LLM_URL=f"http://127.0.0.1:{args.llm_port}/",
+        MODAL_LLM_STREAM_URL=f"http://127.0.0.1:{args.llm_port}/",
+        CLERK_ISSUER=issuer,
+        JWKS_URL=f"{issuer}/.well-known/jwks.json",
+        HTTP_POOL_MAX_CONNECTIONS=str(max(args.levels) * 2),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+    )
+
+    proc = None if args.base_url else start_server(args, env)
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+
+    results = []
+    try:
+        for scenario in selected:
+            if args.warmup:
+                asyncio.run(run_level(base_url, scenario, token, 1, args.warmup, args.seed))
+            for level in args.levels:
+                row = asyncio.run(
+                    run_level(base_url, scenario, token, level, max(args.requests, level), args.seed)
+                )
+                print_row(row)
+                results.append(row)
+    finally:
+        if proc is not None:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=30)
+        llm.shutdown()
+        jwks.shutdown()
+
+    return {
+        "meta": {
+            "git": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "server": "external" if args.base_url else args.server,
+            "workers": args.workers,
+            "threads": args.threads,
+            "llm": llm.config.as_dict(),
+            "fixture": {
+                "seed": args.seed, "chapters": args.chapters, "headings": args.headings,
+                "subheadings": args.subheadings, "lines": args.lines, "kb_docs": args.kb_docs,
+            },
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", help="comma-separated subset (default: all)")
+    parser.add_argument("--levels", default="1,10,50", help="concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per level (at least the level)")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per scenario")
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--base-url", help="benchmark an already running server instead (needs --token)")
+    parser.add_argument("--token", help="bearer token for --base-url")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--llm-port", type=int, default=8791)
+    parser.add_argument("--jwks-port", type=int, default=8792)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-token-rate", type=float, default=200.0)
+    parser.add_argument("--llm-tokens", type=int, default=64)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--batch-lines", type=int, default=20, help="manifest lines per batch request")
+    parser.add_argument("--kb-docs", type=int, default=500)
+    add_size_arguments(parser)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="BASELINE [CANDIDATE] result files")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 regression in percent")
+    args = parser.parse_args()
+    args.levels = [int(x) for x in args.levels.split(",")]
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one candidate")
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            sys.exit(1 if compare(json.load(f), json.load(g), args.threshold) else 0)
+
+    results = run(args)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            sys.exit(1 if compare(json.load(f), results, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
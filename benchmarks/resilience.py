@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+LLM gateway resilience: request deadline, circuit breaker, hedging and
+degraded responses, against the fault-injecting gateway stub.
+
+One API worker is started (so every request sees the same breaker and
+latency window) with a short REQUEST_DEADLINE_SECONDS, and the same
+endpoint is driven through these phases:
+
+    healthy    normal gateway
+    outage     every gateway call hangs; the first calls are cut off by the
+               deadline, then the breaker opens and requests fail fast
+    recovery   gateway healthy again; after LLM_BREAKER_RESET_SECONDS one
+               trial call closes the breaker
+    tail       a fraction of calls is slow; with --hedging a second request
+               is raced once a call exceeds the recent p95
+
+    python -m benchmarks.resilience --deadline 3 --requests 40
+    python -m benchmarks.resilience --server asgi --hedging --json resilience.json
+
+The API process uses the normal settings (.env, DATABASE_URL); the default
+request is POST /api/v1/hs/analyze/ for --hs-code, which needs that code in
+itc_hs_master (see benchmarks.fixture).
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+
+import httpx
+
+from benchmarks.asgi_concurrency import ROOT, server_command, wait_ready
+from benchmarks.loadtest import percentile
+from stubs.jwks_server import serve as serve_jwks
+from stubs.llm_gateway import serve as serve_llm
+
+HEALTHY = {"error_rate": 0, "slow_rate": 0, "hang_rate": 0, "drop_rate": 0}
+
+
+async def run_phase(url, body, token, concurrency, requests):
+    latencies = []
+    statuses = {}
+    degraded = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=600) as client:
+
+        async def one():
+            nonlocal degraded
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        url, json=body, headers={"Authorization": f"Bearer {token}"}
+                    )
+                    status = response.status_code
+                    if status == 200 and response.json().get("degraded"):
+                        degraded += 1
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "degraded": degraded,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+METRICS_TOKEN = "resilience"
+
+
+def fetch_metrics(base_url):
+    """llm_breaker_* / llm_latency_* lines from the metrics endpoint."""
+    text = httpx.get(
+        f"{base_url}/api/v1/system/metrics",
+        headers={"Authorization": f"Bearer {METRICS_TOKEN}"},
+        timeout=10,
+    ).text
+    return [line for line in text.splitlines() if line.startswith(("llm_breaker", "llm_latency"))]
+
+
+def run(args):
+    llm = serve_llm(port=args.llm_port, latency=args.llm_latency, seed=args.seed)
+    jwks = serve_jwks(port=args.jwks_port)
+    for server in (llm, jwks):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    issuer = f"http://127.0.0.1:{args.jwks_port}"
+    token = jwks.keyring.mint(issuer, sub="resilience", ttl=24 * 3600)
+
+    env = dict(
+        os.environ,
+        MODAL_LLM_URL=f"http://127.0.0.1:{args.llm_port}/",
+        MODAL_LLM_STREAM_URL=f"http://127.0.0.1:{args.llm_port}/",
+        CLERK_ISSUER=issuer,
+        JWKS_URL=f"{issuer}/.well-known/jwks.json",
+        ASYNC_VIEWS_ENABLED="True" if args.server == "asgi" else "False",
+        REQUEST_DEADLINE_SECONDS=str(args.deadline),
+        LLM_BREAKER_ENABLED="True",
+        LLM_BREAKER_FAILURE_THRESHOLD=str(args.failure_threshold),
+        LLM_BREAKER_RESET_SECONDS=str(args.reset_seconds),
+        LLM_HEDGING_ENABLED=str(args.hedging),
+        LLM_HEDGE_MIN_SAMPLES=str(min(20, args.requests)),
+        LLM_HEDGE_MIN_DELAY=str(args.llm_latency),
+        LLM_DEGRADED_RESPONSES="True",
+        # Identical requests would otherwise share one gateway call.
+        LLM_SINGLEFLIGHT_ENABLED="False",
+        ANSWER_CACHE_ENABLED="False",
+        METRICS_AUTH_TOKEN=METRICS_TOKEN,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+    )
+
+    proc = subprocess.Popen(
+        server_command(args.server, args.port, 1, args.threads),
+        cwd=ROOT, env=env, start_new_session=True,
+    )
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    url = base_url + args.path
+    phases = [
+        ("healthy", HEALTHY, 0),
+        ("outage", dict(HEALTHY, hang_rate=1, hang_seconds=args.deadline * 10), 0),
+        ("recovery", HEALTHY, args.reset_seconds),
+        ("tail", dict(HEALTHY, slow_rate=args.slow_rate, slow_latency=args.slow_latency), 0),
+    ]
+
+    results = []
+    try:
+        wait_ready(f"{base_url}/api/v1/system/health-check", proc)
+        for name, config, pause in phases:
+            llm.config.update(config)
+            time.sleep(pause)
+            before = llm.config.stats()["requests"]
+            row = asyncio.run(run_phase(url, args.body, token, args.concurrency, args.requests))
+            row.update(phase=name, gateway_calls=llm.config.stats()["requests"] - before)
+            results.append(row)
+            print(
+                f"{name:9} p50={row['p50_ms']:7.0f}ms p95={row['p95_ms']:7.0f}ms "
+                f"max={row['max_ms']:7.0f}ms degraded={row['degraded']:<4} "
+                f"gateway_calls={row['gateway_calls']:<4} statuses={row['statuses']}",
+                flush=True,
+            )
+        for line in fetch_metrics(base_url):
+            print(line)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+        llm.shutdown()
+        jwks.shutdown()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads")
+    parser.add_argument("--requests", type=int, default=40, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--deadline", type=float, default=3.0, help="REQUEST_DEADLINE_SECONDS")
+    parser.add_argument("--failure-threshold", type=int, default=3)
+    parser.add_argument("--reset-seconds", type=float, default=2.0)
+    parser.add_argument("--hedging", action="store_true")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8793)
+    parser.add_argument("--llm-port", type=int, default=8794)
+    parser.add_argument("--jwks-port", type=int, default=8795)
+    parser.add_argument("--path", default="/api/v1/hs/analyze/")
+    parser.add_argument("--hs-code", default="01011010")
+    parser.add_argument("--body", help="JSON request body (overrides --hs-code)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    args.body = (
+        json.loads(args.body) if args.body
+        else {"hs_code": args.hs_code, "schedule_type": "import"}
+    )
+
+    results = run(args)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
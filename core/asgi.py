@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from hs.services.hs_registry import preload_hs_registry  # noqa: E402
+
+preload_hs_registry()
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "corsheaders",
     "rest_framework",
+    "adrf",
     "api",
     "hs",
 ]
@@ -39,6 +40,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.DeadlineMiddleware",
 ]
 
 
@@ -72,13 +75,54 @@ WSGI_APPLICATION = 'core.wsgi.application'
 #     }
 # }
 
-DATABASES = {
-    "default": dj_database_url.config(
-        default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
-        ssl_require=True,
+# Connection handling (DATABASE_POOL_MODE):
+#   persistent  one long-lived connection per worker thread (conn_max_age)
+#   psycopg     Django's psycopg 3 pool per process; needs psycopg[pool]
+#   pgbouncer   through a transaction-mode pgbouncer / Supabase pooler:
+#               no server-side cursors, connections kept to the pooler
+DATABASE_POOL_MODE = os.getenv("DATABASE_POOL_MODE", "persistent")
+DATABASE_CONN_MAX_AGE = int(os.getenv("DATABASE_CONN_MAX_AGE", "600"))
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "2"))
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "10"))
+
+
+def database_config(url):
+    if not url:
+        return {}
+
+    config = dj_database_url.parse(
+        url,
+        conn_max_age=0 if DATABASE_POOL_MODE == "psycopg" else DATABASE_CONN_MAX_AGE,
+        # Ping reused connections so a failed-over or restarted server is noticed
+        conn_health_checks=True,
+        disable_server_side_cursors=DATABASE_POOL_MODE == "pgbouncer",
+        # Set DATABASE_SSL_REQUIRE=False for a local Postgres (e.g. the benchmark fixture)
+        ssl_require=os.getenv("DATABASE_SSL_REQUIRE", "True") == "True",
     )
-}
+    if DATABASE_POOL_MODE == "psycopg":
+        config.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DATABASE_POOL_MIN_SIZE,
+            "max_size": DATABASE_POOL_MAX_SIZE,
+            "timeout": DATABASE_POOL_TIMEOUT,
+        }
+    return config
+
+
+DATABASES = {"default": database_config(os.getenv("DATABASE_URL"))}
+
+# Read replicas for the retrieval queries (comma-separated URLs), added as
+# replica_0, replica_1, ...; see api.db_routing. Writes and migrations stay on default.
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+for _i, _url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f"replica_{_i}"] = database_config(_url)
+
+DATABASE_ROUTERS = ["api.db_routing.ReplicaRouter"]
+# A replica that errors is skipped for this long before it is tried again
+DATABASE_REPLICA_RETRY_SECONDS = float(os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30"))
+# Replication lag check: at most every CHECK_INTERVAL seconds per replica
+DATABASE_REPLICA_CHECK_INTERVAL = float(os.getenv("DATABASE_REPLICA_CHECK_INTERVAL", "10"))
+DATABASE_REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", "30"))
 
 
 # Password validation
@@ -132,3 +176,153 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Clerk settings
 CLERK_ISSUER = os.environ.get("CLERK_ISSUER")
 CLERK_AUDIENCE = os.environ.get("CLERK_AUDIENCE")
+
+# Outbound HTTP (LLM gateway, JWKS)
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True") == "True"
+
+# LLM gateway
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "90"))
+
+# Change detection for ingested tables (seconds a table version is reused)
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "30"))
+
+# Max age of the in-process trigram index used for HS search without pg_trgm
+HS_NGRAM_INDEX_TTL = float(os.getenv("HS_NGRAM_INDEX_TTL", "300"))
+
+# RAG answer cache
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True") == "True"
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SEMANTIC_DISTANCE = float(os.getenv("ANSWER_CACHE_SEMANTIC_DISTANCE", "0.05"))
+
+# Embeddings
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+# "sentence-transformers" (torch) or "onnx-int8" (onnxruntime, no torch needed)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_ONNX_DIR = os.getenv(
+    "EMBEDDING_ONNX_DIR", str(BASE_DIR / "models" / f"{EMBEDDING_MODEL_NAME}-onnx")
+)
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True") == "True"
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64"))
+# Optional SQLite file that keeps embeddings across worker restarts
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+# Micro-batching of concurrent embed calls into one encode()
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "True") == "True"
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "2"))
+
+# Clerk JWKS / verified token caching
+JWKS_URL = os.environ.get("JWKS_URL")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "3600"))
+JWKS_MIN_REFETCH_INTERVAL = float(os.getenv("JWKS_MIN_REFETCH_INTERVAL", "30"))
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "10000"))
+
+# In-memory exact vector index over itc_hs_master embeddings
+HS_VECTOR_INDEX_ENABLED = os.getenv("HS_VECTOR_INDEX_ENABLED", "False") == "True"
+HS_VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv("HS_VECTOR_INDEX_REFRESH_SECONDS", "60"))
+
+# Hybrid HS search (weighted reciprocal-rank fusion)
+HS_HYBRID_RRF_K = float(os.getenv("HS_HYBRID_RRF_K", "60"))
+HS_HYBRID_LEXICAL_WEIGHT = float(os.getenv("HS_HYBRID_LEXICAL_WEIGHT", "1.0"))
+HS_HYBRID_VECTOR_WEIGHT = float(os.getenv("HS_HYBRID_VECTOR_WEIGHT", "1.0"))
+
+# Bulk HS classification (/hs/predict/batch/)
+HS_BATCH_MAX_LINES = int(os.getenv("HS_BATCH_MAX_LINES", "1000"))
+HS_BATCH_CHUNK_SIZE = int(os.getenv("HS_BATCH_CHUNK_SIZE", "64"))
+HS_BATCH_CANDIDATES = int(os.getenv("HS_BATCH_CANDIDATES", "10"))
+HS_BATCH_LLM_CONCURRENCY = int(os.getenv("HS_BATCH_LLM_CONCURRENCY", "8"))
+
+# Stored chapter overviews (see `manage.py generate_chapter_overviews`)
+HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS = (
+    os.getenv("HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS", "True") == "True"
+)
+
+# In-memory HS hierarchy registry (lookups, validation, prefix navigation)
+HS_REGISTRY_ENABLED = os.getenv("HS_REGISTRY_ENABLED", "True") == "True"
+HS_REGISTRY_PRELOAD = os.getenv("HS_REGISTRY_PRELOAD", "True") == "True"
+HS_REGISTRY_REFRESH_SECONDS = float(os.getenv("HS_REGISTRY_REFRESH_SECONDS", "60"))
+
+# Concurrent retrieval stages (structured lookup, KB vector search)
+RETRIEVAL_CONCURRENCY_ENABLED = os.getenv("RETRIEVAL_CONCURRENCY_ENABLED", "True") == "True"
+RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", "16"))
+RETRIEVAL_STAGE_TIMEOUT = float(os.getenv("RETRIEVAL_STAGE_TIMEOUT", "5"))
+
+# Route the HS ask/predict/analyze/search/chapter endpoints to their async
+# views. Only enable when serving core.asgi:application (e.g. uvicorn).
+ASYNC_VIEWS_ENABLED = os.getenv("ASYNC_VIEWS_ENABLED", "False") == "True"
+
+# Request metrics: stage spans, DB query/row counts, LLM sizes.
+# Exposed at /api/v1/system/metrics (Prometheus text format).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "True") == "True"
+# /metrics requires "Authorization: Bearer <token>"; with no token it is
+# closed unless METRICS_ALLOW_ANONYMOUS=True (local development only)
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", "")
+METRICS_ALLOW_ANONYMOUS = os.getenv("METRICS_ALLOW_ANONYMOUS", "False") == "True"
+# Shared directory where every worker saves its metrics, so one scrape
+# reports all workers (empty: each scrape reports only the worker it hits).
+# Clear it when the server starts.
+METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", "")
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+
+# Token-budgeted LLM context (dedup + relevance-ordered fill)
+CONTEXT_PACKING_ENABLED = os.getenv("CONTEXT_PACKING_ENABLED", "True") == "True"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_CHARS_PER_TOKEN = int(os.getenv("CONTEXT_CHARS_PER_TOKEN", "4"))
+CONTEXT_MIN_CHUNK_TOKENS = int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", "48"))
+# Share of a chunk's word 5-grams already in the context that marks it a duplicate
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+# Coalesce concurrent identical LLM requests (same prompt/context/params) into one call
+LLM_SINGLEFLIGHT_ENABLED = os.getenv("LLM_SINGLEFLIGHT_ENABLED", "True") == "True"
+
+# Per-request deadline (seconds, 0 = none) that LLM calls and retrieval
+# stages clamp their timeouts to; clients may shorten it with X-Request-Deadline
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+
+# LLM gateway circuit breaker: fail fast after consecutive errors/timeouts
+LLM_BREAKER_ENABLED = os.getenv("LLM_BREAKER_ENABLED", "True") == "True"
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Hedged LLM requests: race a second call once the first exceeds the recent p95
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "False") == "True"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Return retrieval-only results (no AI text, "degraded": true) when the LLM is unavailable
+LLM_DEGRADED_RESPONSES = os.getenv("LLM_DEGRADED_RESPONSES", "True") == "True"
+
+# Background jobs for analyze/predict/chapter (POST /api/v1/hs/jobs/)
+HS_JOB_MAX_WORKERS = int(os.getenv("HS_JOB_MAX_WORKERS", "8"))
+HS_JOB_MAX_PENDING = int(os.getenv("HS_JOB_MAX_PENDING", "256"))
+HS_JOB_RESULT_TTL = float(os.getenv("HS_JOB_RESULT_TTL", "3600"))
+# Jobs running this long, or queued in a process that has not started a job
+# for this long, are failed (their process went away)
+HS_JOB_STALE_SECONDS = float(os.getenv("HS_JOB_STALE_SECONDS", "900"))
+# Long-poll cap for GET /jobs/<id>/?wait=, below the load balancer idle timeout
+HS_JOB_MAX_WAIT = float(os.getenv("HS_JOB_MAX_WAIT", "25"))
+HS_JOB_POLL_INTERVAL = float(os.getenv("HS_JOB_POLL_INTERVAL", "0.5"))
+HS_JOB_PURGE_INTERVAL = float(os.getenv("HS_JOB_PURGE_INTERVAL", "60"))
+
+# HTTP caching for read-only HS endpoints (analyze, search, chapter): weak
+# ETags from the data version + params, 304 on If-None-Match, Cache-Control.
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "True") == "True"
+# Use "public, ..." only when a CDN in front enforces authentication
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "private, max-age=300")
+# Bump to invalidate every ETag after a change to the response format or prompts
+HTTP_CACHE_VERSION = os.getenv("HTTP_CACHE_VERSION", "1")
+
+# Server-side cache of full responses, keyed like the ETag
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "False") == "True"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+# Rows fetched per server-side cursor round trip for GET /api/v1/hs/export/
+HS_EXPORT_CHUNK_SIZE = int(os.getenv("HS_EXPORT_CHUNK_SIZE", "2000"))
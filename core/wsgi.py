@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from hs.services.hs_registry import preload_hs_registry  # noqa: E402
+
+preload_hs_registry()
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.services.vector_service import VectorService
+from hs.models import ItcHsMaster
+from hs.services.hs_vector_index import HSVectorIndex
+
+
+class Command(BaseCommand):
+    help = "Compare HSVectorIndex top-k results with the pgvector SQL ordering."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--tolerance", type=float, default=1e-4)
+
+    def sql_top_k(self, embedding, schedule_type, limit):
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, embedding <=> %s::vector AS distance
+                FROM itc_hs_master
+                WHERE schedule_type = %s
+                ORDER BY embedding <=> %s::vector
+                LIMIT %s
+                """,
+                (embedding, schedule_type, embedding, limit),
+            )
+            return cur.fetchall()
+
+    def handle(self, *args, **options):
+        index = HSVectorIndex.get_instance()
+        index.ensure_fresh()
+        vector = VectorService()
+
+        samples = (
+            ItcHsMaster.objects.exclude(description__isnull=True)
+            .order_by("?")
+            .values_list("description", "schedule_type")[: options["samples"]]
+        )
+
+        mismatches = 0
+        for description, schedule_type in samples:
+            embedding = vector.embed(description)
+
+            expected = self.sql_top_k(embedding, schedule_type, options["limit"])
+            actual = index.search(embedding, schedule_type, options["limit"])
+
+            # Ties may legitimately come back in a different order, so compare
+            # the distance at each rank rather than the ids.
+            for rank, (row, hit) in enumerate(zip(expected, actual)):
+                if abs(float(row[1]) - hit["distance"]) > options["tolerance"]:
+                    mismatches += 1
+                    self.stdout.write(
+                        f"rank {rank} for {description[:40]!r}: "
+                        f"sql {row[1]:.6f} vs index {hit['distance']:.6f}"
+                    )
+                    break
+
+            if len(expected) != len(actual):
+                mismatches += 1
+
+        self.stdout.write(f"index version {index.version}: {mismatches} mismatching queries")
+        if mismatches:
+            raise CommandError("HSVectorIndex results differ from the SQL path")
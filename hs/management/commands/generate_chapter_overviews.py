@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hs.models import HsChapterOverview, ItcHsMaster
+from hs.services.chapter_service import HSChapterService
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-generate stored HS chapter overviews. Chapters whose source "
+        "records are unchanged since the last run are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--schedule-type", choices=["import", "export"], action="append",
+            help="Limit to one schedule type (repeatable). Default: both.",
+        )
+        parser.add_argument(
+            "--chapter", type=int, action="append",
+            help="Limit to one chapter number (repeatable). Default: all.",
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Regenerate even when the stored source hash matches.",
+        )
+
+    def handle(self, *args, **options):
+        service = HSChapterService()
+
+        chapters = ItcHsMaster.objects.filter(chapter_num__isnull=False)
+        if options["schedule_type"]:
+            chapters = chapters.filter(schedule_type__in=options["schedule_type"])
+        if options["chapter"]:
+            chapters = chapters.filter(chapter_num__in=options["chapter"])
+
+        keys = (
+            chapters.values_list("chapter_num", "schedule_type")
+            .distinct()
+            .order_by("schedule_type", "chapter_num")
+        )
+
+        stored = {
+            (o.chapter_num, o.schedule_type): o.source_hash
+            for o in HsChapterOverview.objects.only("chapter_num", "schedule_type", "source_hash")
+        }
+
+        # Records are read here so worker threads only talk to the LLM.
+        todo = []
+        skipped = 0
+        for chapter_num, schedule_type in keys:
+            records = list(service.get_chapter_codes(chapter_num, schedule_type))
+            if not records:
+                continue
+
+            source_hash = service.source_hash(chapter_num, records)
+            if not options["force"] and stored.get((chapter_num, schedule_type)) == source_hash:
+                skipped += 1
+                continue
+
+            todo.append((chapter_num, schedule_type, source_hash, records))
+
+        self.stdout.write(f"{len(todo)} overviews to generate, {skipped} up to date")
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {
+                pool.submit(service.generate_overview, chapter_num, records): (
+                    chapter_num, schedule_type, source_hash,
+                )
+                for chapter_num, schedule_type, source_hash, records in todo
+            }
+
+            for future in as_completed(futures):
+                chapter_num, schedule_type, source_hash = futures[future]
+                try:
+                    overview = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"chapter {chapter_num} ({schedule_type}): {e}")
+                    continue
+
+                if overview is None:
+                    failed += 1
+                    self.stderr.write(f"chapter {chapter_num} ({schedule_type}): LLM unavailable")
+                    continue
+
+                service.store_overview(chapter_num, schedule_type, source_hash, overview)
+                self.stdout.write(f"chapter {chapter_num} ({schedule_type}): stored")
+
+        self.stdout.write(f"generated {len(todo) - failed}, failed {failed}, skipped {skipped}")
+        if failed:
+            raise CommandError(f"{failed} chapter overviews failed to generate")
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from api.search_indexes import migration_operation
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("hs", "0001_initial"),
+    ]
+
+    operations = [
+        # Skipped while the ingested table does not exist yet; see
+        # api.search_indexes and `manage.py create_search_indexes`.
+        migration_operation("itc_hs_master_search_vector"),
+    ]
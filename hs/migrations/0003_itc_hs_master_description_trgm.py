@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from api.search_indexes import migration_operation
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("hs", "0002_itc_hs_master_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # Skipped while itc_hs_master does not exist yet; see
+        # api.search_indexes and `manage.py create_search_indexes`.
+        migration_operation("itc_hs_master_description_trgm"),
+    ]
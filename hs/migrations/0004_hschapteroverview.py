@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hs", "0003_itc_hs_master_description_trgm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HsChapterOverview",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("chapter_num", models.IntegerField()),
+                ("schedule_type", models.CharField(max_length=10)),
+                ("source_hash", models.CharField(max_length=64)),
+                ("overview", models.TextField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "hs_chapter_overview",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("chapter_num", "schedule_type"),
+                        name="hs_chapter_overview_chapter_schedule_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+import uuid
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hs", "0004_hschapteroverview"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HsJob",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("kind", models.CharField(max_length=20)),
+                ("params", models.JSONField(default=dict)),
+                ("dedup_key", models.CharField(db_index=True, max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "pending"), ("running", "running"), ("done", "done"), ("failed", "failed")],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("result", models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                "db_table": "hs_job",
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(status__in=["pending", "running"]),
+                        fields=("dedup_key",),
+                        name="hs_job_active_dedup_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -16,3 +19,54 @@ class ItcHsMaster(models.Model):
     class Meta:
         db_table = "itc_hs_master"
         managed = False
+
+
+class HsChapterOverview(models.Model):
+    chapter_num = models.IntegerField()
+    schedule_type = models.CharField(max_length=10)
+    source_hash = models.CharField(max_length=64)
+    overview = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "hs_chapter_overview"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["chapter_num", "schedule_type"],
+                name="hs_chapter_overview_chapter_schedule_uniq",
+            )
+        ]
+
+
+class HsJob(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [(s, s) for s in (PENDING, RUNNING, DONE, FAILED)]
+    ACTIVE = (PENDING, RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20)
+    params = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched for queued jobs while their process keeps starting jobs.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        db_table = "hs_job"
+        constraints = [
+            # At most one queued/running job per request; duplicates join it.
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="hs_job_active_dedup_uniq",
+            )
+        ]
@@ -19,3 +19,32 @@ class HSSearchSerializer(serializers.Serializer):
 
 class HSAskSerializer(serializers.Serializer):
     question = serializers.CharField()
+    stream = serializers.BooleanField(default=False)
+
+
+class HSChapterSerializer(serializers.Serializer):
+    schedule_type = serializers.ChoiceField(choices=["import", "export"], default="import")
+
+
+class HSChapterJobSerializer(HSChapterSerializer):
+    chapter_num = serializers.IntegerField(min_value=1)
+
+
+class HSJobSubmitSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=["analyze", "predict", "chapter"])
+    params = serializers.DictField()
+
+
+class HSExportSerializer(serializers.Serializer):
+    schedule_type = serializers.ChoiceField(choices=["import", "export"])
+    # Not "format", which DRF reserves for renderer selection.
+    output = serializers.ChoiceField(choices=["csv", "ndjson", "parquet"], default="csv")
+    chapter_from = serializers.IntegerField(min_value=1, required=False)
+    chapter_to = serializers.IntegerField(min_value=1, required=False)
+    hs_level = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        start, end = data.get("chapter_from"), data.get("chapter_to")
+        if start is not None and end is not None and start > end:
+            raise serializers.ValidationError("chapter_from must not exceed chapter_to")
+        return data
@@ -0,0 +1,65 @@
+from asgiref.sync import sync_to_async
+from api.services.llm_service import LLMService
+from hs.services.hs_service import HSService
+from hs.services.rag_service import HSRAGService
+from hs.services.prompt_service import build_analysis_prompt
+
+
+class HSAnalyzeService:
+
+    def __init__(self):
+        self.rag = HSRAGService()
+        self.llm = LLMService()
+
+    def prepare(self, hs_code: str, schedule_type: str):
+        """Return (hs_record, context, sources), or (None, None, None) for unknown codes."""
+
+        hs_record = HSService.get_by_code(hs_code, schedule_type)
+
+        if not hs_record:
+            return None, None, None
+
+        context, sources = self.rag.build_context_for_hs(hs_record)
+
+        return hs_record, context, sources
+
+    def build_result(self, hs_record, explanation, sources):
+
+        result = {
+            "hs_code": hs_record.hs_code,
+            "description": hs_record.description,
+            "policy": hs_record.policy,
+            "policy_conditions": hs_record.policy_conditions,
+            "ai_explanation": explanation,
+            "sources": sources,
+        }
+
+        # LLM unavailable: record and sources only
+        if explanation is None:
+            result["degraded"] = True
+
+        return result
+
+    def analyze(self, hs_code: str, schedule_type: str):
+
+        hs_record, context, sources = self.prepare(hs_code, schedule_type)
+
+        if not hs_record:
+            return None
+
+        explanation = self.llm.try_reasoning(query=build_analysis_prompt(), context=context)
+
+        return self.build_result(hs_record, explanation, sources)
+
+    async def aanalyze(self, hs_code: str, schedule_type: str):
+
+        hs_record, context, sources = await sync_to_async(self.prepare)(hs_code, schedule_type)
+
+        if not hs_record:
+            return None
+
+        explanation = await self.llm.atry_reasoning(
+            query=build_analysis_prompt(), context=context
+        )
+
+        return self.build_result(hs_record, explanation, sources)
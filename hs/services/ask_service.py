@@ -1,71 +1,282 @@
 import re
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from hs.models import ItcHsMaster
+from hs.services.hs_registry import HSRegistry
 from api.services.vector_service import VectorService
 from api.services.llm_service import LLMService
+from api.services.llm_resilience import LLMUnavailable
+from api.services.answer_cache import AnswerCache
+from api.services.context_packer import ContextPacker
+from api.services.data_version import DataVersionService
+from api.services.retrieval_orchestrator import RetrievalOrchestrator, RetrievalStage
 from hs.services.prompt_service import build_qa_prompt
+from api.services.metrics import timed
 
 
 class HSAskService:
 
     HS_CODE_REGEX = r"\b\d{4,10}\b"
+    UNVERIFIED_ANSWER = "Unable to verify HS code consistency in generated response."
+    CACHE_SCOPE = "hs.ask"
+    CONTEXT_LIMIT = 5
+    STRUCTURED_SECTION = "STRUCTURED HS DATA"
+    DEGRADED_VERDICT = {"verified": False, "answer": None, "degraded": True}
 
     def __init__(self):
         self.vector = VectorService()
         self.llm = LLMService()
+        self.cache = AnswerCache.get_instance() if settings.ANSWER_CACHE_ENABLED else None
+        self.orchestrator = RetrievalOrchestrator()
+        self.packer = ContextPacker()
 
     def extract_codes(self, text):
         return re.findall(self.HS_CODE_REGEX, text)
 
     def get_structured_context(self, codes, schedule_type):
 
-        records = ItcHsMaster.objects.filter(
-            hs_code__in=codes, schedule_type=schedule_type
-        )
-
-        context = ""
+        if settings.HS_REGISTRY_ENABLED:
+            records = HSRegistry.get_instance().get_many(codes, schedule_type)
+        else:
+            records = ItcHsMaster.objects.filter(
+                hs_code__in=codes, schedule_type=schedule_type
+            )
 
-        for r in records:
-            context += f"""
-HS Code: {r.hs_code}
+        chunks = [
+            f"""HS Code: {r.hs_code}
 Description: {r.description}
 Policy: {r.policy}
 Policy Conditions: {r.policy_conditions}
-Chapter: {r.chapter_num}
-"""
+Chapter: {r.chapter_num}"""
+            for r in records
+        ]
 
-        return context, list(records.values_list("hs_code", flat=True))
+        return chunks, [r.hs_code for r in records]
 
-    def ask(self, question, schedule_type="import"):
+    def lookup_cached(self, question, schedule_type):
+        """Return (cached_result, version, embedding) for the current data version."""
+        if self.cache is None:
+            return None, None, None
 
-        codes = self.extract_codes(question)
+        version = DataVersionService.get_combined_version(
+            "knowledge_base", "itc_hs_master"
+        )
+        cached, embedding = self.cache.lookup(
+            self.CACHE_SCOPE,
+            question,
+            top_k=self.CONTEXT_LIMIT,
+            schedule_type=schedule_type,
+            version=version,
+            embed=self.vector.embed,
+        )
+        return cached, version, embedding
 
-        structured_context, valid_codes = self.get_structured_context(
-            codes, schedule_type
+    def store_cached(self, question, schedule_type, version, embedding, answer, sources):
+        if self.cache is None:
+            return
+
+        self.cache.store(
+            self.CACHE_SCOPE,
+            question,
+            {"answer": answer, "sources": sources},
+            top_k=self.CONTEXT_LIMIT,
+            schedule_type=schedule_type,
+            version=version,
+            embedding=embedding,
         )
 
-        vector_docs = self.vector.find_context(query=question, limit=5)
+    @timed("retrieve")
+    def retrieve(self, question, schedule_type="import", embedding=None):
 
-        vector_context = "\n\n".join([d["content"] for d in vector_docs])
+        codes = self.extract_codes(question)
 
-        full_context = f"""
-STRUCTURED HS DATA:
-{structured_context}
+        # Structured lookup and embedding + KB search are independent.
+        stages = self.orchestrator.run(
+            RetrievalStage(
+                "structured",
+                lambda: self.get_structured_context(codes, schedule_type),
+                fallback=([], []),
+            ),
+            RetrievalStage(
+                "vector",
+                lambda: self.vector.find_context(
+                    query=question, limit=self.CONTEXT_LIMIT, embedding=embedding
+                ),
+                fallback=[],
+            ),
+        )
 
-REGULATORY CONTEXT:
-{vector_context}
-"""
+        structured_chunks, record_codes = stages["structured"]
+        vector_docs = stages["vector"]
 
-        answer = self.llm.get_reasoning(
-            query=build_qa_prompt(question),
-            context=full_context,
+        packed = self.packer.pack_sections(
+            [
+                (self.STRUCTURED_SECTION, structured_chunks),
+                ("REGULATORY CONTEXT", [d["content"] for d in vector_docs]),
+            ],
+            records=(self.STRUCTURED_SECTION,),
         )
+        vector_docs = [vector_docs[i] for i in packed.kept_indices("REGULATORY CONTEXT")]
+        # Only codes whose record reached the prompt can back the answer.
+        valid_codes = {record_codes[i] for i in packed.kept_indices(self.STRUCTURED_SECTION)}
+
+        return packed.text, valid_codes, vector_docs
+
+    def prepare(self, question, schedule_type="import"):
+        """
+        Synchronous half of a request: cache lookup, then retrieval on a miss.
+        Returns (cached, version, embedding, retrieved) with retrieved None
+        when the answer is cached.
+        """
+
+        cached, version, embedding = self.lookup_cached(question, schedule_type)
+        if cached is not None:
+            return cached, version, embedding, None
+
+        if version is None:
+            retrieved = self.retrieve(question, schedule_type, embedding)
+        else:
+            # Cached under version, so no replica may be older than it.
+            with DataVersionService.consistent_reads("knowledge_base", "itc_hs_master"):
+                retrieved = self.retrieve(question, schedule_type, embedding)
+        return None, version, embedding, retrieved
+
+    def finish(self, question, schedule_type, version, embedding, answer, valid_codes, vector_docs):
+
+        # LLM unavailable: sources only, nothing cached
+        if answer is None:
+            return None, vector_docs
 
         # 🔒 hallucination guard
         if not self.validate_hs_codes(answer, valid_codes):
-            answer = "Unable to verify HS code consistency in generated response."
+            return self.UNVERIFIED_ANSWER, vector_docs
+
+        self.store_cached(question, schedule_type, version, embedding, answer, vector_docs)
 
         return answer, vector_docs
 
+    def ask(self, question, schedule_type="import"):
+
+        cached, version, embedding, retrieved = self.prepare(question, schedule_type)
+        if cached is not None:
+            return cached["answer"], cached["sources"]
+
+        full_context, valid_codes, vector_docs = retrieved
+
+        answer = self.llm.try_reasoning(
+            query=build_qa_prompt(question),
+            context=full_context,
+        )
+
+        return self.finish(
+            question, schedule_type, version, embedding, answer, valid_codes, vector_docs
+        )
+
+    async def aask(self, question, schedule_type="import"):
+        """ask() with retrieval on a worker thread and a non-blocking LLM call."""
+
+        cached, version, embedding, retrieved = await sync_to_async(self.prepare)(
+            question, schedule_type
+        )
+        if cached is not None:
+            return cached["answer"], cached["sources"]
+
+        full_context, valid_codes, vector_docs = retrieved
+
+        answer = await self.llm.atry_reasoning(
+            query=build_qa_prompt(question),
+            context=full_context,
+        )
+
+        return self.finish(
+            question, schedule_type, version, embedding, answer, valid_codes, vector_docs
+        )
+
+    def verdict(self, question, schedule_type, version, embedding, answer, valid_codes, vector_docs):
+
+        verified = self.validate_hs_codes(answer, valid_codes)
+
+        if verified:
+            self.store_cached(
+                question, schedule_type, version, embedding, answer, vector_docs
+            )
+
+        return {
+            "verified": verified,
+            "answer": answer if verified else self.UNVERIFIED_ANSWER,
+        }
+
+    def stream_ask(self, question, schedule_type="import"):
+        """
+        Yield (event, data) pairs: sources first, then answer tokens, then a
+        verdict from the hallucination guard once the full text is known.
+        If the LLM is unavailable before the first token, the verdict is
+        DEGRADED_VERDICT and the sources are the whole answer.
+        """
+
+        cached, version, embedding, retrieved = self.prepare(question, schedule_type)
+        if cached is not None:
+            yield "sources", cached["sources"]
+            yield "token", {"text": cached["answer"]}
+            yield "verdict", {"verified": True, "answer": cached["answer"], "cached": True}
+            return
+
+        full_context, valid_codes, vector_docs = retrieved
+
+        yield "sources", vector_docs
+
+        tokens = []
+        try:
+            for token in self.llm.stream_reasoning(
+                query=build_qa_prompt(question),
+                context=full_context,
+            ):
+                tokens.append(token)
+                yield "token", {"text": token}
+        except LLMUnavailable as e:
+            if tokens or not self.llm.degrade(e):
+                raise
+            yield "verdict", self.DEGRADED_VERDICT
+            return
+
+        yield "verdict", self.verdict(
+            question, schedule_type, version, embedding, "".join(tokens), valid_codes, vector_docs
+        )
+
+    async def astream_ask(self, question, schedule_type="import"):
+        """Async form of stream_ask."""
+
+        cached, version, embedding, retrieved = await sync_to_async(self.prepare)(
+            question, schedule_type
+        )
+        if cached is not None:
+            yield "sources", cached["sources"]
+            yield "token", {"text": cached["answer"]}
+            yield "verdict", {"verified": True, "answer": cached["answer"], "cached": True}
+            return
+
+        full_context, valid_codes, vector_docs = retrieved
+
+        yield "sources", vector_docs
+
+        tokens = []
+        try:
+            async for token in self.llm.astream_reasoning(
+                query=build_qa_prompt(question),
+                context=full_context,
+            ):
+                tokens.append(token)
+                yield "token", {"text": token}
+        except LLMUnavailable as e:
+            if tokens or not self.llm.degrade(e):
+                raise
+            yield "verdict", self.DEGRADED_VERDICT
+            return
+
+        yield "verdict", self.verdict(
+            question, schedule_type, version, embedding, "".join(tokens), valid_codes, vector_docs
+        )
+
     def validate_hs_codes(self, answer, valid_codes):
 
         found = re.findall(self.HS_CODE_REGEX, answer)
@@ -0,0 +1,226 @@
+import csv
+import json
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+from django.conf import settings
+
+from api.services.metrics import timed
+from hs.services.predict_service import HSPredictService
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_TYPES = ("import", "export")
+
+
+def _item(line, row, default_schedule_type):
+    description = (row.get("description") or "").strip()
+    schedule_type = (row.get("schedule_type") or default_schedule_type or "").strip()
+
+    item = {"line": line, "id": row.get("id"), "description": description}
+    if not description:
+        item["error"] = "description required"
+    elif schedule_type not in SCHEDULE_TYPES:
+        item["error"] = "schedule_type must be import/export"
+    else:
+        item["schedule_type"] = schedule_type
+    return item
+
+
+def parse_csv(lines: Iterable[str], default_schedule_type: str = None) -> Iterator[Dict]:
+    """Rows of a headed CSV manifest with description[, schedule_type, id] columns."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield _item(reader.line_num, row, default_schedule_type)
+
+
+def parse_ndjson(lines: Iterable[str], default_schedule_type: str = None) -> Iterator[Dict]:
+    """One JSON object per line with description[, schedule_type, id] keys."""
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield {"line": line_num, "error": "invalid JSON"}
+            continue
+        if not isinstance(row, dict):
+            yield {"line": line_num, "error": "expected a JSON object"}
+            continue
+        yield _item(line_num, row, default_schedule_type)
+
+
+PARSERS = {
+    "text/csv": parse_csv,
+    "application/x-ndjson": parse_ndjson,
+    "application/jsonl": parse_ndjson,
+}
+
+
+class HSBatchPredictService:
+    """
+    Classifies a manifest of line items with the HSPredictService pipeline.
+
+    Items are processed in chunks: one embedding batch, one retrieval query
+    per schedule_type, and a vectorized fusion of the candidate scores. The
+    LLM selection step then runs on a bounded thread pool, at most
+    HS_BATCH_LLM_CONCURRENCY calls at a time, and results are yielded as
+    they finish, tagged with their input line. The next chunk is read once
+    the previous one has been handed to the pool.
+    """
+
+    def __init__(self):
+        self.predictor = HSPredictService()
+        self.chunk_size = settings.HS_BATCH_CHUNK_SIZE
+        self.max_lines = settings.HS_BATCH_MAX_LINES
+        self.concurrency = settings.HS_BATCH_LLM_CONCURRENCY
+        self.candidates = settings.HS_BATCH_CANDIDATES
+
+    @timed("batch_fuse")
+    def fuse(self, candidate_lists: List[List[Dict]]) -> List[List[Dict]]:
+        """Weighted vector/fts score and top-N selection for a whole chunk."""
+        width = max((len(c) for c in candidate_lists), default=0)
+        if not width:
+            return [[] for _ in candidate_lists]
+
+        vector = np.full((len(candidate_lists), width), -np.inf)
+        fts = np.zeros((len(candidate_lists), width))
+        for i, candidates in enumerate(candidate_lists):
+            vector[i, : len(candidates)] = [c["vector_score"] for c in candidates]
+            fts[i, : len(candidates)] = [c["fts_score"] for c in candidates]
+
+        final = self.predictor.VECTOR_WEIGHT * vector + self.predictor.FTS_WEIGHT * fts
+        order = np.argsort(-final, axis=1, kind="stable")[:, : self.predictor.TOP_N]
+
+        fused = []
+        for i, candidates in enumerate(candidate_lists):
+            top = []
+            for j in order[i]:
+                if j < len(candidates):
+                    top.append({**candidates[j], "final_score": float(final[i, j])})
+            fused.append(top)
+        return fused
+
+    @timed("batch_retrieve")
+    def retrieve(self, items: List[Dict], embeddings: List[List[float]]) -> List[List[Dict]]:
+        results = [None] * len(items)
+
+        for schedule_type in SCHEDULE_TYPES:
+            positions = [i for i, item in enumerate(items) if item["schedule_type"] == schedule_type]
+            if not positions:
+                continue
+
+            batch = self.predictor.repo.batch_hybrid_search(
+                queries=[items[i]["description"] for i in positions],
+                embeddings=[embeddings[i] for i in positions],
+                schedule_type=schedule_type,
+                limit=self.candidates,
+            )
+            for i, candidates in zip(positions, batch):
+                results[i] = candidates
+
+        return self.fuse(results)
+
+    def select(self, item: Dict, candidates: List[Dict], explain: bool) -> Dict:
+        # Runs on pool threads: LLM only, the hierarchy is added by finish().
+        try:
+            result = self.predictor.select(item["description"], candidates, explain=explain)
+        except Exception:
+            # One failed explanation should not fail the manifest.
+            logger.exception("LLM selection failed for line %s", item["line"])
+            result = self.predictor.select(item["description"], candidates, explain=False)
+            result["explanation_error"] = "explanation unavailable"
+
+        return {"line": item["line"], "id": item["id"], **result}
+
+    def finish(self, item: Dict, result: Dict) -> Dict:
+        result["hierarchy"] = self.predictor.hierarchy(
+            result["predicted_hs_code"], item["schedule_type"]
+        )
+        return result
+
+    def chunks(self, items: Iterator[Dict]) -> Iterator[List[Dict]]:
+        items = iter(items)
+        seen = 0
+        while True:
+            chunk = list(islice(items, self.chunk_size))
+            if not chunk:
+                return
+
+            seen += len(chunk)
+            if seen > self.max_lines:
+                chunk = chunk[: len(chunk) - (seen - self.max_lines)]
+                if chunk:
+                    yield chunk
+                yield [{"line": None, "error": f"batch limit of {self.max_lines} lines exceeded"}]
+                return
+
+            yield chunk
+
+    def prepare(self, chunk: List[Dict], explain: bool, ready: deque) -> Iterator[Dict]:
+        """
+        Embed and retrieve a chunk. Yields the lines that are already final
+        and queues (item, candidates) on `ready` for the LLM step.
+        """
+        valid = []
+        for item in chunk:
+            if "error" in item:
+                yield item
+            else:
+                valid.append(item)
+
+        if not valid:
+            return
+
+        embeddings = self.predictor.vector.embed_many([item["description"] for item in valid])
+        for item, candidates in zip(valid, self.retrieve(valid, embeddings)):
+            if not candidates:
+                yield {
+                    "line": item["line"],
+                    "id": item["id"],
+                    "error": "No matching HS codes found.",
+                }
+            elif explain:
+                ready.append((item, candidates))
+            else:
+                yield self.finish(item, self.select(item, candidates, explain))
+
+    def predict_stream(self, items: Iterable[Dict], explain: bool = True) -> Iterator[Dict]:
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="hs-batch-llm")
+        chunks = self.chunks(items)
+        ready = deque()
+        running = {}
+        exhausted = False
+
+        try:
+            while True:
+                # At most `concurrency` LLM calls are submitted at a time, so
+                # nothing is left queued on the pool if the client goes away.
+                while ready and len(running) < self.concurrency:
+                    item, candidates = ready.popleft()
+                    running[pool.submit(self.select, item, candidates, explain)] = item
+
+                # Read the next chunk once the previous one is all submitted.
+                if not ready and not exhausted:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        yield from self.prepare(chunk, explain, ready)
+                    continue
+
+                if not running:
+                    return
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self.finish(running.pop(future), future.result())
+        finally:
+            # On a client disconnect (GeneratorExit) do not join the calls
+            # still running; their results are dropped.
+            pool.shutdown(wait=False, cancel_futures=True)
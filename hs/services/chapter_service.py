@@ -1,33 +1,145 @@
-from hs.models import ItcHsMaster
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from hs.models import HsChapterOverview, ItcHsMaster
+from hs.services.hs_registry import HSRegistry
 from api.services.llm_service import LLMService
+from api.services.metrics import timed
 
 
 class HSChapterService:
 
+    OVERVIEW_RECORDS = 30
+    OVERVIEW_PROMPT = """
+Provide a high-level overview of Chapter {chapter_num}.
+Explain major product categories and trade relevance.
+"""
+
     def __init__(self):
         self.llm = LLMService()
 
+    @timed("chapter_codes")
     def get_chapter_codes(self, chapter_num, schedule_type):
 
+        if settings.HS_REGISTRY_ENABLED:
+            return HSRegistry.get_instance().chapter(
+                chapter_num, schedule_type, levels=(2, 4)
+            )
+
         return ItcHsMaster.objects.filter(
             chapter_num=chapter_num, schedule_type=schedule_type, hs_level__in=[2, 4]
         ).order_by("hs_code")
 
+    def build_overview_inputs(self, chapter_num, records):
+
+        context = "\n".join(
+            [f"{r.hs_code} - {r.description}" for r in records[: self.OVERVIEW_RECORDS]]
+        )
+        prompt = self.OVERVIEW_PROMPT.format(chapter_num=chapter_num)
+
+        return prompt, context
+
+    def source_hash(self, chapter_num, records):
+        """Hash of everything the overview is generated from."""
+        prompt, context = self.build_overview_inputs(chapter_num, records)
+        return hashlib.sha256(f"{prompt}\x00{context}".encode()).hexdigest()
+
     def generate_overview(self, chapter_num, records):
 
-        context = "\n".join([f"{r.hs_code} - {r.description}" for r in records[:30]])
+        prompt, context = self.build_overview_inputs(chapter_num, records)
 
-        prompt = f"""
-Provide a high-level overview of Chapter {chapter_num}.
-Explain major product categories and trade relevance.
-"""
+        return self.llm.try_reasoning(query=prompt, context=context)
+
+    def store_overview(self, chapter_num, schedule_type, source_hash, overview):
+
+        HsChapterOverview.objects.update_or_create(
+            chapter_num=chapter_num,
+            schedule_type=schedule_type,
+            defaults={"source_hash": source_hash, "overview": overview},
+        )
+
+    def stored_overview(self, chapter_num, schedule_type, source_hash):
+
+        return (
+            HsChapterOverview.objects.filter(
+                chapter_num=chapter_num,
+                schedule_type=schedule_type,
+                source_hash=source_hash,
+            )
+            .values_list("overview", flat=True)
+            .first()
+        )
+
+    def lookup_overview(self, chapter_num, schedule_type, records):
+        """
+        Return (source_hash, stored overview or None, LLM inputs or None).
 
-        return self.llm.get_reasoning(query=prompt, context=context)
+        The inputs are the query/context kwargs to generate a missing or
+        stale overview from. They are None when the stored one is current,
+        when the chapter has no records, or when
+        HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS is off. In the last case None
+        is served until the generate_chapter_overviews command has run.
+        """
+
+        if not records:
+            return None, None, None
+
+        source_hash = self.source_hash(chapter_num, records)
+        stored = self.stored_overview(chapter_num, schedule_type, source_hash)
+
+        if stored is not None or not settings.HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS:
+            return source_hash, stored, None
+
+        prompt, context = self.build_overview_inputs(chapter_num, records)
+        return source_hash, None, {"query": prompt, "context": context}
+
+    def keep_generated(self, chapter_num, schedule_type, source_hash, overview):
+        """Store a generated overview; None (LLM unavailable) is not stored."""
+
+        if overview is not None:
+            self.store_overview(chapter_num, schedule_type, source_hash, overview)
+
+        return overview
+
+    @timed("chapter_overview")
+    def get_overview(self, chapter_num, schedule_type, records):
+        """Stored overview for the current chapter records, generated inline on a miss."""
+
+        source_hash, overview, inputs = self.lookup_overview(chapter_num, schedule_type, records)
+        if inputs is None:
+            return overview
+
+        return self.keep_generated(
+            chapter_num, schedule_type, source_hash, self.llm.try_reasoning(**inputs)
+        )
 
     def get_chapter(self, chapter_num, schedule_type):
 
-        records = self.get_chapter_codes(chapter_num, schedule_type)
+        records = list(self.get_chapter_codes(chapter_num, schedule_type))
+
+        overview = self.get_overview(chapter_num, schedule_type, records)
+
+        return records, overview
+
+    def load_chapter(self, chapter_num, schedule_type):
+        """Return records plus lookup_overview() for them."""
+
+        records = list(self.get_chapter_codes(chapter_num, schedule_type))
+
+        return (records,) + self.lookup_overview(chapter_num, schedule_type, records)
+
+    async def aget_chapter(self, chapter_num, schedule_type):
+
+        records, source_hash, overview, inputs = await sync_to_async(self.load_chapter)(
+            chapter_num, schedule_type
+        )
 
-        overview = self.generate_overview(chapter_num, records)
+        if inputs is not None:
+            overview = await self.llm.atry_reasoning(**inputs)
+            await sync_to_async(self.keep_generated)(
+                chapter_num, schedule_type, source_hash, overview
+            )
 
         return records, overview
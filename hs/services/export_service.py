@@ -0,0 +1,209 @@
+import contextlib
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections, transaction
+from django.db.models import Q
+
+from api.db_routing import ReplicaSet
+from api.services.data_version import DataVersionService
+from hs.models import ItcHsMaster
+
+COLUMNS = (
+    "hs_code",
+    "description",
+    "policy",
+    "policy_conditions",
+    "schedule_type",
+    "chapter_num",
+    "hs_level",
+    "parent_hs_code",
+    "metadata",
+)
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands its bytes back through drain()."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def encode_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+
+    for batch in batches:
+        for row in batch:
+            writer.writerow(row[:-1] + (json.dumps(row[-1], cls=DjangoJSONEncoder),))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only, for an empty export.
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(batches):
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(COLUMNS, row)), cls=DjangoJSONEncoder) + "\n" for row in batch
+        ).encode()
+
+
+def encode_parquet(batches):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            (c, pa.int32() if c in ("chapter_num", "hs_level") else pa.string())
+            for c in COLUMNS
+        ]
+    )
+
+    # One row group per batch, flushed as soon as it is written; the footer
+    # follows on close.
+    sink = _Sink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            columns = [list(c) for c in zip(*batch)]
+            columns[-1] = [json.dumps(m, cls=DjangoJSONEncoder) for m in columns[-1]]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# output -> (encoder, content type, file extension)
+FORMATS = {
+    "csv": (encode_csv, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (encode_ndjson, "application/x-ndjson", "ndjson"),
+    "parquet": (encode_parquet, "application/vnd.apache.parquet", "parquet"),
+}
+
+
+class HSExportService:
+    """
+    Streams itc_hs_master rows for a schedule, optionally narrowed to a
+    chapter range and/or HS level, ordered by hs_code.
+
+    Rows are read through a server-side cursor inside one transaction
+    (HS_EXPORT_CHUNK_SIZE rows per fetch), or, where server-side cursors
+    are disabled (pgbouncer), in keyset pages of that size. They are encoded
+    batch by batch, so memory stays flat however large the export is.
+
+    Exports read from a healthy replica when one is configured; a consistent
+    export (one sent with a data-version ETag) only from a replica that has
+    replayed that version. If the replica fails, it is marked down and the
+    export continues on default after the last row sent.
+    """
+
+    def __init__(self):
+        self.chunk_size = settings.HS_EXPORT_CHUNK_SIZE
+
+    def queryset(
+        self, alias, schedule_type, chapter_from=None, chapter_to=None, hs_level=None, after=None
+    ):
+        """Rows (COLUMNS + id) ordered by (hs_code, id), after the key `after`."""
+        qs = ItcHsMaster.objects.using(alias).filter(schedule_type=schedule_type)
+
+        if chapter_from is not None:
+            qs = qs.filter(chapter_num__gte=chapter_from)
+        if chapter_to is not None:
+            qs = qs.filter(chapter_num__lte=chapter_to)
+        if hs_level is not None:
+            qs = qs.filter(hs_level=hs_level)
+        if after is not None:
+            hs_code, pk = after
+            qs = qs.filter(Q(hs_code__gt=hs_code) | Q(hs_code=hs_code, id__gt=pk))
+
+        return qs.order_by("hs_code", "id").values_list(*COLUMNS, "id")
+
+    def read(self, alias, filters, after=None):
+        """Batches of queryset() rows from alias."""
+        if connections[alias].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+            # .iterator() would fetch the whole result in one go here.
+            while batch := list(self.queryset(alias, after=after, **filters)[: self.chunk_size]):
+                yield batch
+                after = batch[-1][0], batch[-1][-1]
+            return
+
+        # Inside a transaction the cursor is a plain (not WITH HOLD) one, so
+        # Postgres streams it instead of materializing the result first.
+        with transaction.atomic(using=alias):
+            rows = self.queryset(alias, after=after, **filters).iterator(chunk_size=self.chunk_size)
+            while batch := list(islice(rows, self.chunk_size)):
+                yield batch
+
+    def batches(self, filters, consistent=False):
+        replicas = ReplicaSet.get_instance()
+        scope = DataVersionService.consistent_reads("itc_hs_master") if consistent else None
+        with scope or contextlib.nullcontext():
+            alias = replicas.choose()
+
+        after = None
+        if alias is not None:
+            try:
+                for batch in self.read(alias, filters):
+                    after = batch[-1][0], batch[-1][-1]
+                    yield [row[:-1] for row in batch]
+                return
+            except (OperationalError, InterfaceError) as e:
+                replicas.mark_down(alias, e)
+                replicas.failovers += 1
+
+        for batch in self.read(DEFAULT_DB_ALIAS, filters, after):
+            yield [row[:-1] for row in batch]
+
+    def stream(self, output, consistent=False, **filters):
+        """Encoded chunks (bytes) of the export in `output` format."""
+        encode = FORMATS[output][0]
+        return encode(self.batches(filters, consistent))
+
+    async def astream(self, output, consistent=False, **filters):
+        """
+        Async form of stream(). Every chunk is produced on the same thread,
+        which keeps the transaction and cursor on one DB connection.
+        """
+        chunks = self.stream(output, consistent, **filters)
+        pull = sync_to_async(next, thread_sensitive=True)
+        try:
+            while True:
+                chunk = await pull(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,304 @@
+import logging
+import threading
+import time
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from api.services.data_version import DataVersionService
+from hs.models import ItcHsMaster
+
+logger = logging.getLogger(__name__)
+
+
+class HSTrieNode:
+    __slots__ = ("children", "row")
+
+    def __init__(self):
+        self.children = {}
+        self.row = -1
+
+
+class HSRegistryPartition:
+    """
+    Column arrays, a code -> row map and a prefix trie for one schedule_type.
+
+    Trie levels follow the HS digit pairs (2, 4, 6, 8 ... digits); nodes for
+    prefixes that have no row of their own (row == -1) are kept so
+    navigation can step through gaps in the published hierarchy.
+    """
+
+    SEGMENT = 2
+
+    def __init__(self, schedule_type: str, rows):
+        self.schedule_type = schedule_type
+        self.ids = [r[0] for r in rows]
+        self.hs_codes = [r[1] for r in rows]
+        self.descriptions = [r[2] for r in rows]
+        self.policies = [r[3] for r in rows]
+        self.policy_conditions = [r[4] for r in rows]
+        self.chapters = np.array([r[6] if r[6] is not None else -1 for r in rows], dtype=np.int16)
+        self.parent_hs_codes = [r[7] for r in rows]
+        self.levels = np.array([r[8] if r[8] is not None else -1 for r in rows], dtype=np.int8)
+
+        self.rows_by_code = {}
+        for i, code in enumerate(self.hs_codes):
+            self.rows_by_code.setdefault(code, i)
+        self.codes = frozenset(self.rows_by_code)
+
+        self.root = HSTrieNode()
+        for code, i in self.rows_by_code.items():
+            node = self.root
+            for prefix in self.prefixes(code):
+                node = node.children.setdefault(prefix, HSTrieNode())
+            node.row = i
+
+    def __len__(self):
+        return len(self.hs_codes)
+
+    @classmethod
+    def prefixes(cls, code: str) -> List[str]:
+        return [code[:n] for n in range(cls.SEGMENT, len(code) + cls.SEGMENT, cls.SEGMENT)]
+
+    def node(self, prefix: str) -> Optional[HSTrieNode]:
+        node = self.root
+        for p in self.prefixes(prefix):
+            node = node.children.get(p)
+            if node is None:
+                return None
+        return node
+
+    def children(self, node: HSTrieNode) -> List[int]:
+        rows = []
+        for key in sorted(node.children):
+            child = node.children[key]
+            if child.row >= 0:
+                rows.append(child.row)
+            else:
+                rows.extend(self.children(child))
+        return rows
+
+    def descendants(self, node: HSTrieNode) -> List[int]:
+        rows = []
+        for key in sorted(node.children):
+            child = node.children[key]
+            if child.row >= 0:
+                rows.append(child.row)
+            rows.extend(self.descendants(child))
+        return rows
+
+    def ancestors(self, code: str) -> List[int]:
+        rows = []
+        node = self.root
+        for prefix in self.prefixes(code)[:-1]:
+            node = node.children.get(prefix)
+            if node is None:
+                break
+            if node.row >= 0:
+                rows.append(node.row)
+        return rows
+
+
+class HSRegistry:
+    """
+    Process-wide, versioned snapshot of the itc_hs_master hierarchy.
+
+    Lookups, validation and 2/4/6/8-digit navigation are served from memory
+    instead of one ORM query per call. Records come back as ItcHsMaster
+    instances with metadata deferred. Like HSVectorIndex, the snapshot is tagged with the
+    itc_hs_master data version and rebuilt on a background thread when it
+    moves.
+    """
+
+    FIELDS = (
+        "id", "hs_code", "description", "policy", "policy_conditions",
+        "schedule_type", "chapter_num", "parent_hs_code", "hs_level",
+    )
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._partitions = None
+        self._version = None
+        self._checked_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+        self._initial_load_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(settings.HS_REGISTRY_REFRESH_SECONDS)
+        return cls._instance
+
+    def load(self, version: str):
+        # From the primary, which the version was read on, even when first
+        # used inside a replica_reads scope.
+        rows = ItcHsMaster.objects.using(DEFAULT_DB_ALIAS).order_by("schedule_type", "hs_code", "id").values_list(
+            *self.FIELDS
+        )
+
+        grouped = {}
+        for r in rows.iterator(chunk_size=5000):
+            grouped.setdefault(r[5], []).append(r)
+
+        partitions = {
+            schedule_type: HSRegistryPartition(schedule_type, part_rows)
+            for schedule_type, part_rows in grouped.items()
+        }
+
+        with self._lock:
+            self._partitions = partitions
+            self._version = version
+
+        logger.info(
+            "Loaded HS registry %s: %d codes",
+            version,
+            sum(len(p) for p in partitions.values()),
+        )
+
+    def _background_reload(self, version):
+        try:
+            self.load(version)
+        except Exception:
+            logger.exception("HS registry reload failed")
+        finally:
+            self._reloading = False
+            connection.close()
+
+    def ensure_fresh(self):
+        if self._partitions is None:
+            with self._initial_load_lock:
+                if self._partitions is None:
+                    self.load(DataVersionService.get_version("itc_hs_master"))
+                    self._checked_at = time.monotonic()
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval or self._reloading:
+            return
+        self._checked_at = now
+
+        version = DataVersionService.get_version("itc_hs_master")
+        if version != self._version:
+            self._reloading = True
+            threading.Thread(
+                target=self._background_reload,
+                args=(version,),
+                name="hs-registry-reload",
+                daemon=True,
+            ).start()
+
+    @property
+    def version(self):
+        return self._version
+
+    def partition(self, schedule_type: str) -> Optional[HSRegistryPartition]:
+        self.ensure_fresh()
+        return self._partitions.get(schedule_type)
+
+    @staticmethod
+    def record(partition: HSRegistryPartition, row: int) -> ItcHsMaster:
+        return ItcHsMaster.from_db(
+            "default",
+            HSRegistry.FIELDS,
+            (
+                partition.ids[row],
+                partition.hs_codes[row],
+                partition.descriptions[row],
+                partition.policies[row],
+                partition.policy_conditions[row],
+                partition.schedule_type,
+                int(partition.chapters[row]) if partition.chapters[row] >= 0 else None,
+                partition.parent_hs_codes[row],
+                int(partition.levels[row]) if partition.levels[row] >= 0 else None,
+            ),
+        )
+
+    def _records(self, partition, rows, levels=None) -> List[ItcHsMaster]:
+        if levels is not None:
+            rows = [i for i in rows if partition.levels[i] in levels]
+        return [self.record(partition, i) for i in rows]
+
+    def is_valid(self, hs_code: str, schedule_type: str) -> bool:
+        partition = self.partition(schedule_type)
+        return partition is not None and hs_code in partition.codes
+
+    def valid_codes(self, codes: Iterable[str], schedule_type: str) -> Set[str]:
+        partition = self.partition(schedule_type)
+        if partition is None:
+            return set()
+        return partition.codes.intersection(codes)
+
+    def get(self, hs_code: str, schedule_type: str) -> Optional[ItcHsMaster]:
+        partition = self.partition(schedule_type)
+        if partition is None:
+            return None
+
+        row = partition.rows_by_code.get(hs_code)
+        return self.record(partition, row) if row is not None else None
+
+    def get_many(self, codes: Iterable[str], schedule_type: str) -> List[ItcHsMaster]:
+        partition = self.partition(schedule_type)
+        if partition is None:
+            return []
+
+        rows = sorted({partition.rows_by_code[c] for c in codes if c in partition.codes})
+        return self._records(partition, rows)
+
+    def children(self, prefix: str, schedule_type: str) -> List[ItcHsMaster]:
+        """Nearest published codes one step below `prefix` ("" for chapters)."""
+        partition = self.partition(schedule_type)
+        node = partition.node(prefix) if partition is not None else None
+        if node is None:
+            return []
+        return self._records(partition, partition.children(node))
+
+    def descendants(self, prefix: str, schedule_type: str, levels=None) -> List[ItcHsMaster]:
+        partition = self.partition(schedule_type)
+        node = partition.node(prefix) if partition is not None else None
+        if node is None:
+            return []
+        return self._records(partition, partition.descendants(node), levels)
+
+    def ancestors(self, hs_code: str, schedule_type: str) -> List[ItcHsMaster]:
+        """Published codes on the path to `hs_code`, chapter first."""
+        partition = self.partition(schedule_type)
+        if partition is None:
+            return []
+        return self._records(partition, partition.ancestors(hs_code))
+
+    def chapter(self, chapter_num: int, schedule_type: str, levels=None) -> List[ItcHsMaster]:
+        partition = self.partition(schedule_type)
+        if partition is None:
+            return []
+
+        rows = np.flatnonzero(partition.chapters == chapter_num).tolist()
+        return self._records(partition, rows, levels)
+
+
+def preload_hs_registry():
+    """
+    Load the registry at process start so the first request does not pay for it.
+
+    Runs at import of the WSGI/ASGI module, i.e. in the gunicorn master under
+    --preload. The loaded partitions are read-only and are shared with forked
+    workers, but the connection used to load them must not be, so every
+    connection opened here is closed before returning.
+    """
+    if not (settings.HS_REGISTRY_ENABLED and settings.HS_REGISTRY_PRELOAD):
+        return
+
+    try:
+        HSRegistry.get_instance().ensure_fresh()
+    except Exception:
+        # The first request retries the load.
+        logger.exception("HS registry preload failed")
+    finally:
+        connections.close_all()
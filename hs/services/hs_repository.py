@@ -1,45 +1,72 @@
 from hs.models import ItcHsMaster
+from hs.services.trigram_search import HSTrigramSearch
 from django.db.models import Q
-from django.db import connection
+from api.db_routing import read_alias, read_connection, replica_reads
 from typing import List, Dict
 
 
 class HSRepository:
 
+    VECTOR_WEIGHT = 0.7
+    FTS_WEIGHT = 0.3
+
+    # Lists, not querysets: a queryset would be evaluated after the
+    # replica_reads scope ends, without its failover.
+    @replica_reads
     def get_by_codes(self, codes: list[str]):
-        return ItcHsMaster.objects.filter(hs_code__in=codes)
+        return list(ItcHsMaster.objects.using(read_alias()).filter(hs_code__in=codes))
 
+    @replica_reads
     def search_description(self, query: str, limit=20):
-        return ItcHsMaster.objects.filter(description__icontains=query).order_by(
-            "hs_code"
-        )[:limit]
+        return HSTrigramSearch().search(query, limit=limit)
 
+    @replica_reads
     def get_by_chapter(self, chapter_num: int):
-        return ItcHsMaster.objects.filter(chapter_num=chapter_num).order_by("hs_code")
+        return list(
+            ItcHsMaster.objects.using(read_alias())
+            .filter(chapter_num=chapter_num)
+            .order_by("hs_code")
+        )
 
+    @replica_reads
     def search_hybrid(
         self, query: str, embedding: List[float], schedule_type: str, limit=20
     ) -> List[Dict]:
 
+        # search_vector is a stored, GIN-indexed to_tsvector(description)
+        # (migration hs.0002), so full-text matching never re-parses rows.
         sql = """
         WITH fts AS (
-            SELECT id, hs_code, description, policy, chapter_num,
-                   ts_rank(to_tsvector('english', description),
-                           plainto_tsquery('english', %s)) AS fts_rank
+            SELECT id,
+                   ts_rank(search_vector, plainto_tsquery('english', %s)) AS fts_rank
             FROM itc_hs_master
             WHERE schedule_type = %s
-              AND to_tsvector('english', description)
-                  @@ plainto_tsquery('english', %s)
+              AND search_vector @@ plainto_tsquery('english', %s)
+            ORDER BY fts_rank DESC
             LIMIT %s
         ),
         vector AS (
-            SELECT id, hs_code, description, policy, chapter_num,
+            SELECT id,
                    1 - (embedding <=> %s::vector) AS similarity
-            FROM knowledge_base
+            FROM itc_hs_master
+            WHERE schedule_type = %s
             ORDER BY embedding <=> %s::vector
             LIMIT %s
+        ),
+        combined AS (
+            SELECT COALESCE(f.id, v.id) AS id,
+                   COALESCE(f.fts_rank, 0) AS fts_rank,
+                   COALESCE(v.similarity, 0) AS similarity
+            FROM fts f
+            FULL OUTER JOIN vector v ON v.id = f.id
         )
-        SELECT * FROM fts;
+        SELECT m.id, m.hs_code, m.description, m.policy, m.chapter_num,
+               c.fts_rank, c.similarity,
+               %s * c.similarity + %s * c.fts_rank AS score
+        FROM combined c
+        JOIN itc_hs_master m ON m.id = c.id
+        ORDER BY score DESC, m.hs_code
+        LIMIT %s;
         """
 
         params = [
@@ -48,12 +75,28 @@ class HSRepository:
             query,
             limit,
             embedding,
+            schedule_type,
             embedding,
             limit,
+            self.VECTOR_WEIGHT,
+            self.FTS_WEIGHT,
+            limit,
         ]
 
-        with connection.cursor() as cur:
+        with read_connection().cursor() as cur:
             cur.execute(sql, params)
             rows = cur.fetchall()
 
-        return rows
+        return [
+            {
+                "id": r[0],
+                "hs_code": r[1],
+                "description": r[2],
+                "policy": r[3],
+                "chapter": r[4],
+                "fts_score": float(r[5]),
+                "vector_score": float(r[6]),
+                "score": float(r[7]),
+            }
+            for r in rows
+        ]
@@ -1,16 +1,20 @@
+from django.conf import settings
 from hs.models import ItcHsMaster
+from hs.services.hs_registry import HSRegistry
+from hs.services.trigram_search import HSTrigramSearch
 
 
 class HSService:
 
     @staticmethod
     def get_by_code(hs_code: str, schedule_type: str):
+        if settings.HS_REGISTRY_ENABLED:
+            return HSRegistry.get_instance().get(hs_code, schedule_type)
+
         return ItcHsMaster.objects.filter(
             hs_code=hs_code, schedule_type=schedule_type
         ).first()
 
     @staticmethod
     def search_like(query: str, schedule_type: str):
-        return ItcHsMaster.objects.filter(
-            description__icontains=query, schedule_type=schedule_type
-        )[:20]
+        return HSTrigramSearch().search(query, schedule_type, limit=20)
@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from api.services.data_version import DataVersionService
+from api.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class HSVectorPartition:
+    """Row-normalized float32 embeddings and row data for one schedule_type."""
+
+    def __init__(self, rows):
+        self.ids = [r[0] for r in rows]
+        self.hs_codes = [r[1] for r in rows]
+        self.descriptions = [r[2] for r in rows]
+        self.policies = [r[3] for r in rows]
+        self.chapters = [r[4] for r in rows]
+
+        matrix = np.array([r[5] for r in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Zero vectors have no cosine distance in pgvector (NaN sorts last).
+        self.valid = norms[:, 0] > 0
+        self.matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def top_k(self, query: np.ndarray, k: int):
+        similarities = self.matrix @ query
+        similarities[~self.valid] = -np.inf
+
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+
+        idx = np.argpartition(-similarities, k - 1)[:k]
+        idx = idx[np.argsort(-similarities[idx], kind="stable")]
+
+        return [(int(i), float(1.0 - similarities[i])) for i in idx]
+
+    def top_k_batch(self, queries: np.ndarray, k: int):
+        """top_k for every row of `queries` with one matrix product."""
+        similarities = queries @ self.matrix.T
+        similarities[:, ~self.valid] = -np.inf
+
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        idx = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(similarities, idx, axis=1)
+        order = np.argsort(-top, axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        return [
+            [(int(i), float(1.0 - s)) for i, s in zip(row_idx, row_sim)]
+            for row_idx, row_sim in zip(idx, top)
+        ]
+
+
+class HSVectorIndex:
+    """
+    Process-wide exact vector index over itc_hs_master embeddings.
+
+    The table is small and changes rarely, so its embeddings are held as one
+    normalized float32 matrix per schedule_type and searched with a dot
+    product plus argpartition, the same ordering as `embedding <=> q`. The
+    snapshot is tagged with the itc_hs_master data version; when the version
+    moves, a new snapshot is built on a background thread while the old one
+    keeps serving.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._partitions = None
+        self._version = None
+        self._checked_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+        self._initial_load_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(settings.HS_VECTOR_INDEX_REFRESH_SECONDS)
+        return cls._instance
+
+    @staticmethod
+    def parse_vector(text: str) -> List[str]:
+        return text.strip("[]").split(",")
+
+    def load(self, version: str):
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, hs_code, description, policy, chapter_num,
+                       embedding::text, schedule_type
+                FROM itc_hs_master
+                WHERE embedding IS NOT NULL
+                """
+            )
+            rows = cur.fetchall()
+
+        grouped = {}
+        for r in rows:
+            grouped.setdefault(r[6], []).append(r[:5] + (self.parse_vector(r[5]),))
+
+        partitions = {
+            schedule_type: HSVectorPartition(part_rows)
+            for schedule_type, part_rows in grouped.items()
+        }
+
+        with self._lock:
+            self._partitions = partitions
+            self._version = version
+
+        logger.info("Loaded HS vector index %s: %d rows", version, len(rows))
+
+    def _background_reload(self, version):
+        try:
+            self.load(version)
+        except Exception:
+            logger.exception("HS vector index reload failed")
+        finally:
+            self._reloading = False
+            connection.close()
+
+    def ensure_fresh(self):
+        if self._partitions is None:
+            with self._initial_load_lock:
+                if self._partitions is None:
+                    self.load(DataVersionService.get_version("itc_hs_master"))
+                    self._checked_at = time.monotonic()
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval or self._reloading:
+            return
+        self._checked_at = now
+
+        version = DataVersionService.get_version("itc_hs_master")
+        if version != self._version:
+            self._reloading = True
+            threading.Thread(
+                target=self._background_reload,
+                args=(version,),
+                name="hs-vector-index-reload",
+                daemon=True,
+            ).start()
+
+    @property
+    def version(self):
+        return self._version
+
+    @staticmethod
+    def _hit(partition, i, distance):
+        return {
+            "id": partition.ids[i],
+            "hs_code": partition.hs_codes[i],
+            "description": partition.descriptions[i],
+            "policy": partition.policies[i],
+            "chapter": partition.chapters[i],
+            "distance": distance,
+        }
+
+    @timed("hs_vector_index")
+    def search(self, embedding, schedule_type: str, limit: int = 20) -> List[Dict]:
+        self.ensure_fresh()
+
+        partition = self._partitions.get(schedule_type)
+        if partition is None:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+
+        return [
+            self._hit(partition, i, distance)
+            for i, distance in partition.top_k(query / norm, limit)
+        ]
+
+    @timed("hs_vector_index")
+    def search_many(self, embeddings, schedule_type: str, limit: int = 20) -> List[List[Dict]]:
+        """search() for a batch of embeddings against the same schedule_type."""
+        self.ensure_fresh()
+
+        partition = self._partitions.get(schedule_type)
+        if partition is None or not len(embeddings):
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = np.divide(queries, norms, out=np.zeros_like(queries), where=norms > 0)
+
+        return [
+            [self._hit(partition, i, distance) for i, distance in hits] if norm else []
+            for hits, norm in zip(partition.top_k_batch(queries, limit), norms[:, 0])
+        ]
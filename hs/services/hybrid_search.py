@@ -0,0 +1,155 @@
+from typing import List
+
+from django.conf import settings
+from django.db import connection
+
+from api.db_routing import replica_reads
+from api.services.metrics import timed
+from api.services.vector_service import VectorService
+from hs.models import ItcHsMaster
+from hs.services.hs_vector_index import HSVectorIndex
+from hs.services.trigram_search import HSTrigramSearch
+
+
+class HSHybridSearchEngine:
+    """
+    Lexical + vector HS search fused with weighted reciprocal-rank fusion.
+
+    Lexical candidates are substring matches served by the pg_trgm index
+    on UPPER(description), ranked by word_similarity.
+
+    Both candidate sets, the fusion and the hydration of the winning rows
+    run in a single SQL statement, so a search costs one round trip and
+    returns ItcHsMaster instances annotated with per-signal scores:
+    lexical_rank, vector_rank, vector_distance and the fused score.
+
+    With HS_VECTOR_INDEX_ENABLED the vector candidates come from the
+    in-memory HSVectorIndex and are passed into the statement as arrays.
+
+    Off Postgres (no pg_trgm, no pgvector) the search is lexical only,
+    served by HSTrigramSearch's in-process n-gram index, with the same
+    annotations so callers need not care.
+    """
+
+    HS_COLUMNS = """
+        m.id, m.hs_code, m.description, m.policy, m.policy_conditions,
+        m.schedule_type, m.chapter_num, m.metadata, m.parent_hs_code, m.hs_level
+    """
+
+    LEXICAL_CTE = """
+        lexical AS (
+            SELECT id,
+                   ROW_NUMBER() OVER (
+                       ORDER BY word_similarity(%(query)s, description) DESC,
+                                hs_code
+                   ) AS rank
+            FROM itc_hs_master
+            WHERE schedule_type = %(schedule_type)s
+              AND UPPER(description) LIKE UPPER(%(pattern)s)
+            ORDER BY rank
+            LIMIT %(candidates)s
+        )
+    """
+
+    VECTOR_SQL_CTE = """
+        vector AS (
+            SELECT id, distance, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, embedding <=> %(embedding)s::vector AS distance
+                FROM itc_hs_master
+                WHERE schedule_type = %(schedule_type)s
+                ORDER BY embedding <=> %(embedding)s::vector
+                LIMIT %(candidates)s
+            ) v
+        )
+    """
+
+    VECTOR_INDEX_CTE = """
+        vector AS (
+            SELECT id, distance, rank
+            FROM unnest(%(vector_ids)s::uuid[], %(vector_distances)s::float8[])
+                 WITH ORDINALITY AS v(id, distance, rank)
+        )
+    """
+
+    FUSION_SQL = """
+        fused AS (
+            SELECT COALESCE(l.id, v.id) AS id,
+                   l.rank AS lexical_rank,
+                   v.rank AS vector_rank,
+                   v.distance AS vector_distance,
+                   COALESCE(%(lexical_weight)s / (%(rrf_k)s + l.rank), 0)
+                   + COALESCE(%(vector_weight)s / (%(rrf_k)s + v.rank), 0) AS score
+            FROM lexical l
+            FULL OUTER JOIN vector v ON v.id = l.id
+        )
+        SELECT {columns},
+               f.lexical_rank, f.vector_rank, f.vector_distance, f.score
+        FROM fused f
+        JOIN itc_hs_master m ON m.id = f.id
+        ORDER BY f.score DESC, m.hs_code
+        LIMIT %(limit)s
+    """
+
+    def __init__(self):
+        self.vector_service = VectorService()
+        self.rrf_k = settings.HS_HYBRID_RRF_K
+        self.lexical_weight = settings.HS_HYBRID_LEXICAL_WEIGHT
+        self.vector_weight = settings.HS_HYBRID_VECTOR_WEIGHT
+
+    @staticmethod
+    def escape_like(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    def build_sql(self, use_index: bool) -> str:
+        vector_cte = self.VECTOR_INDEX_CTE if use_index else self.VECTOR_SQL_CTE
+        return (
+            "WITH "
+            + self.LEXICAL_CTE
+            + ","
+            + vector_cte
+            + ","
+            + self.FUSION_SQL.format(columns=self.HS_COLUMNS)
+        )
+
+    @timed("hs_hybrid_search")
+    @replica_reads
+    def search(
+        self, query: str, schedule_type: str, limit: int = 20, candidates: int = None
+    ) -> List[ItcHsMaster]:
+
+        if connection.vendor != "postgresql":
+            return self.lexical_search(query, schedule_type, limit)
+
+        candidates = candidates or limit
+        embedding = self.vector_service.embed(query)
+        use_index = settings.HS_VECTOR_INDEX_ENABLED
+
+        params = {
+            "query": query,
+            "pattern": f"%{self.escape_like(query)}%",
+            "schedule_type": schedule_type,
+            "candidates": candidates,
+            "limit": limit,
+            "rrf_k": float(self.rrf_k),
+            "lexical_weight": float(self.lexical_weight),
+            "vector_weight": float(self.vector_weight),
+        }
+
+        if use_index:
+            hits = HSVectorIndex.get_instance().search(embedding, schedule_type, candidates)
+            params["vector_ids"] = [str(h["id"]) for h in hits]
+            params["vector_distances"] = [h["distance"] for h in hits]
+        else:
+            params["embedding"] = embedding
+
+        return list(ItcHsMaster.objects.raw(self.build_sql(use_index), params))
+
+    def lexical_search(self, query: str, schedule_type: str, limit: int) -> List[ItcHsMaster]:
+        records = HSTrigramSearch().search(query, schedule_type, limit=limit)
+        for rank, record in enumerate(records, start=1):
+            record.lexical_rank = rank
+            record.vector_rank = None
+            record.vector_distance = None
+            record.score = self.lexical_weight / (self.rrf_k + rank)
+        return records
@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from hs.models import HsJob
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """A job failed for a reason the client should see (e.g. unknown HS code)."""
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class HSJobService:
+    """
+    Runs slow HS requests (analyze, predict, chapter) in the background.
+
+    Jobs are rows in hs_job, so any worker can answer a poll, but they run on
+    a bounded thread pool in the process that accepted them. A request equal
+    to a queued, running or finished (unexpired, non-degraded) job returns
+    that job instead of starting another. Results are kept for
+    HS_JOB_RESULT_TTL seconds.
+
+    A job running for longer than HS_JOB_STALE_SECONDS, or queued in a
+    process that has not started a job (heartbeat) for that long, is marked
+    failed, e.g. after its process restarted. A job failed that way is never
+    picked up or overwritten afterwards.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int, max_pending: int, ttl: float, stale_seconds: float):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hs-job")
+        self._lock = threading.Lock()
+        self._events = {}
+        self._last_purge = 0.0
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_workers=settings.HS_JOB_MAX_WORKERS,
+                        max_pending=settings.HS_JOB_MAX_PENDING,
+                        ttl=settings.HS_JOB_RESULT_TTL,
+                        stale_seconds=settings.HS_JOB_STALE_SECONDS,
+                    )
+        return cls._instance
+
+    @staticmethod
+    def dedup_key(kind, params):
+        raw = json.dumps([kind, params], sort_keys=True, cls=DjangoJSONEncoder)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    # -- submit -----------------------------------------------------------
+
+    def submit(self, kind, params, fn):
+        """
+        Return (job, created). fn(params) runs on the pool and returns the
+        JSON result; raise JobError for a failure the client should see.
+        """
+        self.purge_expired()
+        key = self.dedup_key(kind, params)
+
+        existing = self.find_reusable(key)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing, False
+
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                raise JobQueueFull(f"{len(self._events)} jobs pending")
+
+            try:
+                with transaction.atomic():
+                    job = HsJob.objects.create(kind=kind, params=params, dedup_key=key)
+            except IntegrityError:
+                # Lost a race with an identical submit.
+                existing = self.find_reusable(key)
+                if existing is None:
+                    raise
+                self.deduplicated += 1
+                return existing, False
+
+            self._events[job.id] = threading.Event()
+            self.submitted += 1
+
+        self._executor.submit(self.run, job.id, fn, params)
+        return job, True
+
+    def find_reusable(self, key):
+        now = timezone.now()
+
+        for job in HsJob.objects.filter(dedup_key=key, status__in=HsJob.ACTIVE):
+            if not self.expire_stale(job, now):
+                return job
+
+        return (
+            HsJob.objects.filter(dedup_key=key, status=HsJob.DONE, expires_at__gt=now)
+            # Not exclude(result__degraded=True): on Postgres its NULL guard
+            # also drops results without the key.
+            .filter(~Q(result__has_key="degraded") | Q(result__degraded=False))
+            .order_by("-finished_at")
+            .first()
+        )
+
+    # -- run --------------------------------------------------------------
+
+    def run(self, job_id, fn, params):
+        close_old_connections()
+        try:
+            claimed = HsJob.objects.filter(id=job_id, status=HsJob.PENDING).update(
+                status=HsJob.RUNNING, started_at=timezone.now()
+            )
+            if not claimed:
+                # Already failed as stale; a newer job may be running it.
+                return
+            self.heartbeat()
+            try:
+                result = fn(params)
+            except JobError as e:
+                self.finish(job_id, HsJob.FAILED, error=str(e))
+            except Exception:
+                logger.exception("HS job %s failed", job_id)
+                self.finish(job_id, HsJob.FAILED, error="internal error")
+            else:
+                self.finish(job_id, HsJob.DONE, result=result)
+        finally:
+            with self._lock:
+                event = self._events.pop(job_id, None)
+            if event is not None:
+                event.set()
+            close_old_connections()
+
+    def finish(self, job_id, status, result=None, error=None):
+        now = timezone.now()
+        updated = HsJob.objects.filter(id=job_id, status=HsJob.RUNNING).update(
+            status=status,
+            result=result,
+            error=error,
+            finished_at=now,
+            expires_at=now + timedelta(seconds=self.ttl),
+        )
+        if not updated:
+            logger.warning("HS job %s finished after it was failed as stale", job_id)
+        elif status == HsJob.DONE:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def heartbeat(self):
+        """Mark the jobs queued in this process as still owned."""
+        with self._lock:
+            queued = list(self._events)
+        HsJob.objects.filter(id__in=queued, status=HsJob.PENDING).update(
+            heartbeat_at=timezone.now()
+        )
+
+    # -- read -------------------------------------------------------------
+
+    def expire_stale(self, job, now):
+        """Fail a queued/running job nobody is working on any more."""
+        if job.status == HsJob.RUNNING:
+            since = job.started_at
+        elif job.status == HsJob.PENDING:
+            if job.id in self._events:
+                # Queued here, and this process is alive.
+                return False
+            since = job.heartbeat_at or job.created_at
+        else:
+            return False
+        if since > now - timedelta(seconds=self.stale_seconds):
+            return False
+
+        job.status = HsJob.FAILED
+        job.error = "job was not completed (worker restarted or timed out)"
+        job.finished_at = now
+        job.expires_at = now + timedelta(seconds=self.ttl)
+        HsJob.objects.filter(id=job.id, status__in=HsJob.ACTIVE).update(
+            status=job.status, error=job.error, finished_at=now, expires_at=job.expires_at
+        )
+        return True
+
+    def get(self, job_id):
+        """The job, or None when it does not exist or its result has expired."""
+        job = HsJob.objects.filter(id=job_id).first()
+        if job is None:
+            return None
+
+        now = timezone.now()
+        if job.expires_at is not None and job.expires_at <= now:
+            return None
+
+        self.expire_stale(job, now)
+        return job
+
+    def wait(self, job_id, timeout):
+        """get(), waiting up to `timeout` seconds for the job to finish."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            left = deadline - time.monotonic()
+            if job is None or job.status not in HsJob.ACTIVE or left <= 0:
+                return job
+
+            # Jobs running in this process wake the waiter directly; others
+            # are polled.
+            event = self._events.get(job.id)
+            if event is not None:
+                event.wait(left)
+            else:
+                time.sleep(min(settings.HS_JOB_POLL_INTERVAL, left))
+
+    async def await_job(self, job_id, timeout):
+        """Async form of wait() that does not hold a thread between polls."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await sync_to_async(self.get)(job_id)
+            left = deadline - time.monotonic()
+            if job is None or job.status not in HsJob.ACTIVE or left <= 0:
+                return job
+            await asyncio.sleep(min(settings.HS_JOB_POLL_INTERVAL, left))
+
+    # -- housekeeping -----------------------------------------------------
+
+    def purge_expired(self):
+        """Delete expired jobs, at most once per HS_JOB_PURGE_INTERVAL."""
+        now = time.monotonic()
+        if now - self._last_purge < settings.HS_JOB_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+
+        deleted, _ = HsJob.objects.filter(expires_at__lte=timezone.now()).delete()
+        if deleted:
+            logger.info("Purged %s expired HS jobs", deleted)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._events)
+        return {
+            "pending": pending,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
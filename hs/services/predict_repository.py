@@ -1,13 +1,21 @@
-from django.db import connection
+from django.conf import settings
+from api.db_routing import read_connection, replica_reads
 from typing import List, Dict
+from hs.services.hs_vector_index import HSVectorIndex
+from api.services.metrics import timed
 
 
 class HSPredictRepository:
 
+    @timed("hs_candidates")
+    @replica_reads
     def hybrid_search(
         self, query: str, embedding: List[float], schedule_type: str, limit=10
     ):
 
+        if settings.HS_VECTOR_INDEX_ENABLED:
+            return self.indexed_hybrid_search(query, embedding, schedule_type, limit)
+
         sql = """
         SELECT
             id,
@@ -16,10 +24,7 @@ class HSPredictRepository:
             chapter_num,
             policy,
             1 - (embedding <=> %s::vector) AS vector_score,
-            ts_rank(
-                to_tsvector('english', description),
-                plainto_tsquery('english', %s)
-            ) AS fts_score
+            ts_rank(search_vector, plainto_tsquery('english', %s)) AS fts_score
         FROM itc_hs_master
         WHERE schedule_type = %s
         ORDER BY embedding <=> %s::vector
@@ -28,7 +33,7 @@ class HSPredictRepository:
 
         params = [embedding, query, schedule_type, embedding, limit]
 
-        with connection.cursor() as cur:
+        with read_connection().cursor() as cur:
             cur.execute(sql, params)
             rows = cur.fetchall()
 
@@ -47,3 +52,151 @@ class HSPredictRepository:
             )
 
         return results
+
+    def indexed_hybrid_search(
+        self, query: str, embedding: List[float], schedule_type: str, limit=10
+    ) -> List[Dict]:
+        """
+        Same result as hybrid_search, with vector candidates taken from the
+        in-memory HSVectorIndex. Only the ts_rank of those candidates is read
+        from Postgres, as a primary-key lookup instead of a table scan.
+        """
+
+        hits = HSVectorIndex.get_instance().search(embedding, schedule_type, limit)
+        if not hits:
+            return []
+
+        with read_connection().cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, ts_rank(search_vector, plainto_tsquery('english', %s))
+                FROM itc_hs_master
+                WHERE id = ANY(%s::uuid[])
+                """,
+                [query, [str(h["id"]) for h in hits]],
+            )
+            fts_scores = {str(r[0]): float(r[1]) for r in cur.fetchall()}
+
+        return [
+            {
+                "id": h["id"],
+                "hs_code": h["hs_code"],
+                "description": h["description"],
+                "chapter": h["chapter"],
+                "policy": h["policy"],
+                "vector_score": 1.0 - h["distance"],
+                "fts_score": fts_scores.get(str(h["id"]), 0.0),
+            }
+            for h in hits
+        ]
+
+    @timed("hs_candidates")
+    @replica_reads
+    def batch_hybrid_search(
+        self, queries: List[str], embeddings: List[List[float]], schedule_type: str, limit=10
+    ) -> List[List[Dict]]:
+        """
+        hybrid_search for many queries against one schedule_type in a single
+        round trip: the candidate lists come back in the order of `queries`.
+        """
+
+        if not queries:
+            return []
+
+        if settings.HS_VECTOR_INDEX_ENABLED:
+            return self.indexed_batch_hybrid_search(queries, embeddings, schedule_type, limit)
+
+        sql = """
+        SELECT
+            q.idx,
+            c.id,
+            c.hs_code,
+            c.description,
+            c.chapter_num,
+            c.policy,
+            1 - c.distance AS vector_score,
+            ts_rank(c.search_vector, plainto_tsquery('english', q.query)) AS fts_score
+        FROM unnest(%s::int[], %s::text[], %s::text[]) AS q(idx, query, embedding)
+        CROSS JOIN LATERAL (
+            SELECT id, hs_code, description, chapter_num, policy, search_vector,
+                   embedding <=> q.embedding::vector AS distance
+            FROM itc_hs_master
+            WHERE schedule_type = %s
+            ORDER BY embedding <=> q.embedding::vector
+            LIMIT %s
+        ) c
+        ORDER BY q.idx, c.distance;
+        """
+
+        params = [
+            list(range(len(queries))),
+            list(queries),
+            ["[" + ",".join(map(str, e)) + "]" for e in embeddings],
+            schedule_type,
+            limit,
+        ]
+
+        with read_connection().cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+
+        results = [[] for _ in queries]
+        for r in rows:
+            results[r[0]].append(
+                {
+                    "id": r[1],
+                    "hs_code": r[2],
+                    "description": r[3],
+                    "chapter": r[4],
+                    "policy": r[5],
+                    "vector_score": float(r[6]),
+                    "fts_score": float(r[7]),
+                }
+            )
+
+        return results
+
+    def indexed_batch_hybrid_search(
+        self, queries: List[str], embeddings: List[List[float]], schedule_type: str, limit=10
+    ) -> List[List[Dict]]:
+        """
+        Batch form of indexed_hybrid_search: one matrix product for the vector
+        candidates of every query, one primary-key lookup for all ts_ranks.
+        """
+
+        batch_hits = HSVectorIndex.get_instance().search_many(embeddings, schedule_type, limit)
+
+        pairs = [(i, str(h["id"])) for i, hits in enumerate(batch_hits) for h in hits]
+        if not pairs:
+            return [[] for _ in queries]
+
+        with read_connection().cursor() as cur:
+            cur.execute(
+                """
+                SELECT q.idx, q.id, ts_rank(m.search_vector, plainto_tsquery('english', q.query))
+                FROM unnest(%s::int[], %s::uuid[], %s::text[]) AS q(idx, id, query)
+                JOIN itc_hs_master m ON m.id = q.id
+                """,
+                [
+                    [i for i, _ in pairs],
+                    [hs_id for _, hs_id in pairs],
+                    [queries[i] for i, _ in pairs],
+                ],
+            )
+            fts_scores = {(r[0], str(r[1])): float(r[2]) for r in cur.fetchall()}
+
+        return [
+            [
+                {
+                    "id": h["id"],
+                    "hs_code": h["hs_code"],
+                    "description": h["description"],
+                    "chapter": h["chapter"],
+                    "policy": h["policy"],
+                    "vector_score": 1.0 - h["distance"],
+                    "fts_score": fts_scores.get((i, str(h["id"])), 0.0),
+                }
+                for h in hits
+            ]
+            for i, hits in enumerate(batch_hits)
+        ]
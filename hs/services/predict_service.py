@@ -1,20 +1,29 @@
 import re
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from api.services.vector_service import VectorService
 from api.services.llm_service import LLMService
 from hs.services.predict_repository import HSPredictRepository
+from hs.services.hs_registry import HSRegistry
 from hs.services.prompt_service import build_predict_prompt
+from api.services.metrics import timed
 
 
 class HSPredictService:
 
     HS_CODE_REGEX = r"\b\d{4,10}\b"
+    VECTOR_WEIGHT = 0.7
+    FTS_WEIGHT = 0.3
+    TOP_N = 5
 
     def __init__(self):
         self.vector = VectorService()
         self.repo = HSPredictRepository()
         self.llm = LLMService()
 
-    def predict(self, description: str, schedule_type: str):
+    @timed("rank")
+    def rank(self, description: str, schedule_type: str):
+        """Top candidates by weighted vector/fts score ([] when nothing matches)."""
 
         embedding = self.vector.embed(description)
 
@@ -25,26 +34,68 @@ class HSPredictService:
             limit=10,
         )
 
-        if not candidates:
-            return {"error": "No matching HS codes found."}
-
         # Weighted score
         for c in candidates:
-            c["final_score"] = 0.7 * c["vector_score"] + 0.3 * c["fts_score"]
+            c["final_score"] = (
+                self.VECTOR_WEIGHT * c["vector_score"] + self.FTS_WEIGHT * c["fts_score"]
+            )
 
         candidates.sort(key=lambda x: x["final_score"], reverse=True)
 
-        top_candidates = candidates[:5]
+        return candidates[: self.TOP_N]
 
-        # LLM reasoning (restricted)
-        explanation = self.llm.get_reasoning(
+    def predict(self, description: str, schedule_type: str):
+
+        top_candidates = self.rank(description, schedule_type)
+
+        if not top_candidates:
+            return {"error": "No matching HS codes found."}
+
+        return self.select(description, top_candidates, schedule_type=schedule_type)
+
+    async def apredict(self, description: str, schedule_type: str):
+        """predict() with retrieval on a worker thread and a non-blocking LLM call."""
+
+        top_candidates = await sync_to_async(self.rank)(description, schedule_type)
+
+        if not top_candidates:
+            return {"error": "No matching HS codes found."}
+
+        explanation = await self.llm.atry_reasoning(
             query=build_predict_prompt(description, top_candidates), context=""
         )
 
-        selected_code = self.extract_code(explanation)
+        result = await sync_to_async(self.choose)(top_candidates, explanation, schedule_type)
+        if explanation is None:
+            result["degraded"] = True
+
+        return result
+
+    def select(
+        self, description: str, top_candidates, explain: bool = True, schedule_type: str = None
+    ):
+
+        # LLM reasoning (restricted)
+        explanation = None
+        if explain:
+            explanation = self.llm.try_reasoning(
+                query=build_predict_prompt(description, top_candidates), context=""
+            )
+
+        result = self.choose(top_candidates, explanation, schedule_type)
+
+        # LLM unavailable: the top-ranked candidate, without an explanation
+        if explain and explanation is None:
+            result["degraded"] = True
+
+        return result
+
+    def choose(self, top_candidates, explanation, schedule_type: str = None):
+
+        selected_code = self.extract_code(explanation) if explanation else None
 
         # Validate selection
-        valid_codes = [c["hs_code"] for c in top_candidates]
+        valid_codes = {c["hs_code"] for c in top_candidates}
 
         if selected_code not in valid_codes:
             # deterministic fallback
@@ -59,8 +110,19 @@ class HSPredictService:
             "confidence": round(selected["final_score"], 3),
             "top_matches": top_candidates,
             "explanation": explanation,
+            "hierarchy": self.hierarchy(selected["hs_code"], schedule_type),
         }
 
+    def hierarchy(self, hs_code, schedule_type):
+        """Chapter / heading / subheading path above the selected code."""
+        if not settings.HS_REGISTRY_ENABLED or not schedule_type:
+            return []
+
+        return [
+            {"hs_code": r.hs_code, "description": r.description}
+            for r in HSRegistry.get_instance().ancestors(hs_code, schedule_type)
+        ]
+
     def extract_code(self, text):
         match = re.search(self.HS_CODE_REGEX, text)
         return match.group() if match else None
@@ -1,34 +1,44 @@
 from hs.models import ItcHsMaster
 from api.services.vector_service import VectorService
+from api.services.retrieval_orchestrator import RetrievalOrchestrator, RetrievalStage
+from api.services.context_packer import ContextPacker
+from api.services.metrics import timed
 
 
 class HSRAGService:
 
     def __init__(self):
         self.vector_service = VectorService()
+        self.orchestrator = RetrievalOrchestrator()
+        self.packer = ContextPacker()
 
+    @timed("retrieve")
     def build_context_for_hs(self, hs_record: ItcHsMaster):
 
-        structured_context = f"""
-HS Code: {hs_record.hs_code}
+        structured_context = f"""HS Code: {hs_record.hs_code}
 Description: {hs_record.description}
 Policy: {hs_record.policy}
 Policy Conditions: {hs_record.policy_conditions}
-Chapter: {hs_record.chapter_num}
-        """
-
-        vector_docs = self.vector_service.find_context(
-            query=hs_record.description, limit=5
+Chapter: {hs_record.chapter_num}"""
+
+        # On timeout or failure the analysis continues on structured data only.
+        vector_docs = self.orchestrator.run(
+            RetrievalStage(
+                "vector",
+                lambda: self.vector_service.find_context(
+                    query=hs_record.description, limit=5
+                ),
+                fallback=[],
+            )
+        )["vector"]
+
+        packed = self.packer.pack_sections(
+            [
+                ("STRUCTURED DATA", [structured_context]),
+                ("REGULATORY DOCUMENTS", [doc["content"] for doc in vector_docs]),
+            ],
+            records=("STRUCTURED DATA",),
         )
+        vector_docs = [vector_docs[i] for i in packed.kept_indices("REGULATORY DOCUMENTS")]
 
-        semantic_context = "\n\n".join([doc["content"] for doc in vector_docs])
-
-        combined_context = f"""
-STRUCTURED DATA:
-{structured_context}
-
-REGULATORY DOCUMENTS:
-{semantic_context}
-        """
-
-        return combined_context, vector_docs
+        return packed.text, vector_docs
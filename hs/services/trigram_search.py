@@ -0,0 +1,132 @@
+import threading
+import time
+from typing import List
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from api.services.data_version import DataVersionService
+from api.services.metrics import timed
+from hs.models import ItcHsMaster
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class HSNgramIndex:
+    """
+    In-process trigram inverted index over itc_hs_master descriptions.
+
+    Fallback for databases without pg_trgm (e.g. SQLite in development).
+    Every string containing the query also contains all of the query's
+    trigrams, so intersecting their posting sets gives an exact candidate
+    set that only needs a final substring check. Rebuilt when the
+    itc_hs_master data version (the row count, off Postgres) changes, and
+    at least every HS_NGRAM_INDEX_TTL seconds to pick up in-place updates.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._version = None
+        self._expires = 0.0
+        self._rows = []
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def fresh(self, version):
+        return version == self._version and time.monotonic() < self._expires
+
+    def ensure_fresh(self):
+        version = DataVersionService.get_version("itc_hs_master")
+        if self.fresh(version):
+            return
+
+        with self._lock:
+            if self.fresh(version):
+                return
+
+            rows = [
+                (pk, hs_code, schedule_type, (description or "").upper())
+                for pk, hs_code, schedule_type, description in ItcHsMaster.objects.using(
+                    DEFAULT_DB_ALIAS
+                ).values_list(
+                    "id", "hs_code", "schedule_type", "description"
+                )
+            ]
+
+            postings = {}
+            for position, row in enumerate(rows):
+                for gram in trigrams(row[3]):
+                    postings.setdefault(gram, set()).add(position)
+
+            self._rows, self._postings, self._version = rows, postings, version
+            self._expires = time.monotonic() + settings.HS_NGRAM_INDEX_TTL
+
+    @timed("hs_trigram")
+    def search_ids(self, query: str, schedule_type: str = None, limit: int = 20):
+        self.ensure_fresh()
+
+        needle = query.upper()
+        grams = trigrams(needle)
+        rows, postings = self._rows, self._postings
+
+        if grams:
+            sets = sorted((postings.get(g, set()) for g in grams), key=len)
+            candidates = set.intersection(*sets) if sets[0] else set()
+        else:
+            candidates = range(len(rows))
+
+        scored = []
+        for position in candidates:
+            pk, hs_code, row_schedule, description = rows[position]
+            if schedule_type and row_schedule != schedule_type:
+                continue
+            if needle not in description:
+                continue
+
+            row_grams = trigrams(description)
+            union = len(grams | row_grams)
+            score = len(grams & row_grams) / union if union else 0.0
+            scored.append((-score, hs_code, pk))
+
+        scored.sort()
+        return [pk for _, _, pk in scored[:limit]]
+
+
+class HSTrigramSearch:
+    """
+    Substring search over HS descriptions ranked by trigram similarity.
+
+    On Postgres the filter is served by the pg_trgm GIN index on
+    UPPER(description) (migration hs.0003) and rows are ranked by
+    word_similarity; elsewhere the in-process HSNgramIndex is used.
+    """
+
+    def search(self, query: str, schedule_type: str = None, limit: int = 20) -> List[ItcHsMaster]:
+
+        if connection.vendor != "postgresql":
+            ids = HSNgramIndex.get_instance().search_ids(query, schedule_type, limit)
+            records = ItcHsMaster.objects.in_bulk(ids)
+            return [records[pk] for pk in ids if pk in records]
+
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        queryset = ItcHsMaster.objects.filter(description__icontains=query)
+        if schedule_type:
+            queryset = queryset.filter(schedule_type=schedule_type)
+
+        return list(
+            queryset.annotate(similarity=TrigramWordSimilarity(query, "description"))
+            .order_by("-similarity", "hs_code")[:limit]
+        )
@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from hs.services.batch_predict_service import HSBatchPredictService, parse_csv, parse_ndjson
+from hs.views.predict import ndjson_lines
+
+
+class FakePredictor:
+    """Stands in for HSPredictService: one candidate per item, a gated LLM step."""
+
+    VECTOR_WEIGHT = 0.7
+    FTS_WEIGHT = 0.3
+    TOP_N = 5
+
+    def __init__(self):
+        self.vector = self
+        self.repo = self
+        self.gate = threading.Event()
+        self.gate.set()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    def embed_many(self, texts):
+        return [[1.0] for _ in texts]
+
+    def batch_hybrid_search(self, queries, embeddings, schedule_type, limit):
+        return [
+            [] if "unknown" in q else [{"hs_code": "08045020", "vector_score": 0.9, "fts_score": 0.1}]
+            for q in queries
+        ]
+
+    def select(self, description, candidates, explain=True):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if description != "fast":
+                self.gate.wait(5)
+            if description == "broken" and explain:
+                raise RuntimeError("gateway at http://10.0.0.5 refused")
+            return {"predicted_hs_code": candidates[0]["hs_code"]}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def hierarchy(self, hs_code, schedule_type):
+        return []
+
+
+class FakeBatchService(HSBatchPredictService):
+
+    def __init__(self, chunk_size=64, max_lines=1000, concurrency=2):
+        self.predictor = FakePredictor()
+        self.chunk_size = chunk_size
+        self.max_lines = max_lines
+        self.concurrency = concurrency
+        self.candidates = 10
+
+
+def items(*descriptions):
+    return [
+        {"line": i, "id": None, "description": d, "schedule_type": "import"}
+        for i, d in enumerate(descriptions, start=1)
+    ]
+
+
+class BatchPredictStreamTests(SimpleTestCase):
+
+    def test_llm_calls_are_bounded_by_concurrency(self):
+        service = FakeBatchService(concurrency=2)
+
+        results = list(service.predict_stream(items(*["mango"] * 10)))
+
+        self.assertEqual(sorted(r["line"] for r in results), list(range(1, 11)))
+        self.assertLessEqual(service.predictor.max_running, 2)
+
+    def test_disconnect_does_not_wait_for_queued_calls(self):
+        service = FakeBatchService(concurrency=2)
+        predictor = service.predictor
+        predictor.gate.clear()
+
+        stream = service.predict_stream(items("fast", *["mango"] * 20))
+        self.assertEqual(next(stream)["line"], 1)
+
+        started = time.monotonic()
+        stream.close()
+        self.assertLess(time.monotonic() - started, 1)
+
+        predictor.gate.set()
+        time.sleep(0.1)
+        # Only the calls already running were made, not the whole chunk.
+        self.assertLessEqual(predictor.calls, 1 + 2)
+
+
+class BatchPredictErrorLineTests(SimpleTestCase):
+
+    def test_ndjson_parse_errors(self):
+        lines = [
+            '{"description": "Mangoes", "id": "a"}\n',
+            "not json\n",
+            "[1, 2]\n",
+            "\n",
+            '{"description": ""}\n',
+            '{"description": "Rice", "schedule_type": "transit"}\n',
+        ]
+
+        parsed = list(parse_ndjson(lines, "import"))
+
+        self.assertEqual(parsed[0], {"line": 1, "id": "a", "description": "Mangoes", "schedule_type": "import"})
+        self.assertEqual(
+            [(p["line"], p.get("error")) for p in parsed[1:]],
+            [
+                (2, "invalid JSON"),
+                (3, "expected a JSON object"),
+                (5, "description required"),
+                (6, "schedule_type must be import/export"),
+            ],
+        )
+
+    def test_csv_rows_carry_their_line_number(self):
+        parsed = list(parse_csv(["description,schedule_type\n", "Mangoes,export\n", ",import\n"]))
+
+        self.assertEqual(parsed[0]["schedule_type"], "export")
+        self.assertEqual((parsed[1]["line"], parsed[1]["error"]), (3, "description required"))
+
+    def test_stream_error_lines(self):
+        service = FakeBatchService()
+        invalid = {"line": 3, "error": "invalid JSON"}
+
+        results = list(service.predict_stream(items("mango", "unknown thing") + [invalid]))
+        by_line = {r["line"]: r for r in results}
+
+        self.assertEqual(by_line[1]["predicted_hs_code"], "08045020")
+        self.assertEqual(by_line[2]["error"], "No matching HS codes found.")
+        self.assertEqual(by_line[3], invalid)
+
+    def test_failed_explanation_falls_back_without_leaking(self):
+        service = FakeBatchService()
+
+        with self.assertLogs("hs.services.batch_predict_service", "ERROR"):
+            [result] = list(service.predict_stream(items("broken")))
+
+        self.assertEqual(result["predicted_hs_code"], "08045020")
+        self.assertEqual(result["explanation_error"], "explanation unavailable")
+
+    def test_line_limit(self):
+        service = FakeBatchService(chunk_size=2, max_lines=3)
+
+        results = list(service.predict_stream(items(*["mango"] * 5), explain=False))
+
+        self.assertEqual(sorted(r["line"] for r in results if r["line"]), [1, 2, 3])
+        self.assertEqual(results[-1], {"line": None, "error": "batch limit of 3 lines exceeded"})
+
+    def test_stream_failure_ends_with_a_generic_error_line(self):
+        def results():
+            yield {"line": 1, "predicted_hs_code": "08045020"}
+            raise RuntimeError("connection to postgres://user:secret@db failed")
+
+        with self.assertLogs("hs.views.predict", "ERROR"):
+            lines = [json.loads(line) for line in ndjson_lines(results())]
+
+        self.assertEqual(lines[-1], {"line": None, "error": "Internal server error"})
@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from hs.models import HsChapterOverview
+from hs.services.chapter_service import HSChapterService
+from hs.views.chapter import HSChapterAsyncView, HSChapterView, chapter_payload
+
+
+class FakeLLM:
+
+    def __init__(self, answer="Chapter 8 covers edible fruit."):
+        self.answer = answer
+        self.calls = 0
+
+    def try_reasoning(self, query, context):
+        self.calls += 1
+        return self.answer
+
+    async def atry_reasoning(self, query, context):
+        return self.try_reasoning(query, context)
+
+
+def record(hs_code, description):
+    return SimpleNamespace(hs_code=hs_code, description=description, policy="Free")
+
+
+RECORDS = [record("08", "Edible fruit and nuts"), record("0804", "Dates, figs, mangoes")]
+
+
+@override_settings(HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS=True)
+class ChapterOverviewTests(TestCase):
+
+    def service(self, llm=None):
+        service = HSChapterService()
+        service.llm = llm or FakeLLM()
+        return service
+
+    def test_miss_generates_and_stores(self):
+        service = self.service()
+
+        overview = service.get_overview(8, "import", RECORDS)
+
+        self.assertEqual(overview, "Chapter 8 covers edible fruit.")
+        stored = HsChapterOverview.objects.get(chapter_num=8, schedule_type="import")
+        self.assertEqual(stored.source_hash, service.source_hash(8, RECORDS))
+
+    def test_current_overview_is_served_without_the_llm(self):
+        self.service().get_overview(8, "import", RECORDS)
+        service = self.service(FakeLLM("unused"))
+
+        self.assertEqual(service.get_overview(8, "import", RECORDS), "Chapter 8 covers edible fruit.")
+        self.assertEqual(service.llm.calls, 0)
+
+    def test_changed_records_make_the_overview_stale(self):
+        self.service().get_overview(8, "import", RECORDS)
+        changed = RECORDS + [record("0805", "Citrus fruit")]
+        service = self.service(FakeLLM("Chapter 8 now covers citrus too."))
+
+        self.assertNotEqual(service.source_hash(8, changed), service.source_hash(8, RECORDS))
+        self.assertEqual(service.get_overview(8, "import", changed), "Chapter 8 now covers citrus too.")
+        self.assertEqual(HsChapterOverview.objects.count(), 1)
+        # The other schedule has its own entry.
+        self.assertEqual(service.get_overview(8, "export", RECORDS), "Chapter 8 now covers citrus too.")
+        self.assertEqual(HsChapterOverview.objects.count(), 2)
+
+    @override_settings(HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS=False)
+    def test_stale_overview_is_not_served_when_generation_is_off(self):
+        service = self.service()
+        service.store_overview(8, "import", service.source_hash(8, RECORDS[:1]), "Old overview")
+
+        self.assertIsNone(service.get_overview(8, "import", RECORDS))
+        self.assertEqual(service.llm.calls, 0)
+        self.assertNotIn("degraded", chapter_payload(8, RECORDS, None))
+
+    def test_llm_unavailable_is_not_stored(self):
+        service = self.service(FakeLLM(None))
+
+        self.assertIsNone(service.get_overview(8, "import", RECORDS))
+        self.assertFalse(HsChapterOverview.objects.exists())
+        self.assertTrue(chapter_payload(8, RECORDS, None)["degraded"])
+
+    def test_empty_chapter_is_neither_generated_nor_stored(self):
+        service = self.service()
+
+        self.assertIsNone(service.get_overview(8, "import", []))
+        self.assertEqual(service.llm.calls, 0)
+        self.assertFalse(HsChapterOverview.objects.exists())
+        self.assertNotIn("degraded", chapter_payload(8, [], None))
+
+    async def test_async_path_shares_the_miss_logic(self):
+        service = self.service()
+        service.get_chapter_codes = lambda chapter_num, schedule_type: list(RECORDS)
+
+        records, overview = await service.aget_chapter(8, "import")
+
+        self.assertEqual(overview, "Chapter 8 covers edible fruit.")
+        stored = await HsChapterOverview.objects.aget(chapter_num=8, schedule_type="import")
+        self.assertEqual(stored.source_hash, service.source_hash(8, records))
+
+        service.get_chapter_codes = lambda chapter_num, schedule_type: []
+        self.assertEqual(await service.aget_chapter(9, "import"), ([], None))
+        self.assertEqual(service.llm.calls, 1)
+
+
+class ChapterViewTests(SimpleTestCase):
+
+    def request(self):
+        request = APIRequestFactory().get("/api/v1/hs/chapter/8/", {"schedule_type": "transit"})
+        force_authenticate(request, user=SimpleNamespace(is_authenticated=True))
+        return request
+
+    def test_unknown_schedule_type_is_rejected(self):
+        response = HSChapterView.as_view()(self.request(), chapter_num=8)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("schedule_type", response.data)
+
+    async def test_async_unknown_schedule_type_is_rejected(self):
+        response = await HSChapterAsyncView.as_view()(self.request(), chapter_num=8)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("schedule_type", response.data)
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import uuid
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from api.db_routing import ReplicaSet
+from hs.models import ItcHsMaster
+from hs.services.export_service import COLUMNS, HSExportService
+
+
+class HSExportServiceTests(TransactionTestCase):
+    """itc_hs_master is unmanaged, so the test creates and drops it."""
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(ItcHsMaster)
+        self.addCleanup(self.drop_table)
+
+        # Duplicate codes, so the order and the keyset need the id.
+        ItcHsMaster.objects.bulk_create(
+            ItcHsMaster(
+                id=uuid.UUID(int=i),
+                hs_code=f"0804{i // 2:04d}",
+                description=f"Item {i}",
+                policy="Free",
+                schedule_type="import" if i < 9 else "export",
+                chapter_num=8,
+                hs_level=8,
+                metadata={"i": i},
+            )
+            for i in range(11)
+        )
+
+        ReplicaSet._instance, previous = ReplicaSet([], 30, 5, 30), ReplicaSet._instance
+        self.addCleanup(setattr, ReplicaSet, "_instance", previous)
+
+        self.service = HSExportService()
+        self.service.chunk_size = 2
+
+    def drop_table(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(ItcHsMaster)
+
+    def export(self, output="ndjson"):
+        return b"".join(self.service.stream(output, schedule_type="import"))
+
+    def test_ndjson_in_code_order(self):
+        rows = [json.loads(line) for line in self.export().splitlines()]
+
+        self.assertEqual([r["description"] for r in rows], [f"Item {i}" for i in range(9)])
+        self.assertEqual(list(rows[0]), list(COLUMNS))
+        self.assertEqual(rows[0]["metadata"], {"i": 0})
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export("csv").decode())))
+
+        self.assertEqual(rows[0], list(COLUMNS))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(json.loads(rows[1][-1]), {"i": 0})
+
+    def test_keyset_pages_without_server_side_cursors(self):
+        expected = self.export()
+        connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"] = True
+        self.addCleanup(connection.settings_dict.pop, "DISABLE_SERVER_SIDE_CURSORS")
+
+        self.assertEqual(self.export(), expected)
+
+    def test_replica_failure_resumes_on_default(self):
+        expected = self.export()
+        # default stands in for the replica; it fails after two batches.
+        replicas = ReplicaSet._instance = ReplicaSet(["default"], 30, 5, 30)
+        read = self.service.read
+        failed = []
+
+        def flaky(alias, filters, after=None):
+            for i, batch in enumerate(read(alias, filters, after)):
+                if i == 2 and not failed:
+                    failed.append(alias)
+                    raise OperationalError("replica went away")
+                yield batch
+
+        self.service.read = flaky
+
+        self.assertEqual(self.export(), expected)
+        self.assertEqual(failed, ["default"])
+        self.assertEqual(replicas.failovers, 1)
@@ -0,0 +1,121 @@
+import time
+import uuid
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from hs.models import ItcHsMaster
+from hs.services.hs_registry import HSRegistry, HSRegistryPartition
+
+# (hs_code, description, hs_level); 0804 has no 6-digit row of its own.
+CODES = [
+    ("08", "Edible fruit and nuts", 2),
+    ("0803", "Bananas", 4),
+    ("08030010", "Bananas, fresh", 8),
+    ("0804", "Dates, figs, mangoes", 4),
+    ("08045020", "Mangoes, fresh", 8),
+    ("08045030", "Mangoes, dried", 8),
+    ("09", "Coffee, tea and spices", 2),
+]
+
+
+def rows(schedule_type="import"):
+    return [
+        (uuid.uuid4(), code, description, "Free", None, schedule_type, int(code[:2]), code[:-2] or None, level)
+        for code, description, level in CODES
+    ]
+
+
+def registry(partitions):
+    registry = HSRegistry(refresh_interval=3600)
+    registry._partitions = {
+        schedule_type: HSRegistryPartition(schedule_type, part_rows)
+        for schedule_type, part_rows in partitions.items()
+    }
+    registry._version = "test"
+    registry._checked_at = time.monotonic()
+    return registry
+
+
+def codes(records):
+    return [r.hs_code for r in records]
+
+
+class HSRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = registry({"import": rows(), "export": rows("export")[:3]})
+
+    def test_chapters_are_the_children_of_the_root(self):
+        self.assertEqual(codes(self.registry.children("", "import")), ["08", "09"])
+
+    def test_children_step_through_missing_levels(self):
+        self.assertEqual(codes(self.registry.children("08", "import")), ["0803", "0804"])
+        self.assertEqual(codes(self.registry.children("0804", "import")), ["08045020", "08045030"])
+        self.assertEqual(codes(self.registry.children("080450", "import")), ["08045020", "08045030"])
+
+    def test_unknown_prefix_and_schedule(self):
+        self.assertEqual(self.registry.children("07", "import"), [])
+        self.assertEqual(self.registry.children("08", "transit"), [])
+        self.assertEqual(self.registry.descendants("0804", "transit"), [])
+
+    def test_descendants_with_levels(self):
+        self.assertEqual(
+            codes(self.registry.descendants("08", "import")),
+            ["0803", "08030010", "0804", "08045020", "08045030"],
+        )
+        self.assertEqual(
+            codes(self.registry.descendants("08", "import", levels=(8,))),
+            ["08030010", "08045020", "08045030"],
+        )
+
+    def test_ancestors_chapter_first(self):
+        self.assertEqual(codes(self.registry.ancestors("08045020", "import")), ["08", "0804"])
+        self.assertEqual(self.registry.ancestors("08", "import"), [])
+
+    def test_lookup_and_validation_per_schedule(self):
+        record = self.registry.get("08045020", "import")
+        self.assertEqual((record.description, record.chapter_num, record.hs_level), ("Mangoes, fresh", 8, 8))
+
+        self.assertTrue(self.registry.is_valid("08045020", "import"))
+        self.assertFalse(self.registry.is_valid("08045020", "export"))
+        self.assertIsNone(self.registry.get("08045020", "export"))
+        self.assertEqual(
+            self.registry.valid_codes(["08045020", "99999999", "0803"], "import"), {"08045020", "0803"}
+        )
+        self.assertEqual(codes(self.registry.get_many(["0803", "08", "nope"], "import")), ["08", "0803"])
+
+    def test_chapter(self):
+        self.assertEqual(codes(self.registry.chapter(8, "import", levels=(2, 4))), ["08", "0803", "0804"])
+        self.assertEqual(codes(self.registry.chapter(9, "import")), ["09"])
+
+
+class HSRegistryLoadTests(TransactionTestCase):
+    """itc_hs_master is unmanaged, so the test creates and drops it."""
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(ItcHsMaster)
+        self.addCleanup(self.drop_table)
+
+        ItcHsMaster.objects.bulk_create(
+            ItcHsMaster(
+                id=r[0], hs_code=r[1], description=r[2], policy=r[3], schedule_type=r[5],
+                chapter_num=r[6], parent_hs_code=r[7], hs_level=r[8],
+            )
+            for r in rows() + rows("export")[:2]
+        )
+
+    def drop_table(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(ItcHsMaster)
+
+    def test_load_groups_rows_by_schedule_type(self):
+        registry = HSRegistry(refresh_interval=3600)
+        registry.load("v1")
+        registry._checked_at = time.monotonic()
+
+        self.assertEqual(registry.version, "v1")
+        self.assertEqual(codes(registry.children("0804", "import")), ["08045020", "08045030"])
+        self.assertEqual(codes(registry.children("", "export")), ["08"])
+        self.assertEqual(codes(registry.children("08", "export")), ["0803"])
@@ -0,0 +1,159 @@
+import time
+import uuid
+from unittest import skipUnless
+
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from hs.services.hs_vector_index import HSVectorIndex, HSVectorPartition
+
+DIM = 8
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    return [
+        (uuid.uuid4(), f"{i:08d}", f"item {i}", "Free", 8, list(vectors[i]))
+        for i in range(n)
+    ]
+
+
+def full_sort(rows, query):
+    """What `ORDER BY embedding <=> q` returns: every row by cosine distance."""
+    matrix = np.array([r[5] for r in rows], dtype=np.float64)
+    q = np.asarray(query, dtype=np.float64)
+    distances = 1.0 - matrix @ q / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(q))
+    order = np.argsort(distances, kind="stable")
+    return [int(i) for i in order], distances
+
+
+class HSVectorPartitionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rows = make_rows(300)
+        self.partition = HSVectorPartition(self.rows)
+        self.queries = np.random.default_rng(1).normal(size=(5, DIM)).astype(np.float32)
+
+    @staticmethod
+    def unit(query):
+        return query / np.linalg.norm(query)
+
+    def test_top_k_matches_a_full_sort(self):
+        for query in self.queries:
+            expected, distances = full_sort(self.rows, query)
+
+            hits = self.partition.top_k(self.unit(query), 20)
+
+            self.assertEqual([i for i, _ in hits], expected[:20])
+            np.testing.assert_allclose([d for _, d in hits], distances[expected[:20]], atol=1e-5)
+
+    def test_top_k_batch_matches_top_k(self):
+        queries = np.stack([self.unit(q) for q in self.queries])
+
+        batch = self.partition.top_k_batch(queries, 10)
+
+        for query, hits in zip(queries, batch):
+            single = self.partition.top_k(query, 10)
+            self.assertEqual([i for i, _ in hits], [i for i, _ in single])
+            np.testing.assert_allclose([d for _, d in hits], [d for _, d in single], atol=1e-6)
+
+    def test_k_larger_than_partition(self):
+        partition = HSVectorPartition(self.rows[:3])
+
+        self.assertEqual(len(partition.top_k(self.unit(self.queries[0]), 20)), 3)
+
+    def test_zero_vector_ranks_last(self):
+        rows = self.rows[:4] + [(uuid.uuid4(), "00000000", "empty", "Free", 8, [0.0] * DIM)]
+        partition = HSVectorPartition(rows)
+
+        hits = partition.top_k(self.unit(self.queries[0]), 5)
+
+        self.assertEqual(hits[-1][0], 4)
+        self.assertEqual(hits[-1][1], float("inf"))
+
+
+class HSVectorIndexSearchTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rows = make_rows(50)
+        self.index = HSVectorIndex(refresh_interval=3600)
+        self.index._partitions = {"import": HSVectorPartition(self.rows)}
+        self.index._version = "test"
+        self.index._checked_at = time.monotonic()
+
+    def test_search_returns_row_data_in_distance_order(self):
+        query = self.rows[7][5]
+
+        hits = self.index.search(query, "import", limit=3)
+
+        self.assertEqual(hits[0]["id"], self.rows[7][0])
+        self.assertEqual(hits[0]["hs_code"], "00000007")
+        self.assertAlmostEqual(hits[0]["distance"], 0.0, places=5)
+        self.assertEqual(hits, sorted(hits, key=lambda h: h["distance"]))
+
+    def test_unknown_schedule_type_and_zero_query(self):
+        self.assertEqual(self.index.search(self.rows[0][5], "export"), [])
+        self.assertEqual(self.index.search([0.0] * DIM, "import"), [])
+
+    def test_search_many_matches_search(self):
+        queries = [self.rows[1][5], [0.0] * DIM, self.rows[2][5]]
+
+        results = self.index.search_many(queries, "import", limit=5)
+
+        self.assertEqual(results[1], [])
+        for hits, query in [(results[0], queries[0]), (results[2], queries[2])]:
+            single = self.index.search(query, "import", limit=5)
+            self.assertEqual([h["id"] for h in hits], [h["id"] for h in single])
+            np.testing.assert_allclose(
+                [h["distance"] for h in hits], [h["distance"] for h in single], atol=1e-6
+            )
+
+
+@skipUnless(connection.vendor == "postgresql", "comparing against `<=>` needs Postgres with pgvector")
+class HSVectorIndexSQLParityTests(TestCase):
+    """The in-memory top-k against the pgvector query it replaces."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rows = make_rows(200, seed=2)
+        with connection.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            cur.execute(
+                f"""
+                CREATE TABLE itc_hs_master (
+                    id uuid PRIMARY KEY, hs_code varchar(10), description text,
+                    policy text, schedule_type varchar(10), chapter_num int,
+                    embedding vector({DIM})
+                )
+                """
+            )
+            for id_, code, description, policy, chapter, vector in cls.rows:
+                cur.execute(
+                    "INSERT INTO itc_hs_master (id, hs_code, description, policy, schedule_type, chapter_num, embedding)"
+                    " VALUES (%s, %s, %s, %s, 'import', %s, %s::vector)",
+                    [id_, code, description, policy, chapter, str([float(x) for x in vector])],
+                )
+
+    def test_top_k_matches_sql(self):
+        index = HSVectorIndex(refresh_interval=3600)
+        index.load("test")
+        index._checked_at = time.monotonic()
+
+        for query in np.random.default_rng(3).normal(size=(5, DIM)):
+            literal = str([float(x) for x in query])
+            with connection.cursor() as cur:
+                cur.execute(
+                    "SELECT id, embedding <=> %s::vector AS distance FROM itc_hs_master"
+                    " WHERE schedule_type = 'import' ORDER BY distance LIMIT 20",
+                    [literal],
+                )
+                expected = cur.fetchall()
+
+            hits = index.search(query, "import", limit=20)
+
+            self.assertEqual([h["id"] for h in hits], [r[0] for r in expected])
+            np.testing.assert_allclose(
+                [h["distance"] for h in hits], [r[1] for r in expected], atol=1e-5
+            )
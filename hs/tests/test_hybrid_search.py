@@ -0,0 +1,145 @@
+import uuid
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from hs.models import ItcHsMaster
+from hs.services.hybrid_search import HSHybridSearchEngine
+from hs.services.trigram_search import HSNgramIndex
+
+
+class EngineWithoutEmbedder(HSHybridSearchEngine):
+    def __init__(self):
+        # No embedding backend needed: vector hits are passed in directly.
+        pass
+
+
+class HybridSearchSQLTests(SimpleTestCase):
+
+    def test_escape_like(self):
+        self.assertEqual(HSHybridSearchEngine.escape_like("10%_a\\b"), "10\\%\\_a\\\\b")
+
+    def test_vector_source(self):
+        engine = EngineWithoutEmbedder()
+        self.assertIn("unnest(", engine.build_sql(use_index=True))
+        self.assertIn("embedding <=>", engine.build_sql(use_index=False))
+
+
+@skipUnless(connection.vendor == "postgresql", "reciprocal-rank fusion SQL needs Postgres (pg_trgm)")
+class HybridSearchFusionTests(TestCase):
+    """Runs the fusion statement with in-memory vector hits (no pgvector needed)."""
+
+    ROWS = {
+        # name: (hs_code, description)
+        "both": ("08045020", "Mangoes, fresh"),
+        "lexical": ("08045030", "Mangoes, dried"),
+        "vector": ("08043000", "Pineapples"),
+        "neither": ("08030010", "Bananas"),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = {name: uuid.uuid4() for name in cls.ROWS}
+        with connection.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cur.execute(
+                """
+                CREATE TABLE itc_hs_master (
+                    id uuid PRIMARY KEY, hs_code varchar(10), description text,
+                    policy text, policy_conditions text, schedule_type varchar(10),
+                    chapter_num int, metadata jsonb DEFAULT '{}', parent_hs_code varchar(10),
+                    hs_level int
+                )
+                """
+            )
+            for name, (code, description) in cls.ROWS.items():
+                cur.execute(
+                    "INSERT INTO itc_hs_master (id, hs_code, description, schedule_type, chapter_num, hs_level)"
+                    " VALUES (%s, %s, %s, 'import', 8, 8)",
+                    [cls.ids[name], code, description],
+                )
+
+    def search(self, query, vector_hits, limit=10):
+        engine = EngineWithoutEmbedder()
+        params = {
+            "query": query,
+            "pattern": f"%{engine.escape_like(query)}%",
+            "schedule_type": "import",
+            "candidates": 10,
+            "limit": limit,
+            "rrf_k": 60.0,
+            "lexical_weight": 1.0,
+            "vector_weight": 1.0,
+            "vector_ids": [str(self.ids[name]) for name, _ in vector_hits],
+            "vector_distances": [distance for _, distance in vector_hits],
+        }
+        return list(ItcHsMaster.objects.raw(engine.build_sql(use_index=True), params))
+
+    def test_fused_ranking(self):
+        results = self.search("mangoes", [("vector", 0.1), ("both", 0.2)])
+        by_code = {r.hs_code: r for r in results}
+
+        self.assertEqual([r.hs_code for r in results][0], "08045020")
+        self.assertNotIn("08030010", by_code)
+        self.assertEqual(len(results), 3)
+
+        both = by_code["08045020"]
+        self.assertEqual(both.vector_rank, 2)
+        self.assertIsNotNone(both.lexical_rank)
+        self.assertAlmostEqual(both.score, 1 / (60 + both.lexical_rank) + 1 / (60 + 2))
+
+        vector_only = by_code["08043000"]
+        self.assertIsNone(vector_only.lexical_rank)
+        self.assertAlmostEqual(vector_only.score, 1 / 61)
+        self.assertAlmostEqual(vector_only.vector_distance, 0.1)
+
+    def test_lexical_only(self):
+        results = self.search("dried", [])
+
+        self.assertEqual([r.hs_code for r in results], ["08045030"])
+        self.assertIsNone(results[0].vector_rank)
+        self.assertAlmostEqual(results[0].score, 1 / 61)
+
+    def test_like_wildcards_are_literal(self):
+        self.assertEqual(self.search("%", []), [])
+
+
+@skipIf(connection.vendor == "postgresql", "the lexical-only fallback runs off Postgres")
+class HybridSearchFallbackTests(TransactionTestCase):
+    """itc_hs_master is unmanaged, so the test creates and drops it."""
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(ItcHsMaster)
+        self.addCleanup(self.drop_table)
+
+        for code, description, schedule_type in [
+            ("08045020", "Mangoes, fresh", "import"),
+            ("08045030", "Mangoes, dried", "import"),
+            ("08045040", "Mangoes, pulp", "export"),
+            ("08030010", "Bananas", "import"),
+        ]:
+            ItcHsMaster.objects.create(
+                id=uuid.uuid4(), hs_code=code, description=description,
+                schedule_type=schedule_type, chapter_num=8, hs_level=8,
+            )
+
+        HSNgramIndex._instance, previous = None, HSNgramIndex._instance
+        self.addCleanup(setattr, HSNgramIndex, "_instance", previous)
+
+    def drop_table(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(ItcHsMaster)
+
+    def test_lexical_only_results_with_fusion_annotations(self):
+        engine = EngineWithoutEmbedder()
+        engine.rrf_k, engine.lexical_weight = 60.0, 1.0
+
+        results = engine.search("mango", "import", limit=10)
+
+        self.assertEqual(sorted(r.hs_code for r in results), ["08045020", "08045030"])
+        self.assertEqual([r.lexical_rank for r in results], [1, 2])
+        self.assertIsNone(results[0].vector_rank)
+        self.assertIsNone(results[0].vector_distance)
+        self.assertAlmostEqual(results[0].score, 1 / 61)
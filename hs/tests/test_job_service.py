@@ -0,0 +1,123 @@
+import threading
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from hs.models import HsJob
+from hs.services.job_service import HSJobService, JobError
+
+
+class InlineExecutor:
+    """Runs jobs on the submitting thread, inside the test transaction."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class HSJobServiceTests(TestCase):
+
+    def setUp(self):
+        # run() closes stale connections between jobs, which would end the
+        # test transaction.
+        patcher = mock.patch("hs.services.job_service.close_old_connections")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.service = HSJobService(max_workers=1, max_pending=4, ttl=60, stale_seconds=300)
+        self.service._executor = InlineExecutor()
+        self.now = timezone.now()
+
+    def finished_job(self, params, result):
+        return HsJob.objects.create(
+            kind="analyze",
+            params=params,
+            dedup_key=HSJobService.dedup_key("analyze", params),
+            status=HsJob.DONE,
+            result=result,
+            finished_at=self.now,
+            expires_at=self.now + timedelta(seconds=60),
+        )
+
+    def active_job(self, status, age, started=None, heartbeat=None):
+        job = HsJob.objects.create(kind="analyze", params={}, dedup_key=uuid.uuid4().hex, status=status)
+        HsJob.objects.filter(id=job.id).update(
+            created_at=self.now - timedelta(seconds=age),
+            started_at=started and self.now - timedelta(seconds=started),
+            heartbeat_at=heartbeat and self.now - timedelta(seconds=heartbeat),
+        )
+        job.refresh_from_db()
+        return job
+
+    def test_identical_request_reuses_finished_job(self):
+        calls = []
+
+        def fn(params):
+            calls.append(params)
+            return {"hs_code": params["hs_code"]}
+
+        job, created = self.service.submit("analyze", {"hs_code": "0804"}, fn)
+        again, created_again = self.service.submit("analyze", {"hs_code": "0804"}, fn)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.id, job.id)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(HsJob.objects.get(id=job.id).result, {"hs_code": "0804"})
+        self.assertEqual(self.service.stats()["deduplicated"], 1)
+
+    def test_reuse_skips_degraded_results_only(self):
+        plain = self.finished_job({"n": 1}, {"answer": "x"})
+        not_degraded = self.finished_job({"n": 2}, {"answer": "x", "degraded": False})
+        self.finished_job({"n": 3}, {"answer": None, "degraded": True})
+
+        self.assertEqual(self.service.find_reusable(plain.dedup_key), plain)
+        self.assertEqual(self.service.find_reusable(not_degraded.dedup_key), not_degraded)
+        self.assertIsNone(self.service.find_reusable(HSJobService.dedup_key("analyze", {"n": 3})))
+
+    def test_job_error_fails_job(self):
+        def fn(params):
+            raise JobError("HS code not found")
+
+        job, _ = self.service.submit("analyze", {"hs_code": "9999"}, fn)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, HsJob.FAILED)
+        self.assertEqual(job.error, "HS code not found")
+        self.assertEqual(self.service.stats()["failed"], 1)
+
+    def test_running_job_stale_from_start(self):
+        recent = self.active_job(HsJob.RUNNING, age=1000, started=10)
+        stuck = self.active_job(HsJob.RUNNING, age=1000, started=400)
+
+        self.assertFalse(self.service.expire_stale(recent, self.now))
+        self.assertTrue(self.service.expire_stale(stuck, self.now))
+        self.assertEqual(HsJob.objects.get(id=stuck.id).status, HsJob.FAILED)
+
+    def test_queued_job_stale_without_heartbeat(self):
+        alive = self.active_job(HsJob.PENDING, age=1000, heartbeat=10)
+        gone = self.active_job(HsJob.PENDING, age=1000, heartbeat=400)
+
+        self.assertFalse(self.service.expire_stale(alive, self.now))
+        self.assertTrue(self.service.expire_stale(gone, self.now))
+
+    def test_job_queued_here_never_stale(self):
+        job = self.active_job(HsJob.PENDING, age=1000)
+        self.service._events[job.id] = threading.Event()
+
+        self.assertFalse(self.service.expire_stale(job, self.now))
+
+    def test_expired_job_not_run_or_overwritten(self):
+        job = self.active_job(HsJob.PENDING, age=1000)
+        self.assertTrue(self.service.expire_stale(job, self.now))
+        calls = []
+
+        self.service.run(job.id, calls.append, {})
+        self.assertEqual(calls, [])
+
+        self.service.finish(job.id, HsJob.DONE, result={"late": True})
+        job.refresh_from_db()
+        self.assertEqual(job.status, HsJob.FAILED)
+        self.assertIsNone(job.result)
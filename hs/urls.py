@@ -1,14 +1,43 @@
+from django.conf import settings
 from django.urls import path
-from hs.views.ask import HSAskView
-from hs.views.search import HSSearchView
-from hs.views.chapter import HSChapterView
-from hs.views.predict import HSPredictView
-from hs.views.analyze import HSAnalyzeView
+from hs.views.ask import HSAskView, HSAskAsyncView
+from hs.views.search import HSSearchView, HSSearchAsyncView
+from hs.views.chapter import HSChapterView, HSChapterAsyncView
+from hs.views.predict import HSPredictView, HSPredictAsyncView, HSPredictBatchView
+from hs.views.analyze import HSAnalyzeView, HSAnalyzeAsyncView
+from hs.views.jobs import HSJobSubmitView, HSJobView, HSJobAsyncView
+from hs.views.export import HSExportView, HSExportAsyncView
+
+# Async views only pay off under an ASGI server (uvicorn core.asgi:application).
+if settings.ASYNC_VIEWS_ENABLED:
+    views = {
+        "predict": HSPredictAsyncView,
+        "analyze": HSAnalyzeAsyncView,
+        "ask": HSAskAsyncView,
+        "search": HSSearchAsyncView,
+        "chapter": HSChapterAsyncView,
+        "job": HSJobAsyncView,
+        "export": HSExportAsyncView,
+    }
+else:
+    views = {
+        "predict": HSPredictView,
+        "analyze": HSAnalyzeView,
+        "ask": HSAskView,
+        "search": HSSearchView,
+        "chapter": HSChapterView,
+        "job": HSJobView,
+        "export": HSExportView,
+    }
 
 urlpatterns = [
-    path("predict/", HSPredictView.as_view()),
-    path("analyze/", HSAnalyzeView.as_view()),
-    path("ask/", HSAskView.as_view()),
-    path("search/", HSSearchView.as_view()),
-    path("chapter/<int:chapter_num>/", HSChapterView.as_view()),
+    path("predict/", views["predict"].as_view()),
+    path("predict/batch/", HSPredictBatchView.as_view()),
+    path("analyze/", views["analyze"].as_view()),
+    path("ask/", views["ask"].as_view()),
+    path("search/", views["search"].as_view()),
+    path("chapter/<int:chapter_num>/", views["chapter"].as_view()),
+    path("jobs/", HSJobSubmitView.as_view()),
+    path("jobs/<uuid:job_id>/", views["job"].as_view(), name="hs-job"),
+    path("export/", views["export"].as_view()),
 ]
@@ -1,44 +1,72 @@
+from adrf.views import APIView as AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from hs.serializers import HSAnalyzeSerializer
-from hs.services.hs_service import HSService
-from hs.services.rag_service import HSRAGService
-from hs.services.prompt_service import build_analysis_prompt
-from api.services.llm_service import LLMService
+from hs.services.analyze_service import HSAnalyzeService
+from api.services.http_cache import CachedResponder
+
+
+def analyze_cache():
+    # The explanation is built from the HS record and the KB regulatory context.
+    return CachedResponder("hs.analyze", ("itc_hs_master", "knowledge_base"))
+
+
+def analyze_response(result):
+
+    if not result:
+        return Response({"error": "Invalid HS Code"}, status=404)
+
+    return Response(result)
 
 
 class HSAnalyzeView(APIView):
+    """POST a JSON body, or GET ?hs_code=&schedule_type= (cacheable, ETag)."""
 
     permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        return self.analyze(request, request.query_params)
+
     def post(self, request):
+        return self.analyze(request, request.data)
 
-        serializer = HSAnalyzeSerializer(data=request.data)
+    def analyze(self, request, data):
+
+        serializer = HSAnalyzeSerializer(data=data)
         serializer.is_valid(raise_exception=True)
 
-        hs_code = serializer.validated_data["hs_code"]
-        schedule_type = serializer.validated_data["schedule_type"]
+        params = dict(serializer.validated_data)
+
+        def build():
+            return analyze_response(
+                HSAnalyzeService().analyze(params["hs_code"], params["schedule_type"])
+            )
 
-        hs_record = HSService.get_by_code(hs_code, schedule_type)
+        return analyze_cache().respond(request, params, build)
 
-        if not hs_record:
-            return Response({"error": "Invalid HS Code"}, status=404)
 
-        rag_service = HSRAGService()
-        context, sources = rag_service.build_context_for_hs(hs_record)
+class HSAnalyzeAsyncView(AsyncAPIView):
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return await self.analyze(request, request.query_params)
+
+    async def post(self, request):
+        return await self.analyze(request, request.data)
+
+    async def analyze(self, request, data):
+
+        serializer = HSAnalyzeSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        params = dict(serializer.validated_data)
 
-        llm = LLMService()
-        explanation = llm.get_reasoning(query=build_analysis_prompt(), context=context)
+        async def build():
+            return analyze_response(
+                await HSAnalyzeService().aanalyze(params["hs_code"], params["schedule_type"])
+            )
 
-        return Response(
-            {
-                "hs_code": hs_record.hs_code,
-                "description": hs_record.description,
-                "policy": hs_record.policy,
-                "policy_conditions": hs_record.policy_conditions,
-                "ai_explanation": explanation,
-                "sources": sources,
-            }
-        )
+        return await analyze_cache().arespond(request, params, build)
@@ -1,9 +1,22 @@
+from adrf.views import APIView as AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from hs.serializers import HSAskSerializer
 from hs.services.ask_service import HSAskService
+from api.services.sse import sse_response
+
+
+def ask_payload(answer, sources):
+
+    payload = {"answer": answer, "sources": sources}
+
+    # LLM unavailable: retrieval-only response
+    if answer is None:
+        payload["degraded"] = True
+
+    return payload
 
 
 class HSAskView(APIView):
@@ -18,6 +31,31 @@ class HSAskView(APIView):
         question = serializer.validated_data["question"]
 
         service = HSAskService()
+
+        if serializer.validated_data["stream"]:
+            return sse_response(service.stream_ask(question))
+
         answer, sources = service.ask(question)
 
-        return Response({"answer": answer, "sources": sources})
+        return Response(ask_payload(answer, sources))
+
+
+class HSAskAsyncView(AsyncAPIView):
+
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request):
+
+        serializer = HSAskSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        question = serializer.validated_data["question"]
+
+        service = HSAskService()
+
+        if serializer.validated_data["stream"]:
+            return sse_response(service.astream_ask(question))
+
+        answer, sources = await service.aask(question)
+
+        return Response(ask_payload(answer, sources))
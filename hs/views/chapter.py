@@ -1,8 +1,48 @@
+from adrf.views import APIView as AsyncAPIView
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from hs.serializers import HSChapterSerializer
 from hs.services.chapter_service import HSChapterService
+from api.services.http_cache import CachedResponder
+
+
+def chapter_cache():
+    # Codes come from itc_hs_master, the overview from hs_chapter_overview.
+    return CachedResponder("hs.chapter", ("itc_hs_master", "hs_chapter_overview"))
+
+
+def chapter_payload(chapter_num, records, overview):
+
+    payload = {
+        "chapter": chapter_num,
+        "overview": overview,
+        "codes": [
+            {
+                "hs_code": r.hs_code,
+                "description": r.description,
+                "policy": r.policy,
+            }
+            for r in records
+        ],
+    }
+
+    # Generation was attempted, so no overview means the LLM was unavailable.
+    # A chapter without records has nothing to generate from.
+    if overview is None and records and settings.HS_CHAPTER_OVERVIEW_GENERATE_ON_MISS:
+        payload["degraded"] = True
+
+    return payload
+
+
+def chapter_schedule_type(request):
+
+    serializer = HSChapterSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+
+    return serializer.validated_data["schedule_type"]
 
 
 class HSChapterView(APIView):
@@ -11,23 +51,29 @@ class HSChapterView(APIView):
 
     def get(self, request, chapter_num):
 
-        schedule_type = request.query_params.get("schedule_type", "import")
+        schedule_type = chapter_schedule_type(request)
 
-        service = HSChapterService()
+        def build():
+            records, overview = HSChapterService().get_chapter(chapter_num, schedule_type)
+            return Response(chapter_payload(chapter_num, records, overview))
 
-        records, overview = service.get_chapter(chapter_num, schedule_type)
+        return chapter_cache().respond(
+            request, {"chapter_num": chapter_num, "schedule_type": schedule_type}, build
+        )
 
-        return Response(
-            {
-                "chapter": chapter_num,
-                "overview": overview,
-                "codes": [
-                    {
-                        "hs_code": r.hs_code,
-                        "description": r.description,
-                        "policy": r.policy,
-                    }
-                    for r in records
-                ],
-            }
+
+class HSChapterAsyncView(AsyncAPIView):
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, chapter_num):
+
+        schedule_type = chapter_schedule_type(request)
+
+        async def build():
+            records, overview = await HSChapterService().aget_chapter(chapter_num, schedule_type)
+            return Response(chapter_payload(chapter_num, records, overview))
+
+        return await chapter_cache().arespond(
+            request, {"chapter_num": chapter_num, "schedule_type": schedule_type}, build
         )
@@ -0,0 +1,101 @@
+from asgiref.sync import sync_to_async
+from adrf.views import APIView as AsyncAPIView
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from hs.serializers import HSExportSerializer
+from hs.services.export_service import FORMATS, HSExportService, parquet_available
+from api.services.data_version import DataVersionService
+from api.services.http_cache import CachedResponder, etag_matches, make_etag
+
+
+def validate_export_request(query_params):
+    """Return (params, error_response)."""
+
+    serializer = HSExportSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    params = dict(serializer.validated_data)
+
+    if params["output"] == "parquet" and not parquet_available():
+        return None, Response(
+            {"error": "parquet export requires pyarrow"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return params, None
+
+
+def export_etag(params):
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+    return make_etag("hs.export", DataVersionService.get_version("itc_hs_master"), params)
+
+
+def export_response(request, params, etag, body):
+
+    if etag is not None and etag_matches(request, etag):
+        return CachedResponder.finish(Response(status=304), etag)
+
+    _, content_type, extension = FORMATS[params["output"]]
+
+    response = StreamingHttpResponse(body, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="itc_hs_{params["schedule_type"]}.{extension}"'
+    )
+    response["X-Accel-Buffering"] = "no"
+
+    if etag is not None:
+        CachedResponder.finish(response, etag)
+
+    return response
+
+
+def split_params(params):
+    params = dict(params)
+    return params.pop("output"), params
+
+
+class HSExportView(APIView):
+    """
+    GET ?schedule_type=&output=csv|ndjson|parquet[&chapter_from=&chapter_to=&hs_level=]
+
+    Streams the matching itc_hs_master rows as a file download. The ETag
+    changes with the itc_hs_master data version, so a sync job can skip
+    unchanged schedules with If-None-Match.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+
+        params, error = validate_export_request(request.query_params)
+        if error:
+            return error
+
+        output, filters = split_params(params)
+        etag = export_etag(params)
+        body = HSExportService().stream(output, consistent=etag is not None, **filters)
+
+        return export_response(request, params, etag, body)
+
+
+class HSExportAsyncView(AsyncAPIView):
+    """Same as HSExportView; the body is an async iterator, so ASGI streams it."""
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+
+        params, error = validate_export_request(request.query_params)
+        if error:
+            return error
+
+        output, filters = split_params(params)
+        etag = await sync_to_async(export_etag)(params)
+        body = HSExportService().astream(output, consistent=etag is not None, **filters)
+
+        return export_response(request, params, etag, body)
@@ -0,0 +1,150 @@
+from adrf.views import APIView as AsyncAPIView
+from django.conf import settings
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from hs.models import HsJob
+from hs.serializers import (
+    HSAnalyzeSerializer,
+    HSChapterJobSerializer,
+    HSJobSubmitSerializer,
+    HSPredictSerializer,
+)
+from hs.services.analyze_service import HSAnalyzeService
+from hs.services.chapter_service import HSChapterService
+from hs.services.job_service import HSJobService, JobError, JobQueueFull
+from hs.services.predict_service import HSPredictService
+from hs.views.chapter import chapter_payload
+
+
+def run_analyze(params):
+
+    result = HSAnalyzeService().analyze(params["hs_code"], params["schedule_type"])
+
+    if not result:
+        raise JobError("Invalid HS Code")
+
+    return result
+
+
+def run_predict(params):
+
+    return HSPredictService().predict(params["description"], params["schedule_type"])
+
+
+def run_chapter(params):
+
+    chapter_num = params["chapter_num"]
+    records, overview = HSChapterService().get_chapter(chapter_num, params["schedule_type"])
+
+    return chapter_payload(chapter_num, records, overview)
+
+
+# kind -> (params serializer, job function); results match the sync endpoints.
+JOB_KINDS = {
+    "analyze": (HSAnalyzeSerializer, run_analyze),
+    "predict": (HSPredictSerializer, run_predict),
+    "chapter": (HSChapterJobSerializer, run_chapter),
+}
+
+
+def job_payload(job):
+
+    payload = {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+    }
+
+    if job.status == HsJob.DONE:
+        payload["result"] = job.result
+    elif job.status == HsJob.FAILED:
+        payload["error"] = job.error
+
+    return payload
+
+
+def wait_seconds(request):
+    """?wait=<seconds> long-poll time, capped at HS_JOB_MAX_WAIT."""
+
+    try:
+        wait = float(request.query_params.get("wait", 0))
+    except ValueError:
+        wait = 0
+
+    return max(0.0, min(wait, settings.HS_JOB_MAX_WAIT))
+
+
+class HSJobSubmitView(APIView):
+    """
+    Submit an analyze/predict/chapter request as a background job:
+
+        {"kind": "analyze", "params": {"hs_code": "01011010", "schedule_type": "import"}}
+
+    Returns 202 with the job (an identical queued, running or recent job is
+    returned instead of a new one). Poll GET /jobs/<job_id>/?wait=20.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+
+        serializer = HSJobSubmitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        kind = serializer.validated_data["kind"]
+        params_serializer, fn = JOB_KINDS[kind]
+
+        params = params_serializer(data=serializer.validated_data["params"])
+        params.is_valid(raise_exception=True)
+
+        try:
+            job, created = HSJobService.get_instance().submit(kind, dict(params.validated_data), fn)
+        except JobQueueFull:
+            return Response(
+                {"error": "Too many pending jobs, retry later"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "5"},
+            )
+
+        return Response(
+            job_payload(job),
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": reverse("hs-job", args=[job.id])},
+        )
+
+
+class HSJobView(APIView):
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+
+        job = HSJobService.get_instance().wait(job_id, wait_seconds(request))
+
+        if job is None:
+            return Response({"error": "Job not found or expired"}, status=404)
+
+        return Response(job_payload(job))
+
+
+class HSJobAsyncView(AsyncAPIView):
+    """Long-polls without holding a worker thread between polls."""
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, job_id):
+
+        job = await HSJobService.get_instance().await_job(job_id, wait_seconds(request))
+
+        if job is None:
+            return Response({"error": "Job not found or expired"}, status=404)
+
+        return Response(job_payload(job))
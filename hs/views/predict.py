@@ -1,8 +1,80 @@
+import codecs
+import json
+import logging
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from adrf.views import APIView as AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from hs.services.predict_service import HSPredictService
+from hs.services.batch_predict_service import HSBatchPredictService, PARSERS
+
+logger = logging.getLogger(__name__)
+
+
+def validate_predict_request(data):
+    """Return (description, schedule_type, error_response)."""
+
+    description = data.get("description")
+    schedule_type = data.get("schedule_type")
+
+    if not description or not schedule_type:
+        return None, None, Response(
+            {"error": "description and schedule_type required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if schedule_type not in ["import", "export"]:
+        return None, None, Response(
+            {"error": "schedule_type must be import/export"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return description, schedule_type, None
+
+
+def manifest_stream(request):
+    """
+    Return (stream, error_response) for the request body.
+
+    DRF reports a body without Content-Length as empty, which is how chunked
+    uploads arrive. Under ASGI the server has already de-chunked the body;
+    under WSGI it can only be read to the end when the server marks the
+    input as terminated (gunicorn does).
+    """
+
+    if request.stream is not None:
+        return request.stream, None
+
+    if "chunked" not in request.headers.get("Transfer-Encoding", "").lower():
+        return None, Response(
+            {"error": "empty manifest"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    django_request = request._request
+    if isinstance(django_request, ASGIRequest):
+        return django_request, None
+    if django_request.META.get("wsgi.input_terminated"):
+        return django_request.META["wsgi.input"], None
+
+    return None, Response(
+        {"error": "chunked uploads are not supported by this server; send Content-Length"},
+        status=status.HTTP_411_LENGTH_REQUIRED,
+    )
+
+
+def ndjson_lines(results):
+    try:
+        for r in results:
+            yield json.dumps(r, cls=DjangoJSONEncoder) + "\n"
+    except Exception:
+        # Headers are already sent, so end the body with an error line. The
+        # exception text stays in the log; it can carry URLs or SQL.
+        logger.exception("Batch prediction stream failed")
+        yield json.dumps({"line": None, "error": "Internal server error"}) + "\n"
 
 
 class HSPredictView(APIView):
@@ -10,22 +82,73 @@ class HSPredictView(APIView):
 
     def post(self, request):
 
-        description = request.data.get("description")
-        schedule_type = request.data.get("schedule_type")
+        description, schedule_type, error = validate_predict_request(request.data)
+        if error:
+            return error
+
+        service = HSPredictService()
+        result = service.predict(description, schedule_type)
+
+        return Response(result)
+
 
-        if not description or not schedule_type:
+class HSPredictAsyncView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request):
+
+        description, schedule_type, error = validate_predict_request(request.data)
+        if error:
+            return error
+
+        service = HSPredictService()
+        result = await service.apredict(description, schedule_type)
+
+        return Response(result)
+
+
+class HSPredictBatchView(APIView):
+    """
+    Classify a CSV (text/csv) or NDJSON (application/x-ndjson) manifest.
+
+    The body is read as a stream (Content-Length or chunked); results are
+    returned as NDJSON, one object per input line in completion order, each
+    carrying its `line` number. A failure mid-stream ends the body with a
+    `{"line": null, "error": ...}` line.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+
+        parse = PARSERS.get(request.content_type.split(";")[0].strip().lower())
+        if parse is None:
             return Response(
-                {"error": "description and schedule_type required"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": f"Content-Type must be one of {sorted(PARSERS)}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             )
 
-        if schedule_type not in ["import", "export"]:
+        schedule_type = request.query_params.get("schedule_type")
+        if schedule_type and schedule_type not in ["import", "export"]:
             return Response(
                 {"error": "schedule_type must be import/export"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        service = HSPredictService()
-        result = service.predict(description, schedule_type)
+        stream, error = manifest_stream(request)
+        if error:
+            return error
 
-        return Response(result)
+        explain = request.query_params.get("explain", "true").lower() != "false"
+        lines = codecs.iterdecode(iter(stream.readline, b""), "utf-8-sig")
+
+        results = HSBatchPredictService().predict_stream(
+            parse(lines, schedule_type), explain=explain
+        )
+
+        response = StreamingHttpResponse(
+            ndjson_lines(results),
+            content_type="application/x-ndjson",
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
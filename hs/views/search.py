@@ -1,36 +1,90 @@
+from adrf.views import APIView as AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from hs.serializers import HSSearchSerializer
 from hs.services.search_service import HSSearchService
+from api.services.http_cache import CachedResponder
+
+
+def search_payload(results, summary):
+
+    payload = {
+        "results": [
+            {
+                "hs_code": r.hs_code,
+                "description": r.description,
+                "policy": r.policy,
+                "score": r.score,
+                "lexical_rank": r.lexical_rank,
+                "vector_rank": r.vector_rank,
+                "vector_distance": r.vector_distance,
+            }
+            for r in results
+        ],
+        "ai_summary": summary,
+    }
+
+    # The summary is always requested, so None means the LLM was unavailable.
+    if summary is None:
+        payload["degraded"] = True
+
+    return payload
+
+
+def search_cache():
+    return CachedResponder("hs.search", ("itc_hs_master",))
 
 
 class HSSearchView(APIView):
+    """POST a JSON body, or GET ?query=&schedule_type= (cacheable, ETag)."""
 
     permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        return self.search(request, request.query_params)
+
     def post(self, request):
+        return self.search(request, request.data)
 
-        serializer = HSSearchSerializer(data=request.data)
+    def search(self, request, data):
+
+        serializer = HSSearchSerializer(data=data)
         serializer.is_valid(raise_exception=True)
 
-        query = serializer.validated_data["query"]
-        schedule_type = serializer.validated_data["schedule_type"]
+        params = dict(serializer.validated_data)
 
-        service = HSSearchService()
-        results, summary = service.search(query, schedule_type, summarize=True)
+        def build():
+            results, summary = HSSearchService().search(
+                params["query"], params["schedule_type"], summarize=True
+            )
+            return Response(search_payload(results, summary))
 
-        return Response(
-            {
-                "results": [
-                    {
-                        "hs_code": r.hs_code,
-                        "description": r.description,
-                        "policy": r.policy,
-                    }
-                    for r in results
-                ],
-                "ai_summary": summary,
-            }
-        )
+        return search_cache().respond(request, params, build)
+
+
+class HSSearchAsyncView(AsyncAPIView):
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return await self.search(request, request.query_params)
+
+    async def post(self, request):
+        return await self.search(request, request.data)
+
+    async def search(self, request, data):
+
+        serializer = HSSearchSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        params = dict(serializer.validated_data)
+
+        async def build():
+            results, summary = await HSSearchService().asearch(
+                params["query"], params["schedule_type"], summarize=True
+            )
+            return Response(search_payload(results, summary))
+
+        return await search_cache().arespond(request, params, build)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Clerk JWKS endpoint.
+
+Serves a freshly generated RSA key set and mints tokens signed with it, so
+ClerkJWTAuthentication can be exercised without a Clerk instance:
+
+    python -m stubs.jwks_server --port 8766
+    export CLERK_ISSUER=http://127.0.0.1:8766
+    export JWKS_URL=http://127.0.0.1:8766/.well-known/jwks.json
+    curl "http://127.0.0.1:8766/token?sub=user_1&ttl=600"
+
+Routes:
+    GET  /.well-known/jwks.json   current public keys
+    GET  /token?sub=&ttl=&kid=    signed RS256 token for the issuer
+    POST /rotate                  add a new signing key (old keys stay listed)
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+class KeyRing:
+    def __init__(self):
+        self.keys = {}
+        self.current_kid = None
+        self.jwks_requests = 0
+        self._lock = threading.Lock()
+        self.rotate()
+
+    def rotate(self):
+        kid = f"stub-{uuid.uuid4().hex[:8]}"
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        with self._lock:
+            self.keys[kid] = private_key
+            self.current_kid = kid
+
+        return kid
+
+    def jwks(self):
+        with self._lock:
+            self.jwks_requests += 1
+            keys = []
+            for kid, private_key in self.keys.items():
+                jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+                jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+                keys.append(jwk)
+            return {"keys": keys}
+
+    def mint(self, issuer, sub="user_stub", ttl=3600, kid=None):
+        kid = kid or self.current_kid
+        now = int(time.time())
+        payload = {
+            "iss": issuer,
+            "sub": sub,
+            "iat": now,
+            "nbf": now,
+            "exp": now + ttl,
+            "email": f"{sub}@example.test",
+        }
+        return jwt.encode(payload, self.keys[kid], algorithm="RS256", headers={"kid": kid})
+
+
+def make_handler(keyring, issuer):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == "/.well-known/jwks.json":
+                return self._send_json(200, keyring.jwks())
+
+            if url.path == "/token":
+                token = keyring.mint(
+                    issuer,
+                    sub=params.get("sub", "user_stub"),
+                    ttl=int(params.get("ttl", 3600)),
+                    kid=params.get("kid"),
+                )
+                return self._send_json(200, {"token": token})
+
+            if url.path == "/stats":
+                return self._send_json(200, {"jwks_requests": keyring.jwks_requests})
+
+            self._send_json(404, {"detail": "not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path == "/rotate":
+                return self._send_json(200, {"kid": keyring.rotate()})
+            self._send_json(404, {"detail": "not found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8766, issuer=None):
+    issuer = issuer or f"http://{host}:{port}"
+    keyring = KeyRing()
+    server = ThreadingHTTPServer((host, port), make_handler(keyring, issuer))
+    server.keyring = keyring
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--issuer", help="iss claim (defaults to the server URL)")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.issuer)
+    print(f"JWKS stub listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Modal LLM gateway.
+
+Answers LLMService requests with a deterministic answer after a configurable
+latency, emits tokens at a fixed rate (as SSE when the request asks for a
+stream) and injects faults into a configurable fraction of requests:
+
+    error   answer with error_status after the latency
+    slow    answer after slow_latency instead of latency (tail latency)
+    hang    hold the connection for hang_seconds, then close it
+    drop    close the connection without answering
+
+    python -m stubs.llm_gateway --port 8767 --latency 0.5 --token-rate 50 --error-rate 0.01
+    export MODAL_LLM_URL=http://127.0.0.1:8767/
+
+The answer names the first HS code found in the request context, so the
+ask endpoints' hallucination guard passes and predict returns a candidate.
+
+Routes:
+    POST /           JSON {"answer": ...}, or SSE tokens when "stream" is set
+    GET  /stats      request/error/stream counters
+    POST /config     update any of GatewayConfig.FIELDS at runtime
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+HS_CODE_REGEX = re.compile(r"HS Code:\s*(\d{4,10})")
+FILLER = (
+    "The description matches this heading because of the material, the "
+    "function and the form in which the goods are presented for trade"
+).split()
+
+
+class GatewayConfig:
+    FIELDS = (
+        "latency", "token_rate", "tokens", "error_rate", "error_status",
+        "slow_rate", "slow_latency", "hang_rate", "hang_seconds", "drop_rate",
+    )
+    FAULTS = ("error", "slow", "hang", "drop")
+
+    def __init__(self, latency=0.5, token_rate=0.0, tokens=64, error_rate=0.0,
+                 error_status=503, slow_rate=0.0, slow_latency=5.0, hang_rate=0.0,
+                 hang_seconds=60.0, drop_rate=0.0, seed=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.streams = 0
+        self.faults = dict.fromkeys(self.FAULTS, 0)
+        self._lock = threading.Lock()
+
+    def update(self, values):
+        with self._lock:
+            for key in self.FIELDS:
+                if key in values:
+                    setattr(self, key, type(getattr(self, key))(values[key]))
+        return self.as_dict()
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def count(self, stream):
+        """Count a request and pick its fault (None for a normal answer)."""
+        with self._lock:
+            self.requests += 1
+            self.streams += bool(stream)
+            roll = self.random.random()
+            for fault in self.FAULTS:
+                rate = getattr(self, f"{fault}_rate")
+                if roll < rate:
+                    self.faults[fault] += 1
+                    return fault
+                roll -= rate
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "streams": self.streams,
+                "errors": self.faults["error"],
+                **{f"{fault}s": n for fault, n in self.faults.items() if fault != "error"},
+            }
+
+
+def build_tokens(payload, count):
+    text = f"{payload.get('context', '')}\n{payload.get('prompt', '')}"
+    match = HS_CODE_REGEX.search(text)
+    head = [f"HS Code: {match.group(1)}\n" if match else "HS Code: none\n", "Reasoning:"]
+    body = [" " + FILLER[i % len(FILLER)] for i in range(max(count - len(head), 0))]
+    return head + body
+
+
+def make_handler(config):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                return json.loads(raw or b"{}")
+            except ValueError:
+                return {}
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/stats":
+                return self._send_json(200, config.stats())
+            self._send_json(404, {"detail": "not found"})
+
+        def do_POST(self):
+            payload = self._read_json()
+
+            if urlparse(self.path).path == "/config":
+                return self._send_json(200, config.update(payload))
+
+            stream = bool(payload.get("stream")) or "text/event-stream" in self.headers.get("Accept", "")
+            fault = config.count(stream)
+
+            if fault == "drop":
+                self.close_connection = True
+                return
+            if fault == "hang":
+                time.sleep(config.hang_seconds)
+                self.close_connection = True
+                return
+
+            time.sleep(config.slow_latency if fault == "slow" else config.latency)
+            if fault == "error":
+                return self._send_json(config.error_status, {"detail": "stub gateway error"})
+
+            tokens = build_tokens(payload, min(config.tokens, int(payload.get("max_tokens") or config.tokens)))
+            delay = 1 / config.token_rate if config.token_rate else 0
+
+            if not stream:
+                time.sleep(delay * len(tokens))
+                return self._send_json(200, {"answer": "".join(tokens)})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            try:
+                for token in tokens:
+                    self.wfile.write(f"data: {json.dumps({'token': token})}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class GatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 2048
+
+    def handle_error(self, request, client_address):
+        # Clients that give up (timeouts, cancelled requests) are expected here.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def serve(host="127.0.0.1", port=8767, **config):
+    gateway_config = GatewayConfig(**config)
+    server = GatewayServer((host, port), make_handler(gateway_config))
+    server.config = gateway_config
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="tokens per second (0 = all at once)")
+    parser.add_argument("--tokens", type=int, default=64, help="tokens per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction answered after --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction held open for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction closed without an answer")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = serve(
+        args.host, args.port,
+        latency=args.latency, token_rate=args.token_rate, tokens=args.tokens,
+        error_rate=args.error_rate, error_status=args.error_status,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+        hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+        drop_rate=args.drop_rate, seed=args.seed,
+    )
+    print(f"LLM gateway stub listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()